@@ -1,31 +1,268 @@
 from google import genai
 import os
+import re
 import json
-import time  # ⏳ 캐시 시간 계산을 위해 추가
+import time
+import asyncio
+import random
+import hashlib
+import threading
+from concurrent.futures import TimeoutError as FutureTimeoutError
+import metrics
 import strategy
+from micro_batch import MicroBatcher, AsyncMicroBatcher
+from rate_limit import TokenBucket
+import cache_backend
 
 # ==========================================
-# 🔑 API 키 확인
+# 🔑 API 키 확인 (오프라인 가짜 모델 백엔드는 키 없이 동작)
 # ==========================================
+AI_BACKEND = os.environ.get("AI_BACKEND", "gemini")
 api_key = os.environ.get("GEMINI_API_KEY")
-if not api_key:
+if not api_key and AI_BACKEND != "fake":
     import config
     api_key = config.GEMINI_API_KEY
 
+MODEL_NAME = "gemini-3.1-flash-lite"  # model="gemini-3.5-flash",Gemini 3.1 Flash Lite
+
 # ==========================================
 # ⚡ 10분 서버 메모리 캐시 저장소 선언
 # ==========================================
-AI_RESPONSE_CACHE = {}
 CACHE_DURATION = 300  # 10분 = 600초
+CACHE_MAX_ENTRIES = 512  # 종목 x 전략 x 입력 조합 최대 보관 개수 (초과 시 LRU 제거)
 
+# TTL + 크기 제한 캐시: 같은 키로 동시에 들어온 요청은 Gemini 호출 한 번을 함께 기다립니다.
+# CACHE_BACKEND=sqlite면 모든 uvicorn 워커가 같은 캐시를 보므로, 다른 워커가 받아 둔 답도 그대로 재사용합니다.
+AI_RESPONSE_CACHE = cache_backend.make_cache("ai_response", maxsize=CACHE_MAX_ENTRIES, ttl=CACHE_DURATION)
 
-# 🌟 [수정] 함수의 첫 번째 인자로 ticker(종목명)를 받도록 확장합니다!
-def get_ai_decision(ticker, df, news_summary, strategy_type):
-    global AI_RESPONSE_CACHE
-    current_time = time.time()
+# ==========================================
+# 📦 마이크로 배칭 설정
+# ==========================================
+# 동시에 들어온 /analyze 요청들을 BATCH_WAIT 초 동안 모아서 한 번의 프롬프트로 판단합니다.
+BATCH_MAX_SIZE = 16
+BATCH_WAIT = 0.015
 
-    print(f"\n[🔍 AI_BRAIN] {ticker} AI 분석 모듈 진입")
+# ==========================================
+# 🚦 호출 한도 / 동시성 / 마감 시간
+# ==========================================
+# Gemini 분당 요청 한도(RPM)에 맞춘 토큰 버킷: 배치 한 번이 토큰 하나를 씁니다 (동기/비동기 경로 공용).
+GEMINI_RPM = int(os.environ.get("GEMINI_RPM", "60"))
+GEMINI_BURST = int(os.environ.get("GEMINI_BURST", "5"))
+AI_RATE_LIMIT = TokenBucket(rate=GEMINI_RPM / 60, capacity=GEMINI_BURST)
+
+AI_MAX_CONCURRENCY = 8  # 동시에 날아가 있는 모델 호출 최대 개수
+AI_DEADLINE = 8.0  # 요청 하나가 AI 답을 기다리는 최대 시간(초), 넘으면 기술적 전략 신호로 대체
+_AI_SEMAPHORE = None  # 실행 중인 이벤트 루프에 묶이므로 _ai_semaphore()가 루프마다 만듭니다.
+_AI_SEMAPHORE_LOOP = None
+
+
+def _ai_semaphore():
+    """현재 이벤트 루프의 동시 호출 세마포어 (루프가 바뀌면 새로 만듦, AsyncMicroBatcher와 같은 방식)"""
+    global _AI_SEMAPHORE, _AI_SEMAPHORE_LOOP
+    loop = asyncio.get_running_loop()
+    if _AI_SEMAPHORE_LOOP is not loop:
+        _AI_SEMAPHORE_LOOP = loop
+        _AI_SEMAPHORE = asyncio.Semaphore(AI_MAX_CONCURRENCY)
+    return _AI_SEMAPHORE
+
+
+class _ClientSetupError(Exception):
+    pass
+
+
+class AIBudgetExhausted(Exception):
+    """호출 한도(토큰 버킷)나 마감 시간 안에 모델을 부를 수 없을 때"""
+
+
+# ==========================================
+# 🤖 모델 백엔드 (Gemini / 오프라인 가짜 모델)
+# ==========================================
+class GeminiBackend:
+    """프로세스당 하나의 genai.Client를 재사용하는 Gemini 백엔드"""
+
+    def __init__(self, model=MODEL_NAME):
+        self.model = model
+        self._client = None
+        self._lock = threading.Lock()
+
+    def _get_client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    try:
+                        self._client = genai.Client(api_key=api_key)
+                    except Exception as e:
+                        raise _ClientSetupError(e)
+        return self._client
+
+    def generate(self, prompt):
+        response = self._get_client().models.generate_content(model=self.model, contents=prompt)
+        return response.text
+
+    async def agenerate(self, prompt):
+        # 같은 클라이언트의 aio 인터페이스: 응답을 기다리는 동안 스레드를 붙잡지 않습니다.
+        response = await self._get_client().aio.models.generate_content(model=self.model, contents=prompt)
+        return response.text
+
+
+class FakeBackend:
+    """
+    네트워크 없이 배칭 처리량을 재기 위한 가짜 모델
+    프롬프트 안의 종목 JSON을 읽어서 전략 신호를 그대로 따르는 답을 latency(+jitter)초 뒤에 돌려줍니다.
+    """
+
+    def __init__(self, latency=0.5, jitter=0.0, per_item_latency=0.0, failure_rate=0.0):
+        self.latency = latency
+        self.jitter = jitter
+        self.per_item_latency = per_item_latency
+        self.failure_rate = failure_rate
+        self.calls = 0
+
+    def _delay(self, items):
+        self.calls += 1
+        return self.latency + random.uniform(0, self.jitter) + self.per_item_latency * len(items)
+
+    def generate(self, prompt):
+        items = _extract_items(prompt)
+        time.sleep(self._delay(items))
+        return self._respond(items)
+
+    async def agenerate(self, prompt):
+        items = _extract_items(prompt)
+        await asyncio.sleep(self._delay(items))
+        return self._respond(items)
+
+    def _respond(self, items):
+        if self.failure_rate and random.random() < self.failure_rate:
+            raise RuntimeError("가짜 모델 장애 주입")
+        return json.dumps([
+            {"id": item["id"], "decision": item["tech_signal"].lower(), "reason": "가짜 모델: 전략 신호를 따름"}
+            for item in items
+        ], ensure_ascii=False)
+
+
+_BACKEND = FakeBackend() if AI_BACKEND == "fake" else GeminiBackend()
+
+
+def set_backend(backend):
+    """모델 백엔드 교체 (테스트/벤치마크에서 FakeBackend 주입용)"""
+    global _BACKEND
+    _BACKEND = backend
+
+
+def get_backend():
+    return _BACKEND
+
+
+# ==========================================
+# 📝 배치 프롬프트 작성 / 응답 파싱
+# ==========================================
+_ITEMS_HEADER = "[종목 데이터 JSON]"
+_MISSION_HEADER = "[미션]"
+
+
+def build_batch_prompt(items):
+    """여러 종목의 전략 신호/차트 요약/뉴스를 한 번의 구조화된 요청으로 묶습니다."""
+    payload = json.dumps([
+        {
+            "id": i,
+            "ticker": item["ticker"],
+            "strategy": item["strategy_type"],
+            "tech_signal": item["tech_signal"].upper(),
+            "chart_summary": item["chart_summary"].strip(),
+            "news": item["news_summary"].strip(),
+        }
+        for i, item in enumerate(items)
+    ], ensure_ascii=False, indent=1)
+
+    return f"""
+    너는 냉철한 주식 투자 전문가야.
+    아래 {_ITEMS_HEADER}의 각 종목에 대해 매매를 결정해.
+    각 항목의 tech_signal은 기술적 분석 전략(strategy)의 의견이고, chart_summary는 시장 데이터, news는 최근 뉴스야.
+
+{_ITEMS_HEADER}
+{payload}
+
+    {_MISSION_HEADER}
+    1. 종목마다 기술적 분석 전략 의견과 시장 데이터, 최근 뉴스를 종합해서 상황을 분석해.
+    2. 'buy'(매수), 'sell'(매도), 'hold'(관망) 중 하나를 선택해.
+    3. 이유는 한 문장으로 짧게 설명해.
+    4. 대답은 반드시 입력의 id를 그대로 포함한 아래 JSON 배열 형식으로만 해.
+    [
+        {{"id": 0, "decision": "buy", "reason": "RSI가 낮고 호재가 있음"}}
+    ]
+    """
 
+
+def _extract_items(prompt):
+    match = re.search(re.escape(_ITEMS_HEADER) + r"\n(.*?)\n\s*" + re.escape(_MISSION_HEADER), prompt, re.S)
+    return json.loads(match.group(1)) if match else []
+
+
+def parse_batch_response(text, count):
+    """모델 응답(JSON 배열)을 id 순서대로 정렬한 결과 리스트로 변환 (빠진 항목은 예외 객체)"""
+    clean_text = text.replace("```json", "").replace("```", "").strip()
+    decoded = json.loads(clean_text)
+    if isinstance(decoded, dict):
+        decoded = [decoded]
+
+    by_id = {}
+    for position, entry in enumerate(decoded):
+        if isinstance(entry, dict):
+            by_id[entry.get("id", position)] = {"decision": entry.get("decision", "hold"),
+                                                 "reason": entry.get("reason", "")}
+    return [by_id.get(i, ValueError(f"응답에 id={i} 항목이 없습니다.")) for i in range(count)]
+
+
+def _decide_batch(items):
+    """마이크로 배처 핸들러: N개 종목을 프롬프트 한 번으로 판단"""
+    if not AI_RATE_LIMIT.acquire(timeout=AI_DEADLINE):
+        raise AIBudgetExhausted("Gemini 호출 한도 초과")
+    print(f"🤖 [AI_BRAIN] {len(items)}개 종목 배치 판단 요청 중...")
+    with metrics.span("llm_batch"):
+        text = _BACKEND.generate(build_batch_prompt(items))
+    return parse_batch_response(text, len(items))
+
+
+async def _adecide_batch(items):
+    """비동기 배처 핸들러: 배치 안에서 가장 급한 요청의 마감 시각까지만 한도/동시성 슬롯을 기다립니다."""
+    loop = asyncio.get_running_loop()
+    expires = min(item["expires"] for item in items)
+
+    # 슬롯 대기/한도 대기/모델 호출 전체를 한 마감 시각 안에 묶고, 슬롯은 async with로만 잡아서
+    # 마감과 슬롯 획득이 겹쳐도 슬롯이 새지 않게 합니다.
+    acquired = False
+    try:
+        async with asyncio.timeout_at(expires):
+            async with _ai_semaphore():
+                acquired = True
+                if not await AI_RATE_LIMIT.acquire_async(timeout=max(0.0, expires - loop.time())):
+                    raise AIBudgetExhausted("Gemini 호출 한도 초과")
+                print(f"🤖 [AI_BRAIN] {len(items)}개 종목 비동기 배치 판단 요청 중...")
+                with metrics.span("llm_batch"):
+                    text = await _BACKEND.agenerate(build_batch_prompt(items))
+    except TimeoutError:
+        if not acquired:
+            raise AIBudgetExhausted("동시 호출 슬롯 대기 시간 초과")
+        raise
+    return parse_batch_response(text, len(items))
+
+
+_BATCHER = MicroBatcher(_decide_batch, max_batch=BATCH_MAX_SIZE, max_wait=BATCH_WAIT, name="ai-batch")
+_ASYNC_BATCHER = AsyncMicroBatcher(_adecide_batch, max_batch=BATCH_MAX_SIZE, max_wait=BATCH_WAIT, name="ai-abatch")
+_ASYNC_INFLIGHT = {}  # 캐시 키 -> 진행 중인 asyncio Future (비동기 경로의 동일 요청 합치기)
+
+
+def _cache_key(ticker, strategy_type, tech_signal, chart_summary, news_summary):
+    """종목명 + 전략 + 실제 입력(전략 신호, 차트 요약, 뉴스)의 해시로 캐시 키 생성"""
+    clean_ticker = str(ticker).strip().upper()
+    digest = hashlib.sha1(
+        "\x1f".join([tech_signal, chart_summary, news_summary]).encode("utf-8")
+    ).hexdigest()[:16]
+    return f"{clean_ticker}_{strategy_type}_{digest}"
+
+
+def _prepare(ticker, df, news_summary, strategy_type):
     # 1. 기술적 전략(수학) 먼저 물어보기
     tech_signal = strategy.get_strategy_signal(df, strategy_type)
     chart_summary = strategy.get_chart_summary(df)
@@ -33,72 +270,146 @@ def get_ai_decision(ticker, df, news_summary, strategy_type):
     print(f"   🤖 [전략 신호] {strategy_type} -> {tech_signal.upper()}")
     print(f"[🔍 AI_BRAIN] AI에게 보낼 차트 요약 데이터:\n{chart_summary.strip()}")
 
-    # 💡 [핵심 수정] 불안정한 현재가 추출 대신, '종목명'과 '전략타입'을 엮어 완벽한 고유 키를 만듭니다!
-    clean_ticker = str(ticker).strip().upper()
-    cache_key = f"{clean_ticker}_{strategy_type}"
-
-    # 2️⃣ 만약 10분 이내에 '동일 종목'의 '동일 전략'으로 요청이 들어왔다면?
-    if cache_key in AI_RESPONSE_CACHE:
-        cache_data = AI_RESPONSE_CACHE[cache_key]
-        if current_time < cache_data["expire_at"]:
-            print(f"⚡ [Cache Hit] '{ticker}'는 10분 이내 분석한 기록이 있어 캐시에서 즉시 반환합니다!")
-            return cache_data["result"]
-        else:
-            print(f"⏳ [Cache Expired] '{ticker}'의 캐시가 만료되었습니다. 새로 갱신합니다.")
-            del AI_RESPONSE_CACHE[cache_key]
+    return {
+        "ticker": ticker,
+        "strategy_type": strategy_type,
+        "tech_signal": tech_signal,
+        "chart_summary": chart_summary,
+        "news_summary": news_summary,
+    }
 
-    try:
-        client = genai.Client(api_key=api_key)
-    except Exception as e:
+
+def _fallback_result(item, why):
+    """AI를 못 부른 경우 순수 기술적 전략 신호로 대체 (캐시에 저장하지 않음)"""
+    print(f"⏳ [AI_BRAIN] {why} -> '{item['ticker']}'는 기술적 전략 신호({item['tech_signal'].upper()})로 대체합니다.")
+    return {"decision": item["tech_signal"],
+            "reason": f"AI 판단 생략({why}): {item['strategy_type']} 전략 신호를 그대로 따릅니다.",
+            "fallback": True}
+
+
+def _error_result(e):
+    if isinstance(e, _ClientSetupError):
         print(f"❌ [AI 설정 오류] : {e}")
         return {"decision": "hold", "reason": "API 연결 실패"}
+    print(f"❌ [AI_BRAIN Error] : {e}")
+    return {"decision": "hold", "reason": f"AI 에러 발생: {e}"}
+
+
+# 🌟 [수정] 함수의 첫 번째 인자로 ticker(종목명)를 받도록 확장합니다!
+def get_ai_decision(ticker, df, news_summary, strategy_type):
+    print(f"\n[🔍 AI_BRAIN] {ticker} AI 분석 모듈 진입")
 
-    # 3. 프롬프트 작성 (종목명 정보를 추가하여 AI가 더 정확히 인지하도록 보완)
-    prompt = f"""
-    너는 냉철한 주식 투자 전문가야. 
-    아래 정보를 바탕으로 [{ticker}] 종목의 매매를 결정해.
+    item = _prepare(ticker, df, news_summary, strategy_type)
 
-    [기술적 분석 전략의 의견]
-    - 사용 전략: {strategy_type}
-    - 전략 신호: {tech_signal.upper()}
+    # 💡 종목명/전략에 실제 입력 해시까지 엮어서, 내용이 달라진 요청에 예전 답을 주지 않습니다.
+    cache_key = _cache_key(ticker, strategy_type, item["tech_signal"], item["chart_summary"], news_summary)
 
-    [시장 데이터]
-    {chart_summary}
+    computed = []
 
-    [최근 뉴스]
-    {news_summary}
+    def ask():
+        # 다른 종목의 동시 요청들과 함께 마이크로 배치로 묶여 한 번의 프롬프트로 나갑니다.
+        computed.append(True)
+        with metrics.span("llm"):
+            return _BATCHER.submit(item).result(timeout=AI_DEADLINE)
 
-    [미션]
-    1. 기술적 분석 전략 의견과 시장 데이터, 최근 뉴스를 종합해서 상황을 분석해.
-    2. 'buy'(매수), 'sell'(매도), 'hold'(관망) 중 하나를 선택해.
-    3. 이유는 한 문장으로 짧게 설명해.
-    4. 대답은 반드시 아래 JSON 형식으로만 해.
-    {{
-        "decision": "buy",
-        "reason": "RSI가 낮고 호재가 있음"
-    }}
+    # 2️⃣ 캐시에 있으면 즉시 반환, 같은 요청이 이미 진행 중이면 그 결과를 함께 기다립니다.
+    started = time.perf_counter()
+    try:
+        result = AI_RESPONSE_CACHE.get_or_compute(cache_key, ask, wait_timeout=AI_DEADLINE)
+    except AIBudgetExhausted as e:
+        return _fallback_result(item, str(e))
+    except FutureTimeoutError:
+        return _fallback_result(item, f"{AI_DEADLINE}초 응답 마감 초과")
+    except Exception as e:
+        return _error_result(e)
+
+    if computed:
+        print(f"✅ [Cache Saved] '{ticker}'의 신규 분석 결과를 {CACHE_DURATION // 60}분간 캐시에 저장했습니다.")
+    else:
+        # 캐시 적중 또는 진행 중인 동일 요청에 합류해서 받은 경우
+        metrics.observe("ai_cache", time.perf_counter() - started)
+        print(f"⚡ [Cache Hit] '{ticker}'는 최근 동일 입력으로 분석한 기록이 있어 캐시에서 즉시 반환합니다!")
+    return result
+
+
+def _finish_flight(cache_key, flight):
+    # 결과 저장은 aget_or_compute가 하므로, 기다리던 요청이 모두 마감으로 빠져도 늦게 도착한 답은 캐시에 남습니다.
+    _ASYNC_INFLIGHT.pop(cache_key, None)
+    if not flight.cancelled():
+        flight.exception()  # 아무도 기다리지 않은 실패가 '회수되지 않은 예외' 경고로 남지 않게 합니다.
+
+
+async def aget_ai_decision(ticker, df, news_summary, strategy_type, deadline=AI_DEADLINE):
+    """
+    get_ai_decision의 비동기 버전 (FastAPI async 엔드포인트용)
+    스레드를 점유하지 않고 기다리며, deadline(초) 안에 답이 없거나 호출 한도를 넘으면 기술적 전략 신호로 대체합니다.
     """
+    print(f"\n[🔍 AI_BRAIN] {ticker} AI 비동기 분석 모듈 진입")
 
-    try:
-        response = client.models.generate_content(
-            # model="gemini-3.5-flash",Gemini 3.1 Flash Lite
-            model="gemini-3.1-flash-lite",
-            contents=prompt,
-        )
-
-        # JSON 파싱
-        clean_text = response.text.replace("```json", "").replace("```", "").strip()
-        result = json.loads(clean_text)
-
-        # 4️⃣ 성공적으로 분석된 결과를 10분 동안 해당 종목 전용 방에 락(Lock) 걸어둡니다.
-        AI_RESPONSE_CACHE[cache_key] = {
-            "expire_at": current_time + CACHE_DURATION,
-            "result": result
-        }
-        print(f"✅ [Cache Saved] '{ticker}'의 신규 분석 결과를 10분간 캐시에 저장했습니다.")
+    loop = asyncio.get_running_loop()
+    item = _prepare(ticker, df, news_summary, strategy_type)
+    item["expires"] = loop.time() + deadline
+    cache_key = _cache_key(ticker, strategy_type, item["tech_signal"], item["chart_summary"], news_summary)
+
+    # 공유(SQLite) 캐시는 잠금 대기가 있을 수 있으므로 이벤트 루프 밖 스레드에서 조회합니다.
+    with metrics.span("ai_cache"):
+        cached = await asyncio.to_thread(AI_RESPONSE_CACHE.get, cache_key)
+    if cached is not None:
+        print(f"⚡ [Cache Hit] '{ticker}'는 최근 동일 입력으로 분석한 기록이 있어 캐시에서 즉시 반환합니다!")
+        return cached
 
-        return result
+    # 같은 키의 요청이 이미 날아가 있으면 새로 보내지 않고 그 결과를 함께 기다립니다.
+    flight = _ASYNC_INFLIGHT.get(cache_key)
+    leader = flight is None
+    if leader:
+        # 워커 공유(SQLite) 캐시면 같은 키를 다른 워커가 계산 중일 때 리스로 그 결과를 기다리고, Gemini는 한 번만 부릅니다.
+        flight = asyncio.ensure_future(AI_RESPONSE_CACHE.aget_or_compute(
+            cache_key, lambda: _ASYNC_BATCHER.submit(item), wait_timeout=deadline))
+        _ASYNC_INFLIGHT[cache_key] = flight
+        flight.add_done_callback(lambda done: _finish_flight(cache_key, done))
 
+    try:
+        with metrics.span("llm"):
+            result = await asyncio.wait_for(asyncio.shield(flight), max(0.0, item["expires"] - loop.time()))
+    except asyncio.TimeoutError:
+        return _fallback_result(item, f"{deadline}초 응답 마감 초과")
+    except AIBudgetExhausted as e:
+        return _fallback_result(item, str(e))
     except Exception as e:
-        print(f"❌ [AI_BRAIN Error] : {e}")
-        return {"decision": "hold", "reason": f"AI 에러 발생: {e}"}
\ No newline at end of file
+        return _error_result(e)
+
+    if leader:
+        print(f"✅ [Cache Saved] '{ticker}'의 신규 분석 결과를 {CACHE_DURATION // 60}분간 캐시에 저장했습니다.")
+    return result
+
+
+def get_ai_decisions(requests):
+    """
+    여러 종목을 한 번의 구조화된 요청으로 판단하는 배치 API
+    requests: [{'ticker', 'df', 'news_summary', 'strategy_type'}, ...]
+    반환: 입력과 같은 순서의 [{'decision', 'reason'}, ...]
+    """
+    items = [_prepare(r["ticker"], r["df"], r["news_summary"], r["strategy_type"]) for r in requests]
+    keys = [_cache_key(i["ticker"], i["strategy_type"], i["tech_signal"], i["chart_summary"], i["news_summary"])
+            for i in items]
+
+    results = [AI_RESPONSE_CACHE.get(key) for key in keys]
+    pending = [i for i, result in enumerate(results) if result is None]
+
+    # 캐시에 없는 종목만 BATCH_MAX_SIZE개씩 묶어서 요청합니다.
+    for start in range(0, len(pending), BATCH_MAX_SIZE):
+        chunk = pending[start:start + BATCH_MAX_SIZE]
+        try:
+            decided = _decide_batch([items[i] for i in chunk])
+        except Exception as e:
+            decided = [e] * len(chunk)
+
+        for i, result in zip(chunk, decided):
+            if isinstance(result, AIBudgetExhausted):
+                results[i] = _fallback_result(items[i], str(result))
+            elif isinstance(result, Exception):
+                results[i] = _error_result(result)
+            else:
+                AI_RESPONSE_CACHE.set(keys[i], result)
+                results[i] = result
+    return results
@@ -0,0 +1,227 @@
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+import strategy
+
+# =========================================================
+# 🧪 벡터화 멀티 전략 백테스터
+# =========================================================
+# strategy.compute_signals로 (날짜, 종목) 전체 신호를 한 번에 계산하고,
+# 봉 단위 파이썬 루프 없이 NumPy 연산만으로 체결/수익률/낙폭/승률을 구합니다.
+#
+# 체결 규칙 (미래 참조 방지)
+# - 신호는 t일 종가까지의 데이터로 계산되고, 주문은 t+1일 시가에 체결됩니다.
+# - 수익률은 시가 -> 다음 시가 기준으로 계산합니다.
+# - 매수/매도 신호가 있는 전략은 마지막 신호 방향을 유지하고(매도 = 청산),
+#   매도 신호가 없는 변동성 돌파는 HOLD_BARS 만큼만 보유한 뒤 청산합니다.
+FEE_RATE = 0.00015   # 편도 수수료
+SLIPPAGE = 0.0005    # 편도 슬리피지
+TRADING_DAYS = 252
+HOLD_BARS = {"volatility": 1}
+
+PRICE_FIELDS = ("open", "high", "low", "close")
+
+
+def panel_from_frames(frames):
+    """
+    {종목: 일봉 df} 를 날짜 합집합으로 정렬한 (날짜, 종목) 배열 묶음으로 변환
+    반환: (dates, symbols, {'open': 2D, 'high': 2D, 'low': 2D, 'close': 2D})
+    """
+    frames = {s: df for s, df in frames.items() if df is not None and not df.empty}
+    symbols = list(frames)
+    if not symbols:
+        return pd.DatetimeIndex([]), [], {f: np.empty((0, 0)) for f in PRICE_FIELDS}
+
+    # 날짜 합집합을 만든 뒤 종목별 행 위치를 searchsorted로 찾아 배열에 직접 채웁니다.
+    stamps = {sym: pd.DatetimeIndex(df.index).as_unit("ns").asi8 for sym, df in frames.items()}
+    all_stamps = np.unique(np.concatenate(list(stamps.values())))
+    panel = {field: np.full((len(all_stamps), len(symbols)), np.nan) for field in PRICE_FIELDS}
+
+    for j, sym in enumerate(symbols):
+        df = frames[sym]
+        rows = np.searchsorted(all_stamps, stamps[sym])
+        for field in PRICE_FIELDS:
+            col = field if field in df.columns else field.capitalize()
+            panel[field][rows, j] = df[col].to_numpy(dtype=np.float64)
+
+    return pd.DatetimeIndex(all_stamps.astype("datetime64[ns]")), symbols, panel
+
+
+def pack_valid(panel):
+    """
+    종목(열)마다 종가가 있는 행만 원래 순서대로 아래쪽에 모읍니다 (위쪽은 NaN 채움).
+    국내/미국 종목이 섞인 패널은 날짜 합집합 때문에 다른 시장의 거래일이 NaN 구멍이 되는데,
+    구멍을 빼면 각 열은 그 종목 혼자 계산할 때와 같은 연속 시계열이 됩니다.
+    반환: (모은 패널, order) -> 모은 배열[i] == 원래 배열[order[i]] (unpack_rows로 되돌림)
+    """
+    valid = ~np.isnan(panel["close"])
+    order = np.argsort(valid, axis=0, kind="stable")  # False(구멍) 먼저, True는 원래 순서 유지
+    return {field: np.take_along_axis(values, order, axis=0) for field, values in panel.items()}, order
+
+
+def unpack_rows(packed, order):
+    """pack_valid로 모은 행 순서의 배열을 원래 날짜 행으로 되돌립니다."""
+    out = np.empty_like(packed)
+    np.put_along_axis(out, order, packed, axis=0)
+    return out
+
+
+def positions_from_signals(signals, hold_bars=None):
+    """
+    신호 -> 보유 여부(1/0) 변환 (신호가 나온 봉 기준, 체결 지연은 simulate에서 반영)
+    hold_bars가 없으면 마지막 매수/매도 신호 상태를 유지, 있으면 매수 후 hold_bars 봉 동안만 보유
+    """
+    signals = np.asarray(signals)
+    if hold_bars:
+        buys = pd.DataFrame((signals == strategy.BUY).reshape(len(signals), -1).astype(np.float64))
+        held = buys.rolling(hold_bars, min_periods=1).max().to_numpy()
+        return held.reshape(signals.shape)
+
+    # 0이 아닌 마지막 신호를 앞으로 채워서 상태를 만듭니다 (매도 = 청산).
+    state = pd.DataFrame(np.where(signals == 0, np.nan, signals).reshape(len(signals), -1).astype(np.float64))
+    state = state.ffill().fillna(0.0).to_numpy().reshape(signals.shape)
+    return (state > 0).astype(np.float64)
+
+
+def run_backtest(panel, strategy_type, fee=FEE_RATE, slippage=SLIPPAGE, **params):
+    """
+    panel의 모든 종목에 대해 전략을 시뮬레이션
+    반환: {'signals', 'positions', 'returns', 'equity'} (모두 (날짜, 종목) 배열) + 종목별 요약 지표 배열
+    """
+    open_, high, low, close = (np.asarray(panel[f], dtype=np.float64) for f in PRICE_FIELDS)
+    if open_.ndim == 1:
+        open_, high, low, close = (a[:, None] for a in (open_, high, low, close))
+
+    # 신호/체결/성과는 종목마다 자기 거래일만 모은 배열에서 계산하고(다음 봉 체결 = 그 종목의 다음 거래일),
+    # 돌려줄 때만 원래 날짜 행으로 되돌립니다. 다른 시장 거래일(구멍)은 신호 없음, 수익률 0, 직전 포지션 유지입니다.
+    packed, order = pack_valid({"open": open_, "high": high, "low": low, "close": close})
+    signals = strategy.compute_signals(strategy_type, packed["open"], packed["high"], packed["low"], packed["close"],
+                                       **params)
+    packed_result = simulate(signals, packed["open"], strategy_type, fee=fee, slippage=slippage)
+    summary = summarize(packed_result["positions"], packed_result["returns"])
+
+    holes = np.isnan(close)
+    signals = np.where(holes, strategy.HOLD, unpack_rows(signals, order)).astype(signals.dtype)
+    returns = np.where(holes, 0.0, unpack_rows(packed_result["returns"], order))
+    positions = np.where(holes, np.nan, unpack_rows(packed_result["positions"], order))
+    positions = pd.DataFrame(positions).ffill().fillna(0.0).to_numpy()
+    result = {"signals": signals, "positions": positions, "returns": returns,
+              "equity": np.cumprod(1.0 + returns, axis=0)}
+    result.update(summary)
+    return result
+
+
+def simulate(signals, open_, strategy_type, fee=FEE_RATE, slippage=SLIPPAGE):
+    """
+    (날짜, 열) 신호 배열을 체결/비용까지 반영한 수익률로 변환
+    open_은 (날짜, 열) 혹은 (날짜, 1) 모양이면 되므로, 한 종목의 여러 파라미터 조합을 열로 펼쳐 넣을 수도 있습니다.
+    """
+    raw_positions = positions_from_signals(signals, HOLD_BARS.get(strategy_type))
+
+    # t일 신호 -> t+1일 시가 체결
+    positions = np.zeros_like(raw_positions)
+    positions[1:] = raw_positions[:-1]
+
+    # 시가 -> 다음 시가 수익률
+    # 중간에 빈 날(거래 정지, 다른 시장 거래일)은 직전 시가로 채워서, 구멍을 건너뛴 가격 변화가 다음 거래일 수익률에 들어가게 합니다.
+    # 상장 전처럼 앞쪽에 값이 없는 구간만 0입니다.
+    open_ = pd.DataFrame(open_.reshape(len(open_), -1)).ffill().to_numpy().reshape(open_.shape)
+    bar_returns = np.zeros_like(open_)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        bar_returns[:-1] = open_[1:] / open_[:-1] - 1.0
+    bar_returns = np.nan_to_num(bar_returns, nan=0.0, posinf=0.0, neginf=0.0)
+
+    # 포지션이 바뀔 때마다 수수료 + 슬리피지 차감
+    turnover = np.abs(np.diff(positions, axis=0, prepend=0.0))
+    returns = positions * bar_returns - turnover * (fee + slippage)
+
+    return {
+        "signals": signals,
+        "positions": positions,
+        "returns": returns,
+        "equity": np.cumprod(1.0 + returns, axis=0),
+    }
+
+
+def summarize(positions, returns):
+    """포지션/수익률 (날짜, 열) 배열에서 열별 성과 지표 계산 (구간 슬라이스를 넣어도 됩니다)"""
+    n_cols = positions.shape[1]
+    if len(returns) == 0:
+        zeros = np.zeros(n_cols)
+        return {"total_return": zeros, "cagr": zeros, "max_drawdown": zeros,
+                "trades": zeros.astype(np.int64), "hit_rate": zeros, "exposure": zeros}
+
+    equity = np.cumprod(1.0 + returns, axis=0)
+    drawdown = equity / np.maximum.accumulate(equity, axis=0) - 1.0
+
+    trades, wins = _trade_stats(positions, returns)
+    years = max(len(returns) / TRADING_DAYS, 1e-9)
+    final = equity[-1]
+
+    return {
+        "total_return": final - 1.0,
+        "cagr": np.power(np.maximum(final, 0.0), 1.0 / years) - 1.0,
+        "max_drawdown": drawdown.min(axis=0),
+        "trades": trades,
+        "hit_rate": np.divide(wins, trades, out=np.zeros(n_cols), where=trades > 0),
+        "exposure": positions.mean(axis=0),
+    }
+
+
+def _trade_stats(positions, returns):
+    """매매(진입~청산) 단위 손익을 구해 종목별 (거래 수, 수익 거래 수) 반환"""
+    n_symbols = positions.shape[1]
+    entries = (positions > 0) & (np.diff(positions, axis=0, prepend=0.0) > 0)
+    trade_id = np.cumsum(entries, axis=0)
+
+    # 청산 봉의 비용까지 해당 매매에 포함시키기 위해 포지션이 꺼진 첫 봉도 묶습니다.
+    exits = (positions == 0) & (np.diff(positions, axis=0, prepend=0.0) < 0)
+    in_trade = (positions > 0) | exits
+    rows, cols = np.nonzero(in_trade & (trade_id > 0))
+    if len(rows) == 0:
+        return np.zeros(n_symbols, dtype=np.int64), np.zeros(n_symbols, dtype=np.int64)
+
+    keys = cols.astype(np.int64) * (len(positions) + 1) + trade_id[rows, cols]
+    unique_keys, inverse = np.unique(keys, return_inverse=True)
+    log_pnl = np.bincount(inverse, weights=np.log1p(returns[rows, cols]))
+
+    trade_cols = unique_keys // (len(positions) + 1)
+    trades = np.bincount(trade_cols, minlength=n_symbols)
+    wins = np.bincount(trade_cols, weights=(log_pnl > 0).astype(np.float64), minlength=n_symbols).astype(np.int64)
+    return trades, wins
+
+
+def backtest(frames, strategy_type, fee=FEE_RATE, slippage=SLIPPAGE, **params):
+    """{종목: df} 를 받아 종목별 성과 요약 DataFrame 반환"""
+    dates, symbols, panel = panel_from_frames(frames)
+    if not symbols:
+        return pd.DataFrame()
+
+    result = run_backtest(panel, strategy_type, fee=fee, slippage=slippage, **params)
+    return pd.DataFrame({
+        "total_return": result["total_return"],
+        "cagr": result["cagr"],
+        "max_drawdown": result["max_drawdown"],
+        "hit_rate": result["hit_rate"],
+        "trades": result["trades"],
+        "exposure": result["exposure"],
+    }, index=pd.Index(symbols, name="symbol"))
+
+
+if __name__ == "__main__":
+    # 사용 예: python backtest.py goldencross 005930 000660 TSLA
+    import data_collector
+
+    strategy_name = sys.argv[1] if len(sys.argv) > 1 else "volatility"
+    tickers = sys.argv[2:] or ["005930", "000660"]
+
+    charts = data_collector.get_yahoo_charts(tickers, period="10y")
+    started = time.perf_counter()
+    report = backtest(charts, strategy_name)
+    elapsed = time.perf_counter() - started
+
+    print(f"\n🧪 [{strategy_name}] {len(report)}개 종목 백테스트 완료 ({elapsed:.3f}s)")
+    print(report.to_string(float_format=lambda v: f"{v:.4f}"))
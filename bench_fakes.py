@@ -0,0 +1,216 @@
+import re
+import json
+import time
+import random
+import asyncio
+import hashlib
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+import requests
+
+import scraping
+
+# =========================================================
+# 🧪 벤치마크용 가짜 외부 서비스 (야후 / 네이버 / 구글 RSS / Gemini)
+# =========================================================
+# 네트워크 없이 전체 파이프라인을 돌릴 수 있도록 yf.download / yf.Ticker, 네이버 모바일·폴링 API와 HTML,
+# 구글 뉴스 RSS, genai.Client를 같은 모양의 응답을 돌려주는 가짜로 바꿉니다.
+# 서비스마다 기본 지연(초)과 실패 확률을 따로 줄 수 있고, TAIL_PROB 확률로 TAIL_FACTOR배 느린 꼬리 지연이 섞입니다.
+LATENCY = {"yahoo": 0.08, "naver_api": 0.03, "naver_html": 0.06, "rss": 0.05, "gemini": 0.4}
+TAIL_PROB = 0.01
+TAIL_FACTOR = 5.0
+
+
+class FakeServices:
+    def __init__(self, latency=None, failure=None, latency_scale=1.0, seed=0):
+        self.latency = dict(LATENCY, **(latency or {}))
+        self.failure = failure or {}
+        self.latency_scale = latency_scale
+        self.random = random.Random(seed)
+        self.calls = {name: 0 for name in self.latency}
+
+    def delay(self, service):
+        """서비스 호출 한 번의 지연 시간을 뽑고 실패 주입 여부를 판단 (실패면 예외)"""
+        self.calls[service] += 1
+        base = self.latency[service] * self.latency_scale
+        seconds = base * (0.5 + self.random.random())
+        if self.random.random() < TAIL_PROB:
+            seconds *= TAIL_FACTOR
+        if self.random.random() < self.failure.get(service, 0.0):
+            raise requests.ConnectionError(f"가짜 {service} 장애 주입")
+        return seconds
+
+    def wait(self, service):
+        time.sleep(self.delay(service))
+
+    async def await_(self, service):
+        await asyncio.sleep(self.delay(service))
+
+
+# ---------- 야후 ----------
+def _bars(symbol, count):
+    """심볼별로 항상 같은 랜덤 워크 일봉 (최근 영업일까지)"""
+    seed = int(hashlib.md5(symbol.encode()).hexdigest()[:8], 16)
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, count)))
+    open_ = close * (1 + rng.normal(0, 0.005, count))
+    high = np.maximum(open_, close) * (1 + np.abs(rng.normal(0, 0.01, count)))
+    low = np.minimum(open_, close) * (1 - np.abs(rng.normal(0, 0.01, count)))
+    volume = rng.integers(1e5, 1e7, count).astype(float)
+    index = pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=count)
+    return pd.DataFrame({"Open": open_, "High": high, "Low": low, "Close": close, "Volume": volume}, index=index)
+
+
+_PERIOD_BARS = {"5d": 5, "1mo": 21, "3mo": 63, "6mo": 126, "1y": 252, "2y": 504, "5y": 1260, "10y": 2520}
+
+
+class FakeYahoo:
+    """data_collector가 쓰는 yfinance 모듈 자리에 들어가는 가짜 (download / Ticker)"""
+
+    def __init__(self, services):
+        self.services = services
+
+    def download(self, tickers, period=None, start=None, group_by=None, **kwargs):
+        self.services.wait("yahoo")
+        tickers = [tickers] if isinstance(tickers, str) else list(tickers)
+        if start:
+            count = max(1, len(pd.bdate_range(start=start, end=pd.Timestamp.today().normalize())))
+        else:
+            count = _PERIOD_BARS.get(period or "1y", 252)
+        frames = {t: _bars(t, count) for t in tickers}
+        return pd.concat(frames, axis=1) if group_by == "ticker" else frames[tickers[0]]
+
+    def Ticker(self, symbol):
+        self.services.wait("yahoo")
+        last = _bars(symbol, 2)
+        return SimpleNamespace(fast_info={
+            "last_price": float(last["Close"].iloc[-1]),
+            "regular_market_previous_close": float(last["Close"].iloc[-2]),
+            "last_volume": int(last["Volume"].iloc[-1]),
+        })
+
+
+# ---------- 네이버 / 구글 RSS (SESSION.get 대체) ----------
+class FakeResponse:
+    def __init__(self, status_code=200, body=b"", headers=None, encoding="utf-8"):
+        self.status_code = status_code
+        self.content = body
+        self.headers = headers or {}
+        self.encoding = encoding
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or "utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} 가짜 응답")
+
+
+def _quote_row(code):
+    bars = _bars(code, 2)
+    close, prev = bars["Close"].iloc[-1], bars["Close"].iloc[-2]
+    return {
+        "itemCode": code,
+        "closePrice": f"{int(close * 100):,}",
+        "fluctuationsRatio": f"{(close / prev - 1) * 100:.2f}",
+        "tradingVolume": f"{int(bars['Volume'].iloc[-1]):,}",
+        "accumulatedTradingVolume": f"{int(bars['Volume'].iloc[-1]):,}",
+        "marketStatus": "OPEN",
+    }
+
+
+class FakeHTTP:
+    """URL을 보고 네이버/구글 응답 모양을 흉내 내는 SESSION.get 대체 (ETag 조건부 요청 지원)"""
+
+    def __init__(self, services):
+        self.services = services
+        price_page, news_page, top_page, rss = scraping._sample_pages(filler=100)
+        self.pages = {
+            "price": price_page.encode("euc-kr"),
+            "news": news_page.encode("euc-kr"),
+            "top": top_page.encode("euc-kr"),
+            "rss": rss.encode("utf-8"),
+        }
+
+    def _page(self, name, service, encoding, headers):
+        self.services.wait(service)
+        body = self.pages[name]
+        etag = '"' + hashlib.md5(body).hexdigest()[:12] + '"'
+        if (headers or {}).get("If-None-Match") == etag:
+            return FakeResponse(304, b"", {"ETag": etag}, encoding)
+        return FakeResponse(200, body, {"ETag": etag}, encoding)
+
+    def get(self, url, headers=None, timeout=None, **kwargs):
+        if "polling.finance.naver.com" in url:
+            self.services.wait("naver_api")
+            codes = url.rsplit("/", 1)[-1].split(",")
+            return FakeResponse(200, json.dumps({"datas": [_quote_row(c) for c in codes]}).encode())
+        if "m.stock.naver.com/api/stock/" in url:
+            self.services.wait("naver_api")
+            code = re.search(r"/stock/([^/]+)/price", url).group(1)
+            return FakeResponse(200, json.dumps([_quote_row(code)]).encode())
+        if "item/main.naver" in url:
+            return self._page("price", "naver_html", "euc-kr", headers)
+        if "news_news.naver" in url:
+            return self._page("news", "naver_html", "euc-kr", headers)
+        if "lastsearch2.naver" in url:
+            return self._page("top", "naver_html", "euc-kr", headers)
+        if "news.google.com/rss" in url:
+            return self._page("rss", "rss", "utf-8", headers)
+        return FakeResponse(404)
+
+
+# ---------- Gemini ----------
+def _decisions(prompt):
+    import ai_brain
+
+    items = ai_brain._extract_items(prompt)
+    return json.dumps([{"id": item["id"], "decision": item["tech_signal"].lower(), "reason": "가짜 Gemini 응답"}
+                       for item in items], ensure_ascii=False)
+
+
+class _FakeModels:
+    def __init__(self, services):
+        self.services = services
+
+    def generate_content(self, model, contents):
+        self.services.wait("gemini")
+        return SimpleNamespace(text=_decisions(contents))
+
+
+class _FakeAsyncModels:
+    def __init__(self, services):
+        self.services = services
+
+    async def generate_content(self, model, contents):
+        await self.services.await_("gemini")
+        return SimpleNamespace(text=_decisions(contents))
+
+
+class FakeGenaiClient:
+    """genai.Client 대체: client.models / client.aio.models 의 generate_content만 흉내"""
+
+    def __init__(self, services):
+        self.models = _FakeModels(services)
+        self.aio = SimpleNamespace(models=_FakeAsyncModels(services))
+
+
+def install(services, chart_root):
+    """data_collector / ai_brain / chart_store를 가짜 서비스로 연결 (프로세스 전체에 적용)"""
+    import ai_brain
+    import chart_store
+    import data_collector
+
+    data_collector.yf = FakeYahoo(services)
+    data_collector.SESSION.get = FakeHTTP(services).get
+    chart_store.STORE = chart_store.ChartStore(root=chart_root)
+
+    backend = ai_brain.GeminiBackend()
+    backend._client = FakeGenaiClient(services)
+    ai_brain.set_backend(backend)
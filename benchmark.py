@@ -0,0 +1,222 @@
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import tempfile
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+# =========================================================
+# 🏁 오프라인 부하 벤치마크 (가짜 야후/네이버/RSS/Gemini)
+# =========================================================
+# bench_fakes로 외부 서비스를 모두 가짜로 바꾼 뒤 세 가지 경로에 동시 부하를 겁니다.
+#   analyze    : server.analyze_stock (마스터 조회 -> 수집 -> 지표/전략 -> AI) 전체 파이프라인
+#   stock_info : stock_utils.get_stock_info (정확/접두사/초성/유사 검색어 혼합)
+#   strategy   : strategy.get_strategy_signal (세 가지 전략, 종목 프레임 랜덤)
+# 결과는 p50/p95/p99(ms)와 초당 처리량(rps)이고, 기준값 파일과 비교해서 느려진 항목을 표시합니다.
+#
+# 사용 예:
+#   python benchmark.py                      # 기준값과 비교 (회귀가 있으면 종료 코드 1)
+#   python benchmark.py --save-baseline      # 현재 결과를 기준값으로 저장
+#   python benchmark.py --scenarios analyze --failure-rate 0.1 --latency-scale 2
+BASELINE_FILE = "benchmark_baseline.json"
+TOLERANCE = 0.25  # p95가 25% 넘게 늘거나 rps가 25% 넘게 줄면 회귀로 봅니다.
+SCENARIOS = ("analyze", "stock_info", "strategy")
+STRATEGIES = ("volatility", "goldencross", "rsi_bollinger")
+
+os.environ.setdefault("GEMINI_API_KEY", "offline-benchmark")
+
+
+def summarize(latencies, errors, elapsed):
+    lat = np.array(latencies) * 1000 if latencies else np.zeros(1)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "p50": round(float(np.percentile(lat, 50)), 3),
+        "p95": round(float(np.percentile(lat, 95)), 3),
+        "p99": round(float(np.percentile(lat, 99)), 3),
+    }
+
+
+def run_threads(call, payloads, concurrency):
+    """동기 함수 부하: payload마다 call(payload)를 concurrency개 스레드로 실행"""
+    latencies, errors = [], 0
+
+    def one(payload):
+        started = time.perf_counter()
+        ok = call(payload)
+        return time.perf_counter() - started, ok
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for seconds, ok in pool.map(one, payloads):
+            latencies.append(seconds)
+            errors += 0 if ok else 1
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+def run_async(call, payloads, concurrency):
+    """비동기 함수 부하: 동시에 concurrency개까지 await"""
+    async def main():
+        gate = asyncio.Semaphore(concurrency)
+        latencies, errors = [], 0
+
+        async def one(payload):
+            nonlocal errors
+            async with gate:
+                started = time.perf_counter()
+                try:
+                    ok = await call(payload)
+                except Exception:
+                    ok = False
+                latencies.append(time.perf_counter() - started)
+                errors += 0 if ok else 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(p) for p in payloads))
+        return summarize(latencies, errors, time.perf_counter() - started)
+
+    return asyncio.run(main())
+
+
+# ---------- 시나리오 ----------
+def bench_analyze(rng, requests_count, concurrency, symbols=50):
+    import server
+    import stock_utils
+
+    universe = [s for s in stock_utils.get_universe(["KOSPI"])][:symbols - 5]
+    tickers = [s["code"] for s in universe] + ["TSLA", "NVDA", "AAPL", "MSFT", "AMZN"]
+    payloads = [(rng.choice(tickers), rng.choice(STRATEGIES)) for _ in range(requests_count)]
+
+    async def call(payload):
+        ticker, strategy_type = payload
+        result = await server.analyze_stock(ticker=ticker, strategy=strategy_type)
+        return result.get("status") == "success"
+
+    return run_async(call, payloads, concurrency)
+
+
+def bench_stock_info(rng, requests_count, concurrency):
+    import stock_search
+    import stock_utils
+
+    names = [s["name"] for s in stock_utils.get_universe()]
+    stock_utils.get_search_index()  # 인덱스 첫 빌드는 측정에서 제외 (정상 상태만 측정)
+    keywords = []
+    for _ in range(requests_count):
+        name = rng.choice(names)
+        kind = rng.random()
+        if kind < 0.4:
+            keywords.append(name)  # 정확 일치
+        elif kind < 0.7:
+            keywords.append(name[:max(1, len(name) // 2)])  # 접두사
+        elif kind < 0.85:
+            keywords.append(stock_search.to_chosung(name))  # 초성
+        else:
+            keywords.append(name[:-1] + "x")  # 오타(유사 일치)
+
+    return run_threads(lambda keyword: stock_utils.get_stock_info(keyword)[0] is not None, keywords, concurrency)
+
+
+def bench_strategy(rng, requests_count, concurrency, frames=200):
+    import bench_fakes
+    import strategy
+
+    charts = []
+    for i in range(frames):
+        df = bench_fakes._bars(f"SYM{i}", 252)
+        df.columns = [c.lower() for c in df.columns]
+        df.attrs["symbol"] = f"SYM{i}"
+        charts.append(df)
+    payloads = [(rng.choice(charts), rng.choice(STRATEGIES)) for _ in range(requests_count)]
+    return run_threads(lambda p: strategy.get_strategy_signal(p[0], p[1]) in ("buy", "sell", "hold"),
+                       payloads, concurrency)
+
+
+RUNNERS = {"analyze": bench_analyze, "stock_info": bench_stock_info, "strategy": bench_strategy}
+
+
+# ---------- 기준값 비교 ----------
+def compare(results, baseline, tolerance=TOLERANCE):
+    """기준값 대비 p95 증가 / rps 감소가 tolerance를 넘는 항목 목록"""
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        if result["p95"] > base["p95"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {base['p95']:.1f}ms -> {result['p95']:.1f}ms")
+        if result["rps"] < base["rps"] * (1 - tolerance):
+            regressions.append(f"{name}: rps {base['rps']:.1f} -> {result['rps']:.1f}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="가짜 외부 서비스로 돌리는 오프라인 부하 벤치마크")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="가짜 서비스 지연 배율")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="모든 가짜 서비스의 실패 주입 확률")
+    parser.add_argument("--gemini-rpm", type=int, default=6000, help="벤치마크 중 AI 호출 한도 (분당)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    args = parser.parse_args(argv)
+
+    import ai_brain
+    import bench_fakes
+    from rate_limit import TokenBucket
+
+    services = bench_fakes.FakeServices(
+        failure={name: args.failure_rate for name in bench_fakes.LATENCY},
+        latency_scale=args.latency_scale,
+        seed=args.seed,
+    )
+    chart_root = tempfile.mkdtemp(prefix="bench_charts_")
+    bench_fakes.install(services, chart_root)
+    ai_brain.AI_RATE_LIMIT = TokenBucket(rate=args.gemini_rpm / 60, capacity=max(1, args.gemini_rpm // 60))
+
+    rng = random.Random(args.seed)
+    results = {}
+    for name in [s.strip() for s in args.scenarios.split(",") if s.strip()]:
+        print(f"🏁 [Bench] {name}: {args.requests}건, 동시 {args.concurrency}개 실행 중...")
+        # 파이프라인의 로그 출력은 측정에서 빼기 위해 잠시 버립니다.
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            results[name] = RUNNERS[name](rng, args.requests, args.concurrency)
+
+    print(f"\n{'시나리오':<12}{'요청':>7}{'에러':>6}{'rps':>10}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}")
+    for name, r in results.items():
+        print(f"{name:<12}{r['requests']:>7}{r['errors']:>6}{r['rps']:>10.1f}{r['p50']:>10.2f}{r['p95']:>10.2f}{r['p99']:>10.2f}")
+    print(f"   📞 가짜 서비스 호출 수: {services.calls}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"💾 [Bench] 기준값 저장: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"ℹ️ [Bench] 기준값 파일({args.baseline})이 없어 비교를 건너뜁니다. --save-baseline으로 저장하세요.")
+        return 0
+
+    with open(args.baseline, encoding="utf-8") as f:
+        regressions = compare(results, json.load(f), args.tolerance)
+    if regressions:
+        print("🚨 [Bench] 기준값 대비 회귀:")
+        for line in regressions:
+            print(f"   - {line}")
+        return 1
+    print("✅ [Bench] 기준값 대비 회귀 없음")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,313 @@
+import os
+import time
+import asyncio
+import uuid
+import pickle
+import sqlite3
+import threading
+
+from ttl_cache import TTLCache, _Flight
+
+# =========================================================
+# 🗄️ 캐시 백엔드 선택 (프로세스 내 메모리 / 여러 워커가 함께 쓰는 SQLite WAL)
+# =========================================================
+# uvicorn 워커를 여러 개 띄우면 메모리 캐시는 워커마다 따로라서, 같은 Gemini 호출/시세 조회를 워커 수만큼 반복합니다.
+# CACHE_BACKEND=sqlite로 두면 같은 서버의 모든 워커가 CACHE_DB 파일 하나(WAL 모드)를 캐시로 나눠 씁니다.
+# - make_cache(name, maxsize, ttl): TTLCache와 같은 인터페이스(get/set/delete/get_or_compute/stats)의 캐시
+# - shared_cache(name, maxsize, ttl): 공유 백엔드일 때만 캐시, 메모리 모드면 None (프로세스 내 캐시 앞에 덧대는 2차 계층용)
+# - SQLite 캐시의 get_or_compute는 워커 사이에서도 한 번만 계산합니다:
+#   캐시 확인과 리스(lease) 행 선점을 한 트랜잭션(BEGIN IMMEDIATE)으로 묶고, 선점 못 한 워커는 값이 생길 때까지 기다립니다.
+#   계산하던 워커가 죽으면 lease_ttl 뒤에 다른 워커가 리스를 이어받습니다.
+# - 크기 제한: 쓸 때마다 만료 항목을 지우고, maxsize를 넘으면 가장 먼저 만료될 항목부터 제거합니다.
+#   (조회 때 쓰기를 하지 않으려고 LRU 대신 만료 순서로 제거합니다.)
+BACKEND = os.environ.get("CACHE_BACKEND", "memory").strip().lower()  # memory | sqlite
+CACHE_DB = os.environ.get("CACHE_DB", "shared_cache.sqlite3")
+LEASE_TTL = 60.0  # 계산 중인 워커가 응답 없이 사라졌을 때 다른 워커가 이어받기까지의 시간(초)
+POLL_MIN, POLL_MAX = 0.01, 0.2  # 다른 워커의 계산을 기다릴 때 확인 간격 (점점 늘림)
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS cache (ns TEXT NOT NULL, key TEXT NOT NULL, expire_at REAL NOT NULL,"
+    " value BLOB NOT NULL, PRIMARY KEY (ns, key)) WITHOUT ROWID",
+    "CREATE INDEX IF NOT EXISTS cache_expire ON cache (ns, expire_at)",
+    "CREATE TABLE IF NOT EXISTS leases (ns TEXT NOT NULL, key TEXT NOT NULL, owner TEXT NOT NULL,"
+    " expire_at REAL NOT NULL, PRIMARY KEY (ns, key)) WITHOUT ROWID",
+)
+
+
+def _key(key):
+    return key if isinstance(key, str) else repr(key)
+
+
+class SQLiteCache:
+    """
+    여러 프로세스가 한 SQLite 파일(WAL)로 공유하는 TTL 캐시 (namespace별로 maxsize/ttl 따로)
+    값은 pickle로 저장하므로 워커끼리 주고받을 수 있는 값(dict, list, 숫자, 문자열 등)만 넣어 주세요.
+    """
+
+    def __init__(self, namespace, maxsize=512, ttl=300, path=CACHE_DB, lease_ttl=LEASE_TTL):
+        self.namespace = namespace
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.path = str(path)
+        self.lease_ttl = lease_ttl
+        self._owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._local = threading.local()  # sqlite3 연결은 스레드마다 하나씩
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "coalesced": 0, "evictions": 0, "expired": 0,
+                         "remote_waits": 0, "wait_timeouts": 0, "lease_takeovers": 0}
+        conn = self._conn()
+        for statement in _SCHEMA:
+            conn.execute(statement)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _count(self, name, n=1):
+        with self._lock:
+            self.counters[name] += n
+
+    # -----------------------------------------------------
+    # 🔎 조회 / 저장
+    # -----------------------------------------------------
+    def _read(self, conn, keys, now):
+        """살아있는 값만 {키: 값}"""
+        found = {}
+        for start in range(0, len(keys), 500):  # SQLite 바인딩 변수 개수 제한
+            chunk = keys[start:start + 500]
+            rows = conn.execute(
+                f"SELECT key, expire_at, value FROM cache WHERE ns = ? AND key IN ({','.join('?' * len(chunk))})",
+                (self.namespace, *chunk)).fetchall()
+            for key, expire_at, value in rows:
+                if now < expire_at:
+                    found[key] = pickle.loads(value)
+                else:
+                    self._count("expired")
+        return found
+
+    def _write(self, conn, items, ttl):
+        expire_at = time.time() + (self.ttl if ttl is None else ttl)
+        conn.executemany("INSERT OR REPLACE INTO cache (ns, key, expire_at, value) VALUES (?, ?, ?, ?)",
+                         [(self.namespace, key, expire_at, pickle.dumps(value, pickle.HIGHEST_PROTOCOL))
+                          for key, value in items])
+        conn.execute("DELETE FROM cache WHERE ns = ? AND expire_at <= ?", (self.namespace, time.time()))
+        evicted = conn.execute(
+            "DELETE FROM cache WHERE ns = ? AND key IN (SELECT key FROM cache WHERE ns = ? ORDER BY expire_at"
+            " LIMIT max(0, (SELECT count(*) FROM cache WHERE ns = ?) - ?))",
+            (self.namespace, self.namespace, self.namespace, self.maxsize)).rowcount
+        if evicted > 0:
+            self._count("evictions", evicted)
+
+    def get(self, key, default=None):
+        key = _key(key)
+        found = self._read(self._conn(), [key], time.time())
+        self._count("hits" if key in found else "misses")
+        return found.get(key, default)
+
+    def get_many(self, keys):
+        """여러 키를 쿼리 한 번으로 조회 -> 살아있는 것만 {키: 값}"""
+        keys = [_key(k) for k in keys]
+        found = self._read(self._conn(), keys, time.time()) if keys else {}
+        self._count("hits", len(found))
+        self._count("misses", len(keys) - len(found))
+        return found
+
+    def set(self, key, value, ttl=None):
+        self.set_many({key: value}, ttl)
+
+    def set_many(self, items, ttl=None):
+        items = [(_key(k), v) for k, v in dict(items).items()]
+        if not items:
+            return
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._write(conn, items, ttl)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def delete(self, key):
+        self._conn().execute("DELETE FROM cache WHERE ns = ? AND key = ?", (self.namespace, _key(key)))
+
+    # -----------------------------------------------------
+    # 🔒 워커 간 단일 계산
+    # -----------------------------------------------------
+    def _claim(self, conn, key):
+        """캐시 확인 + 리스 선점을 한 트랜잭션으로: (값이 있음, 값, 리스를 잡음)"""
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            now = time.time()
+            found = self._read(conn, [key], now)
+            if key in found:
+                return True, found[key], False
+            lease = conn.execute("SELECT expire_at FROM leases WHERE ns = ? AND key = ?",
+                                 (self.namespace, key)).fetchone()
+            if lease is not None and now < lease[0]:
+                return False, None, False
+            if lease is not None:
+                self._count("lease_takeovers")
+            conn.execute("INSERT OR REPLACE INTO leases (ns, key, owner, expire_at) VALUES (?, ?, ?, ?)",
+                         (self.namespace, key, self._owner, now + self.lease_ttl))
+            return False, None, True
+        finally:
+            conn.execute("COMMIT")
+
+    def _release(self, conn, key):
+        conn.execute("DELETE FROM leases WHERE ns = ? AND key = ? AND owner = ?", (self.namespace, key, self._owner))
+
+    def _store_release(self, key, value, ttl):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._write(conn, [(key, value)], ttl)
+            self._release(conn, key)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _next_wait(self, delay, deadline, now, wait_timeout):
+        """다른 워커의 계산을 기다릴 다음 간격 (마감을 넘기면 TimeoutError)"""
+        if deadline is None:
+            return delay
+        # 리스가 LEASE_TTL 동안 살아 있어도 호출자의 마감을 넘겨서 기다리지는 않습니다.
+        remaining = deadline - now
+        if remaining <= 0:
+            self._count("wait_timeouts")
+            raise TimeoutError(f"{wait_timeout}초 안에 다른 워커의 계산이 끝나지 않았습니다.")
+        return min(delay, remaining)
+
+    def _compute_shared(self, key, compute, ttl, wait_timeout):
+        """이 프로세스의 대표 요청: 다른 워커가 계산 중이면 (wait_timeout까지) 기다리고, 아니면 리스를 잡고 직접 계산"""
+        conn = self._conn()
+        deadline = None if wait_timeout is None else time.monotonic() + wait_timeout
+        delay = POLL_MIN
+        while True:
+            found, value, claimed = self._claim(conn, key)
+            if found:
+                self._count("hits")
+                return value
+            if claimed:
+                break
+            if delay == POLL_MIN:
+                self._count("remote_waits")
+            time.sleep(self._next_wait(delay, deadline, time.monotonic(), wait_timeout))
+            delay = min(delay * 2, POLL_MAX)
+
+        self._count("misses")
+        try:
+            value = compute()
+            self._store_release(key, value, ttl)
+            return value
+        except BaseException:
+            # 실패한 결과는 저장하지 않고 리스만 풀어서, 기다리던 워커가 다시 시도하게 합니다.
+            self._release(conn, key)
+            raise
+
+    async def aget_or_compute(self, key, acompute, ttl=None, wait_timeout=None):
+        """
+        get_or_compute의 비동기 버전 (acompute()는 awaitable 반환)
+        리스 확인/저장은 스레드에서 돌려 이벤트 루프를 막지 않고, 다른 워커가 계산 중이면 asyncio.sleep으로 기다립니다.
+        같은 프로세스 안의 동시 요청 합치기는 호출자가 맡습니다 (ai_brain._ASYNC_INFLIGHT).
+        """
+        key = _key(key)
+        loop = asyncio.get_running_loop()
+        deadline = None if wait_timeout is None else loop.time() + wait_timeout
+        delay = POLL_MIN
+        while True:
+            found, value, claimed = await asyncio.to_thread(lambda: self._claim(self._conn(), key))
+            if found:
+                self._count("hits")
+                return value
+            if claimed:
+                break
+            if delay == POLL_MIN:
+                self._count("remote_waits")
+            await asyncio.sleep(self._next_wait(delay, deadline, loop.time(), wait_timeout))
+            delay = min(delay * 2, POLL_MAX)
+
+        self._count("misses")
+        try:
+            value = await acompute()
+        except BaseException:
+            await asyncio.to_thread(lambda: self._release(self._conn(), key))
+            raise
+        await asyncio.to_thread(self._store_release, key, value, ttl)
+        return value
+
+    def get_or_compute(self, key, compute, ttl=None, wait_timeout=None):
+        """
+        캐시에 있으면 즉시 반환, 없으면 모든 워커를 통틀어 compute()를 한 번만 실행해서 저장 후 반환
+        같은 프로세스 안의 동시 요청은 TTLCache처럼 대표 요청 하나의 결과(또는 예외)를 함께 받습니다.
+        wait_timeout(초)을 주면 다른 요청/워커의 계산을 그 시간까지만 기다리고 TimeoutError를 던집니다.
+        """
+        key = _key(key)
+        # 적중이면 쓰기 잠금(BEGIN IMMEDIATE) 없이 읽기만으로 끝냅니다.
+        found = self._read(self._conn(), [key], time.time())
+        if key in found:
+            self._count("hits")
+            return found[key]
+
+        with self._lock:
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = _Flight()
+            else:
+                self.counters["coalesced"] += 1
+
+        if not leader:
+            if not flight.done.wait(wait_timeout):
+                raise TimeoutError(f"{wait_timeout}초 안에 진행 중인 계산이 끝나지 않았습니다.")
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = self._compute_shared(key, compute, ttl, wait_timeout)
+            return flight.value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.done.set()
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self.counters)
+            inflight = len(self._inflight)
+        lookups = counters["hits"] + counters["misses"] + counters["coalesced"]
+        served = counters["hits"] + counters["coalesced"]
+        return dict(counters, backend="sqlite", size=len(self), inflight=inflight,
+                    hit_ratio=(served / lookups) if lookups else 0.0)
+
+    def __len__(self):
+        return self._conn().execute("SELECT count(*) FROM cache WHERE ns = ? AND expire_at > ?",
+                                    (self.namespace, time.time())).fetchone()[0]
+
+    def clear(self):
+        self._conn().execute("DELETE FROM cache WHERE ns = ?", (self.namespace,))
+
+
+def make_cache(name, maxsize=512, ttl=300):
+    """CACHE_BACKEND 설정에 맞는 캐시 (memory: 프로세스 내 TTLCache, sqlite: 워커 공유 SQLiteCache)"""
+    if BACKEND == "sqlite":
+        return SQLiteCache(name, maxsize=maxsize, ttl=ttl)
+    if BACKEND != "memory":
+        print(f"⚠️ [Cache] 알 수 없는 CACHE_BACKEND='{BACKEND}', 메모리 캐시로 동작합니다.")
+    return TTLCache(maxsize=maxsize, ttl=ttl)
+
+
+def shared_cache(name, maxsize=512, ttl=300):
+    """워커끼리 공유되는 캐시 (메모리 모드에서는 None)"""
+    return SQLiteCache(name, maxsize=maxsize, ttl=ttl) if BACKEND == "sqlite" else None
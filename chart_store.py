@@ -0,0 +1,275 @@
+import os
+import time
+import threading
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# =========================================================
+# 💽 일봉 OHLCV 로컬 증분 저장소
+# =========================================================
+# 종목마다 날짜 배열(.dates.npy)과 OHLCV 행렬(.ohlcv.npy) 두 개의 파일을 둡니다.
+# 읽을 때는 np.load(mmap_mode='r')로 파일을 메모리 매핑만 하므로 파싱 비용이 없고,
+# 다시 요청이 오면 마지막 저장 날짜 이후의 봉만 작게 받아서 덧붙입니다.
+CACHE_DIR = Path("chart_cache")
+MAX_CACHE_BYTES = 512 * 1024 * 1024  # 디스크 사용량 상한 (초과 시 오래 안 쓴 종목부터 삭제)
+TOPUP_INTERVAL = 60  # 마지막 증분 수집 후 이 시간(초) 안에는 네트워크 없이 파일만 읽습니다.
+ADJUST_TOLERANCE = 1e-4  # 겹치는 봉의 저장 종가와 새 종가가 이 비율 이상 다르면 수정주가가 바뀐 것으로 봅니다.
+COLUMNS = ("open", "high", "low", "close", "volume")
+
+_PERIOD_DAYS = {"d": 1, "wk": 7, "mo": 31, "y": 366}
+
+
+def period_to_days(period):
+    """'1y', '6mo', '5d' 같은 야후 기간 문자열을 일수로 변환 ('max'는 None)"""
+    period = str(period).strip().lower()
+    if period == "max":
+        return None
+    for suffix in ("mo", "wk", "y", "d"):
+        if period.endswith(suffix) and period[:-len(suffix)].isdigit():
+            return int(period[:-len(suffix)]) * _PERIOD_DAYS[suffix]
+    return 366
+
+
+class ChartStore:
+    """
+    종목별 일봉을 디스크에 열(column) 단위 NumPy 파일로 보관하는 증분 캐시
+    fetch(symbols, period=None, start=None) -> {symbol: df 또는 None} 형태의 일괄 수집 함수를 받아 씁니다.
+    """
+
+    def __init__(self, root=CACHE_DIR, max_bytes=MAX_CACHE_BYTES, topup_interval=TOPUP_INTERVAL):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.topup_interval = topup_interval
+        self._last_topup = {}
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "topups": 0, "readjusted": 0, "evictions": 0}
+
+    # -----------------------------------------------------
+    # 📂 파일 입출력
+    # -----------------------------------------------------
+    def _paths(self, symbol):
+        safe = symbol.replace("/", "_").replace("\\", "_")
+        return self.root / f"{safe}.dates.npy", self.root / f"{safe}.ohlcv.npy"
+
+    def _head_marker(self, symbol):
+        """저장된 첫 봉이 그 종목의 첫 상장 봉(더 앞 데이터 없음)이라는 표시 파일"""
+        safe = symbol.replace("/", "_").replace("\\", "_")
+        return self.root / f"{safe}.head"
+
+    def _load(self, symbol):
+        dates_path, values_path = self._paths(symbol)
+        try:
+            dates = np.load(dates_path, mmap_mode="r")
+            values = np.load(values_path, mmap_mode="r")
+        except (FileNotFoundError, ValueError, OSError):
+            return None
+        if len(dates) == 0 or len(dates) != len(values):
+            return None
+
+        # LRU 삭제 기준이 되도록 사용 시각을 갱신합니다.
+        try:
+            os.utime(dates_path)
+        except OSError:
+            pass
+        return dates, values
+
+    def _save(self, symbol, dates, values, complete=None):
+        """complete: True/False면 첫 상장 봉 표시를 갱신, None이면 (증분 저장이므로) 그대로 둡니다."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        dates_path, values_path = self._paths(symbol)
+
+        # 임시 파일에 쓴 뒤 교체해서 읽는 쪽이 반쯤 쓰인 파일을 보지 않게 합니다.
+        # 임시 파일 이름에 프로세스/스레드 번호를 넣어서 여러 워커가 같은 종목을 동시에 저장해도 서로 덮어쓰지 않습니다.
+        try:
+            if complete is not None:
+                marker = self._head_marker(symbol)
+                if complete:
+                    marker.touch()
+                elif marker.exists():
+                    marker.unlink()
+            for path, arr in ((values_path, values), (dates_path, dates)):
+                tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+                with open(tmp, "wb") as f:
+                    np.save(f, np.ascontiguousarray(arr))
+                os.replace(tmp, path)
+        except OSError as e:
+            # (Windows) 다른 요청이 파일을 매핑 중이면 교체가 막힐 수 있으니 다음 수집 때 다시 저장합니다.
+            print(f"   ⚠️ [ChartStore] {symbol} 저장 실패: {e}")
+
+    def _evict(self):
+        if not self.root.exists():
+            return
+
+        entries = []
+        total = 0
+        for dates_path in self.root.glob("*.dates.npy"):
+            values_path = dates_path.with_name(dates_path.name[:-len(".dates.npy")] + ".ohlcv.npy")
+            try:
+                size = dates_path.stat().st_size + (values_path.stat().st_size if values_path.exists() else 0)
+                entries.append((dates_path.stat().st_mtime, dates_path, values_path, size))
+            except OSError:
+                continue
+            total += size
+
+        # 가장 오래 전에 사용된 종목부터 삭제
+        for _, dates_path, values_path, size in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_bytes:
+                break
+            marker = dates_path.with_name(dates_path.name[:-len(".dates.npy")] + ".head")
+            for path in (dates_path, values_path, marker):
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+            total -= size
+            self.counters["evictions"] += 1
+
+    # -----------------------------------------------------
+    # 🔄 DataFrame <-> 배열 변환
+    # -----------------------------------------------------
+    @staticmethod
+    def _to_arrays(df):
+        index = pd.DatetimeIndex(df.index)
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        dates = index.values.astype("datetime64[ns]")
+        values = np.column_stack([
+            df[c].to_numpy(dtype=np.float64) if c in df.columns else np.full(len(df), np.nan)
+            for c in COLUMNS
+        ])
+        return dates, values
+
+    @staticmethod
+    def _to_frame(dates, values):
+        index = pd.DatetimeIndex(dates, name="Date")
+        return pd.DataFrame(values, index=index, columns=list(COLUMNS))
+
+    @staticmethod
+    def _window_start(period):
+        days = period_to_days(period)
+        if days is None:
+            return None
+        return np.datetime64(datetime.now() - timedelta(days=days), "ns")
+
+    def _slice(self, dates, values, period):
+        start = self._window_start(period)
+        first = 0 if start is None else int(np.searchsorted(dates, start))
+        return self._to_frame(dates[first:], values[first:])
+
+    @staticmethod
+    def _adjustment_changed(dates, values, new_df):
+        """마지막 직전(확정) 봉의 저장 종가와 새로 받은 종가 비교"""
+        if len(dates) < 2:
+            return False
+        new_dates, new_values = ChartStore._to_arrays(new_df)
+        pos = int(np.searchsorted(new_dates, dates[-2]))
+        if pos >= len(new_dates) or new_dates[pos] != dates[-2]:
+            return False
+        old_close, new_close = values[-2, COLUMNS.index("close")], new_values[pos, COLUMNS.index("close")]
+        if not (np.isfinite(old_close) and np.isfinite(new_close)) or old_close == 0:
+            return False
+        return abs(new_close / old_close - 1.0) > ADJUST_TOLERANCE
+
+    @staticmethod
+    def _merge(dates, values, new_df):
+        new_dates, new_values = ChartStore._to_arrays(new_df)
+        if len(new_dates) == 0:
+            return dates, values
+        # 새로 받은 첫 날짜부터는 신규 데이터로 덮어씁니다 (오늘 봉 갱신).
+        keep = int(np.searchsorted(dates, new_dates[0]))
+        return (np.concatenate([dates[:keep], new_dates]),
+                np.concatenate([values[:keep], new_values]))
+
+    # -----------------------------------------------------
+    # 🚀 조회 API
+    # -----------------------------------------------------
+    def _plan(self, symbol, period, now):
+        """저장 상태를 보고 (상태, 저장 데이터)를 결정: 'fresh' / 'stale' / 'missing'"""
+        stored = self._load(symbol)
+        if stored is None:
+            return "missing", None
+
+        dates, _ = stored
+        start = self._window_start(period)
+        # 저장된 구간이 요청 기간의 앞부분을 덮지 못하면 전체를 새로 받습니다.
+        # 단, 저장된 첫 봉이 그 종목의 첫 상장 봉이면('max' 요청 포함) 더 받을 앞 구간이 없으므로 그대로 씁니다.
+        if not self._head_marker(symbol).exists():
+            if start is None or dates[0] > start + np.timedelta64(7, "D"):
+                return "missing", None
+
+        if now - self._last_topup.get(symbol, 0) < self.topup_interval:
+            return "fresh", stored
+        return "stale", stored
+
+    def get_charts(self, symbols, period, fetch):
+        """여러 종목을 저장소 우선으로 조회하고, 빠진 날짜만 일괄 수집 함수로 채웁니다."""
+        now = time.time()
+        results = {}
+        stale = {}
+        missing = []
+
+        for symbol in symbols:
+            state, stored = self._plan(symbol, period, now)
+            if state == "fresh":
+                self.counters["hits"] += 1
+                results[symbol] = self._slice(*stored, period)
+            elif state == "stale":
+                self.counters["hits"] += 1
+                stale[symbol] = stored
+            else:
+                self.counters["misses"] += 1
+                missing.append(symbol)
+
+        if stale:
+            # 가장 오래된 '마지막 직전' 날짜부터 한 번에 받아오면 모든 종목의 빈 구간이 채워지고,
+            # 종목마다 이미 확정된 봉(마지막 직전 봉) 하나가 겹쳐서 수정주가가 바뀌었는지 확인할 수 있습니다.
+            since = min(stored[0][max(len(stored[0]) - 2, 0)] for stored in stale.values())
+            start = pd.Timestamp(since).strftime("%Y-%m-%d")
+            fetched = fetch(list(stale), start=start)
+            for symbol, (dates, values) in stale.items():
+                new_df = fetched.get(symbol)
+                if new_df is not None and not new_df.empty:
+                    if self._adjustment_changed(np.asarray(dates), np.asarray(values), new_df):
+                        # 분할/배당으로 과거 수정주가가 다시 계산됐으므로 예전 봉에 이어 붙이지 않고 전체를 다시 받습니다.
+                        print(f"   🔁 [ChartStore] {symbol} 수정주가 변경 감지 -> 전체 재수집")
+                        self.counters["readjusted"] += 1
+                        missing.append(symbol)
+                        continue
+                    dates, values = self._merge(np.asarray(dates), np.asarray(values), new_df)
+                    self._save(symbol, dates, values)
+                    self.counters["topups"] += 1
+                self._last_topup[symbol] = now
+                results[symbol] = self._slice(dates, values, period)
+
+        if missing:
+            fetched = fetch(missing, period=period)
+            for symbol in missing:
+                df = fetched.get(symbol)
+                if df is None or df.empty:
+                    results[symbol] = None
+                    continue
+                dates, values = self._to_arrays(df)
+                # 요청 기간 시작보다 한참 늦게 시작하면 그 종목의 상장 이후 전체를 받은 것입니다.
+                start = self._window_start(period)
+                self._save(symbol, dates, values,
+                           complete=start is None or bool(dates[0] > start + np.timedelta64(7, "D")))
+                self._last_topup[symbol] = now
+                results[symbol] = self._to_frame(dates, values)
+
+        if stale or missing:
+            with self._lock:
+                self._evict()
+        return results
+
+    def get_chart(self, symbol, period, fetch):
+        return self.get_charts([symbol], period, fetch).get(symbol)
+
+    def stats(self):
+        total = self.counters["hits"] + self.counters["misses"]
+        return dict(self.counters, hit_ratio=(self.counters["hits"] / total) if total else 0.0)
+
+
+STORE = ChartStore()
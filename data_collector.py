@@ -1,47 +1,131 @@
-import re
-import xml.etree.ElementTree as ET
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import yfinance as yf
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+
+import cache_backend
+import chart_store
+import hedging
+import intraday_bars
+import live_indicators
+import metrics
+import news_cache
+import paper_trading
+import scraping
+import quote_service
+
+
+# =========================================================
+# 🔌 0. 공용 HTTP 세션 (커넥션 풀 재사용)
+# =========================================================
+# 요청마다 새 TCP/TLS 연결을 맺지 않도록 네이버/구글 호출은 모두 이 세션을 공유합니다.
+SESSION = requests.Session()
+_ADAPTER = HTTPAdapter(pool_connections=20, pool_maxsize=50)
+SESSION.mount("https://", _ADAPTER)
+SESSION.mount("http://", _ADAPTER)
+
+# 차트/실시간/뉴스 동시 수집용 스레드 풀과 소스별 마감 시간(초)
+COLLECT_WORKERS = 16  # 수집 스레드 상한 (/analyze_batch의 max_workers도 이 값을 넘지 않음)
+_COLLECT_POOL = ThreadPoolExecutor(max_workers=COLLECT_WORKERS, thread_name_prefix="collector")
+SOURCE_DEADLINES = {"chart": 8.0, "realtime": 4.0, "news": 3.0}
 
 
 # =========================================================
 # 📊 1. 야후 파이낸스 차트 다운로더 (국내/해외 완벽 대응)
 # =========================================================
+@metrics.timed("chart")
 def get_yahoo_chart(ticker, period="1y"):
     """
     야후 파이낸스에서 주가 데이터 가져오기
     ticker: 국내 주식은 '005930.KS', 미국 주식은 'TSLA' 형태로 들어옵니다.
+    로컬 일봉 저장소(chart_store)를 먼저 보고, 빠진 날짜만 야후에서 받아 덧붙입니다.
     """
     # 🌟 [보안 및 예외 가드] 종목 정보가 숫자로만 전달되거나 소문자로 들어왔을 때의 안전 분기
-    clean_ticker = str(ticker).strip()
-    if clean_ticker.isdigit() and len(clean_ticker) == 6:
-        clean_ticker = f"{clean_ticker}.KS"
-    else:
-        clean_ticker = clean_ticker.upper()
+    clean_ticker = to_yahoo_ticker(ticker)
+    df = chart_store.STORE.get_chart(clean_ticker, period, _download_charts)
+    return _tag_symbol(df, clean_ticker)
+
+
+def to_yahoo_ticker(code):
+    """6자리 국내 코드는 '.KS' 접미사를, 영문 티커는 대문자로 정규화"""
+    clean_code = str(code).strip()
+    if clean_code.isdigit() and len(clean_code) == 6:
+        return f"{clean_code}.KS"
+    return clean_code.upper()
 
-    print(f"   📥 [Yahoo] {clean_ticker} 차트 데이터 다운로드 중...")
-    try:
-        df = yf.download(clean_ticker, period=period, interval="1d", progress=False, auto_adjust=True)
 
-        if df.empty:
-            print(f"   ⚠️ [Yahoo] {clean_ticker} 데이터가 비어있습니다.")
+def _clean_chart_frame(df):
+    """컬럼 이름 정리 (Multi-index 방어용 소문자 통일) 및 필수 컬럼 보정"""
+    df.columns = [col[0].lower() if isinstance(col, tuple) else col.lower() for col in df.columns]
+
+    if 'close' not in df.columns:
+        if 'adj close' in df.columns:
+            df['close'] = df['adj close']
+        else:
             return None
+    return df
 
-        # 컬럼 이름 정리 (Multi-index 방어용 소문자 통일)
-        df.columns = [col[0].lower() if isinstance(col, tuple) else col.lower() for col in df.columns]
 
-        # 필수 컬럼 확인 및 보정
-        if 'close' not in df.columns:
-            if 'adj close' in df.columns:
-                df['close'] = df['adj close']
-            else:
-                return None
-        return df
+@metrics.timed("chart")
+def get_yahoo_charts(tickers, period="1y"):
+    """
+    여러 종목의 일봉을 로컬 저장소 우선으로 조회하고, 나머지는 yf.download 한 번으로 일괄 다운로드
+    반환: {야후 티커: df 또는 None}
+    """
+    clean_tickers = list(dict.fromkeys(to_yahoo_ticker(t) for t in tickers))
+    if not clean_tickers:
+        return {}
+    charts = chart_store.STORE.get_charts(clean_tickers, period, _download_charts)
+    return {t: _tag_symbol(df, t) for t, df in charts.items()}
+
+
+def _tag_symbol(df, symbol):
+    """지표 엔진이 종목별로 계산 결과를 메모할 수 있도록 df에 심볼을 기록하고, 실시간 증분 지표 상태를 시드"""
+    if df is not None:
+        df.attrs["symbol"] = symbol
+        live_indicators.LIVE.seed(symbol, df)
+    return df
+
 
+def _download_charts(clean_tickers, period=None, start=None):
+    """야후 일괄 다운로드 (period 전체 혹은 start 이후 증분) 후 종목별 df로 분리"""
+    if start:
+        print(f"   📥 [Yahoo] {len(clean_tickers)}개 종목 {start} 이후 증분 다운로드 중...")
+        window = {"start": start}
+    else:
+        print(f"   📥 [Yahoo] {', '.join(clean_tickers[:3])}{' 외' if len(clean_tickers) > 3 else ''} "
+              f"{len(clean_tickers)}개 종목 차트 데이터 다운로드 중...")
+        window = {"period": period or "1y"}
+
+    try:
+        raw = yf.download(clean_tickers, interval="1d", progress=False,
+                          auto_adjust=True, group_by="ticker", threads=True, **window)
     except Exception as e:
         print(f"   ❌ [Yahoo] 에러 발생: {e}")
-        return None
+        metrics.record_error("yahoo_chart")
+        return {t: None for t in clean_tickers}
+
+    charts = {}
+    for t in clean_tickers:
+        try:
+            if hasattr(raw.columns, "levels") and t in raw.columns.get_level_values(0):
+                df = raw[t].dropna(how="all").copy()
+            elif len(clean_tickers) == 1:
+                df = raw.copy()
+            else:
+                df = None
+
+            if df is None or df.empty:
+                print(f"   ⚠️ [Yahoo] {t} 데이터가 비어있습니다.")
+                charts[t] = None
+            else:
+                charts[t] = _clean_chart_frame(df)
+        except Exception as e:
+            print(f"   ⚠️ [Yahoo] {t} 데이터 분리 실패: {e}")
+            charts[t] = None
+    return charts
 
 
 # =========================================================
@@ -63,138 +147,346 @@ def get_naver_realtime(code):
             fast_info = ticker_obj.fast_info
 
             # 야후에서 제공하는 미국주식 당일 실시간 덤프 포맷팅
-            return {
+            return _feed_live(clean_code, {
                 'price': float(fast_info.get('last_price', 0)),
                 'rate': float(fast_info.get('regular_market_previous_close', 0)),  # 변동률 연산 대안
                 'vol': int(fast_info.get('last_volume', 0)),
                 'status': 'OPEN',
                 'method': 'Yahoo FastInfo API'
-            }
+            })
         except Exception as e:
             print(f"   ❌ [Yahoo Realtime] 미국 주식 실시간 시세 로드 실패: {e}")
+            metrics.record_error("yahoo_realtime")
             return None
 
-    # 🇰🇷 [국내 주식 로직] 기존 개발자님의 완벽한 2단계 크롤링 라인을 그대로 유지합니다.
-    # --- [시도 1] 모바일 앱 API ---
+    # 🇰🇷 [국내 주식 로직] 기존 개발자님의 2단계 크롤링 라인(Method A/B)을 헤지 체인으로 돌립니다.
+    # Method A가 평소보다 늦으면(p95 초과) 실패를 기다리지 않고 Method B를 동시에 띄워서 먼저 온 답을 씁니다.
+    return _feed_live(clean_code, REALTIME_CHAIN.call(clean_code))
+
+
+def _feed_live(code, quote):
+    """새로 받은 실시간 가격을 그 종목의 증분 지표 상태, 분봉 집계기, 모의 투자 엔진에 한 틱으로 반영 (O(1))"""
+    if quote:
+        symbol = to_yahoo_ticker(code)
+        live_indicators.LIVE.on_price(symbol, quote.get('price'))
+        intraday_bars.BARS.on_tick(symbol, quote.get('price'), quote.get('vol'))
+        paper_trading.ENGINE.post_quote(symbol, quote.get('price'), quote.get('vol'))
+    return quote
+
+
+def _naver_mobile_price(clean_code):
+    """[시도 1] 모바일 앱 API (Method A)"""
+    url = f"https://m.stock.naver.com/api/stock/{clean_code}/price?count=1&page=1"
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Linux; Android 10; Mobile)',
+        'Referer': 'https://m.stock.naver.com/'
+    }
     try:
-        url = f"https://m.stock.naver.com/api/stock/{clean_code}/price?count=1&page=1"
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Linux; Android 10; Mobile)',
-            'Referer': 'https://m.stock.naver.com/'
+        response = SESSION.get(url, headers=headers, timeout=5)
+        response.raise_for_status()
+        data_list = response.json()
+        if not data_list:
+            raise Exception("데이터 리스트 비어있음")
+
+        today_data = data_list[0]
+        return {
+            'price': int(today_data['closePrice'].replace(',', '')),
+            'rate': float(today_data['fluctuationsRatio']),
+            'vol': int(today_data['tradingVolume'].replace(',', '')),
+            'status': 'OPEN',
+            'method': 'Mobile Price API'
         }
-        response = requests.get(url, headers=headers, timeout=5)
-
-        if response.status_code == 200:
-            data_list = response.json()
-            if not data_list:
-                raise Exception("데이터 리스트 비어있음")
-
-            today_data = data_list[0]
-            return {
-                'price': int(today_data['closePrice'].replace(',', '')),
-                'rate': float(today_data['fluctuationsRatio']),
-                'vol': int(today_data['tradingVolume'].replace(',', '')),
-                'status': 'OPEN',
-                'method': 'Mobile Price API'
-            }
     except Exception as e:
-        print(f"   ⚠️ Method A 실패 ({e}), Method B로 전환합니다.")
+        print(f"   ⚠️ Method A 실패 ({e})")
+        raise
 
-    # --- [시도 2] PC 웹 HTML 파싱 (최후의 수단) ---
-    try:
-        print(f"   🔄 Method B 시도 중 (HTML Scraping)...")
-        url = f"https://finance.naver.com/item/main.naver?code={clean_code}"
-        headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/120.0.0.0 Safari/537.36'}
-
-        response = requests.get(url, headers=headers, timeout=5)
-        soup = BeautifulSoup(response.text, 'html.parser')
-
-        no_today = soup.select_one('.no_today .blind')
-        if no_today:
-            price = int(no_today.text.replace(',', ''))
-            rate = 0.0
-            exday = soup.select_one('.no_exday')
-            if exday:
-                rate_text = exday.get_text().strip()
-                match = re.search(r'([+-]?\d+\.\d+)%', rate_text)
-                if match:
-                    rate = float(match.group(1))
-                    if soup.select_one('.ico_down') and rate > 0:
-                        rate = -rate
-
-            vol = 0
-            vol_tag = soup.select_one('.no_info .blind')
-            if vol_tag:
-                vol = int(vol_tag.get_text().replace(',', ''))
-
-            return {
-                'price': price,
-                'rate': rate,
-                'vol': vol,
-                'status': 'OPEN',
-                'method': 'HTML Parsing'
-            }
-    except Exception as e:
-        print(f"   ❌ 모든 방법 실패: {e}")
+
+def _naver_html_price(clean_code):
+    """[시도 2] PC 웹 HTML 파싱 (Method B)"""
+    print(f"   🔄 Method B 시도 중 (HTML Scraping)...")
+    url = f"https://finance.naver.com/item/main.naver?code={clean_code}"
+    headers = {'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) Chrome/120.0.0.0 Safari/537.36'}
+
+    response = SESSION.get(url, headers=headers, timeout=5)
+    parsed = scraping.parse_naver_price(response.content, response.encoding)
+    if parsed is None:
         return None
+    return dict(parsed, status='OPEN', method='HTML Parsing')
+
+
+# 출처별 서킷 브레이커 + 지연 히스토그램을 가진 Method A -> B 헤지 체인 (전체 마감 5초)
+REALTIME_CHAIN = hedging.HedgedChain(
+    [hedging.Source("mobile_api", _naver_mobile_price), hedging.Source("html", _naver_html_price)],
+    timeout=5.0,
+)
+
+
+# =========================================================
+# ⚡ 2-1. 일괄 시세 조회 + 1초 공유 캐시 (QUOTES)
+# =========================================================
+# 국내는 네이버 폴링 API 한 번에 여러 종목코드를, 미국은 야후 일괄 다운로드 한 번으로 가져옵니다.
+# 일괄 응답에서 빠진 국내 종목만 기존 get_naver_realtime(Method A/B)로 개별 조회합니다.
+NAVER_POLLING_URL = "https://polling.finance.naver.com/api/realtime/domestic/stock/{codes}"
+NAVER_POLLING_CHUNK = 50
+QUOTE_TTL = 1.0
+_QUOTE_FALLBACK_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="quote-fallback")
+
+
+def _to_number(text, cast):
+    return cast(str(text).replace(',', ''))
+
+
+def fetch_naver_quotes(codes):
+    """국내 종목코드 여러 개를 네이버 폴링 API로 묶어서 조회 -> {code: 시세 dict}"""
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Linux; Android 10; Mobile)',
+        'Referer': 'https://m.stock.naver.com/'
+    }
+    quotes = {}
+    for start in range(0, len(codes), NAVER_POLLING_CHUNK):
+        chunk = codes[start:start + NAVER_POLLING_CHUNK]
+        try:
+            response = SESSION.get(NAVER_POLLING_URL.format(codes=",".join(chunk)), headers=headers, timeout=3)
+            for row in response.json().get("datas", []):
+                quotes[row["itemCode"]] = _feed_live(row["itemCode"], {
+                    'price': _to_number(row['closePrice'], int),
+                    'rate': _to_number(row['fluctuationsRatio'], float),
+                    'vol': _to_number(row['accumulatedTradingVolume'], int),
+                    'status': row.get('marketStatus', 'OPEN'),
+                    'method': 'Naver Polling API'
+                })
+        except Exception as e:
+            print(f"   ⚠️ [Quotes] 네이버 일괄 시세 실패 ({len(chunk)}개 종목): {e}")
+            metrics.record_error("naver_polling")
+
+    missing = [code for code in codes if code not in quotes]
+    if missing:
+        print(f"   🔄 [Quotes] 일괄 응답에서 빠진 {len(missing)}개 종목은 개별 조회합니다.")
+        for code, quote in zip(missing, _QUOTE_FALLBACK_POOL.map(get_naver_realtime, missing)):
+            quotes[code] = quote
+    return quotes
+
+
+def fetch_yahoo_quotes(tickers):
+    """미국 티커 여러 개를 야후 일괄 다운로드 한 번으로 조회 -> {ticker: 시세 dict}"""
+    charts = _download_charts([t.upper() for t in tickers], period="5d")
+    quotes = {}
+    for ticker in tickers:
+        df = charts.get(ticker.upper())
+        if df is None or df.empty:
+            continue
+        close = df['close'].dropna()
+        if close.empty:
+            continue
+        prev_close = float(close.iloc[-2]) if len(close) > 1 else float(close.iloc[-1])
+        quotes[ticker] = _feed_live(ticker, {
+            'price': float(close.iloc[-1]),
+            'rate': round((float(close.iloc[-1]) / prev_close - 1) * 100, 2) if prev_close else 0.0,
+            'vol': int(df['volume'].iloc[-1]) if 'volume' in df.columns else 0,
+            'status': 'OPEN',
+            'method': 'Yahoo Batch Download'
+        })
+    return quotes
+
+
+def _quote_route(code):
+    return "naver" if code.isdigit() else "yahoo"
+
+
+QUOTES = quote_service.QuoteService(
+    route=_quote_route,
+    fetchers={"naver": fetch_naver_quotes, "yahoo": fetch_yahoo_quotes},
+    ttl=QUOTE_TTL,
+    # 여러 워커로 띄웠을 때(CACHE_BACKEND=sqlite) 한 워커가 받은 시세를 ttl 동안 다른 워커도 씁니다.
+    shared=cache_backend.shared_cache("quotes", maxsize=4096, ttl=QUOTE_TTL),
+)
+
+
+@metrics.timed("realtime")
+def get_realtime_quote(code):
+    """공유 캐시를 거치는 실시간 시세 (1초 안의 같은 종목 요청은 HTTP 한 번으로 처리)"""
+    return QUOTES.get(code)
 
 
 # =========================================================
 # 📰 3. 뉴스 데이터 수집기 (국내: 네이버 금융 / 미국: 구글 뉴스 RSS)
 # =========================================================
+@metrics.timed("news")
 def get_naver_news(code):
     """
     종목별 최신 뉴스 수집 헤드라인 5개 반환
+    종목별 뉴스 캐시(NEWS)를 거치므로, 인기 종목은 백그라운드에서 미리 갱신된 헤드라인을 바로 돌려줍니다.
     """
     clean_code = str(code).strip()
+    news_list = NEWS.get(clean_code if clean_code.isdigit() else clean_code.upper())
+
+    if news_list is None:
+        # 한 번도 받아오지 못한 상태에서 조회까지 실패한 경우의 기존 대체값
+        if not clean_code.isdigit():
+            return [f"No recent news found for {clean_code.upper()}"]
+        return []
+    return news_list
 
-    # 🇺🇸 [미국 주식 분기 가드] 숫자가 아니라 영문 티커면 네이버 대신 구글 뉴스 RSS 공급 체인 가동
-    if not clean_code.isdigit():
-        ticker_upper = clean_code.upper()
-        print(f"[Step 3] 미국 주식 전용 구글 뉴스 RSS 수집 중 ({ticker_upper})...")
-        try:
-            # 인베스팅닷컴 크롤링 우회 대안으로 퀀트판에서 가장 신뢰하는 구글 뉴스 오피셜 영문 피드 활용
-            url = f"https://news.google.com/rss/search?q={ticker_upper}+stock&hl=en-US&gl=US&ceid=US:en"
-            headers = {'User-Agent': 'Mozilla/5.0'}
-            r = requests.get(url, headers=headers, timeout=5)
-
-            root = ET.fromstring(r.text)
-            news_list = []
-
-            # 최신 뉴스 아이템 리스트 상위 5개 확보
-            for item in root.findall(".//item")[:5]:
-                title = item.find("title").text
-                if title:
-                    news_list.append(title)
-            print(f"news_list{news_list}")
-            return news_list
-        except Exception as e:
-            print(f"   ⚠️ 미국 RSS 뉴스 수집 실패: {e}")
-            return [f"No recent news found for {ticker_upper}"]
 
+def _conditional_headers(headers, etag, last_modified):
+    headers = dict(headers)
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+    return headers
 
 
+def _news_response(response, titles):
+    return {
+        'status': response.status_code,
+        'titles': titles,
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+    }
+
+
+def _fetch_news(code, etag=None, last_modified=None):
+    """NEWS 캐시의 fetcher: 조건부 GET으로 받아서 (304면 파싱 생략) 헤드라인 목록을 반환"""
+    # 🇺🇸 [미국 주식 분기 가드] 숫자가 아니라 영문 티커면 네이버 대신 구글 뉴스 RSS 공급 체인 가동
+    if not code.isdigit():
+        print(f"[Step 3] 미국 주식 전용 구글 뉴스 RSS 수집 중 ({code})...")
+        # 인베스팅닷컴 크롤링 우회 대안으로 퀀트판에서 가장 신뢰하는 구글 뉴스 오피셜 영문 피드 활용
+        url = f"https://news.google.com/rss/search?q={code}+stock&hl=en-US&gl=US&ceid=US:en"
+        headers = _conditional_headers({'User-Agent': 'Mozilla/5.0'}, etag, last_modified)
+        r = SESSION.get(url, headers=headers, timeout=5)
+        if r.status_code == 304:
+            return _news_response(r, [])
+        r.raise_for_status()
+
+        # 피드 전체를 트리로 만들지 않고 앞쪽 item만 읽고 멈춥니다.
+        return _news_response(r, scraping.parse_rss_titles(r.content, limit=NEWS_FETCH_ITEMS))
+
     # 🇰🇷 [국내 주식 로직] 네이버 금융에서 cp949 인코딩으로 안전하게 뉴스 서칭
     print(f"[Step 3] 네이버 뉴스 수집 중...")
-    url = f"https://finance.naver.com/item/news_news.naver?code={clean_code}"
-    headers = {
+    url = f"https://finance.naver.com/item/news_news.naver?code={code}"
+    headers = _conditional_headers({
         'User-Agent': 'Mozilla/5.0',
-        'Referer': f'https://finance.naver.com/item/main.naver?code={clean_code}'
+        'Referer': f'https://finance.naver.com/item/main.naver?code={code}'
+    }, etag, last_modified)
+
+    response = SESSION.get(url, headers=headers, timeout=5)
+    if response.status_code == 304:
+        return _news_response(response, [])
+    response.raise_for_status()
+    return _news_response(response, scraping.parse_naver_news(response.content, NEWS_FETCH_ITEMS, encoding='euc-kr'))
+
+
+# 한 번 받을 때 창(rolling window)에 합칠 최대 헤드라인 수 (응답으로 돌려주는 건 최근 5개)
+NEWS_FETCH_ITEMS = 20
+NEWS = news_cache.NewsCache(
+    _fetch_news,
+    # 워커끼리 헤드라인 창과 ETag를 나눠 써서, 다른 워커가 방금 받은 종목은 다시 받지 않습니다.
+    shared=cache_backend.shared_cache("news", maxsize=2048, ttl=news_cache.SHARED_TTL),
+)
+
+
+# =========================================================
+# 🚀 4. 통합 동시 수집기 (차트 + 실시간 + 뉴스 팬아웃)
+# =========================================================
+def collect_all(yahoo_ticker, stock_code, deadlines=None):
+    """collect_all_async의 동기 진입점 (이벤트 루프가 없는 스크립트/스레드용, 수집 경로는 하나입니다)"""
+    return asyncio.run(collect_all_async(yahoo_ticker, stock_code, deadlines))
+
+
+async def collect_all_async(yahoo_ticker, stock_code, deadlines=None):
+    """
+    차트/실시간/뉴스 세 소스를 동시에 요청하고 소스별 마감 시간 안에 도착한 것만 반환
+    전체 지연 시간은 세 소스의 합이 아니라 가장 느린 소스 하나 수준이 됩니다.
+    수집은 공용 스레드 풀에서 돌고, 호출한 이벤트 루프는 결과를 기다리는 동안 막히지 않습니다.
+    반환: {'chart': df 또는 None, 'realtime': dict 또는 None, 'news': list}
+    """
+    limits = _source_limits(deadlines)
+    started = time.monotonic()
+    futures = _submit_sources(yahoo_ticker, stock_code)
+
+    async def wait(source, future):
+        remaining = max(0.0, started + limits[source] - time.monotonic())
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), remaining)
+        except asyncio.TimeoutError:
+            print(f"   ⏱️ [Collector] '{source}' 소스가 {limits[source]}초 안에 응답하지 않아 제외합니다.")
+        except Exception as e:
+            print(f"   ⚠️ [Collector] '{source}' 소스 수집 실패: {e}")
+        return _FALLBACKS[source]
+
+    values = await asyncio.gather(*(wait(source, future) for source, future in futures.items()))
+    elapsed = time.monotonic() - started
+    print(f"   ⏲️ [Collector] 동시 수집 완료 ({elapsed:.2f}s)")
+    return dict(zip(futures, values))
+
+
+_FALLBACKS = {"chart": None, "realtime": None, "news": []}
+
+
+def _source_limits(deadlines):
+    limits = dict(SOURCE_DEADLINES)
+    if deadlines:
+        limits.update(deadlines)
+    return limits
+
+
+def _submit_sources(yahoo_ticker, stock_code):
+    # 요청 문맥을 함께 넘겨서 풀 스레드에서 잰 구간도 같은 요청의 trace에 기록되게 합니다.
+    return {
+        "chart": _COLLECT_POOL.submit(metrics.bind_context(get_yahoo_chart), yahoo_ticker),
+        "realtime": _COLLECT_POOL.submit(metrics.bind_context(get_realtime_quote), stock_code),
+        "news": _COLLECT_POOL.submit(metrics.bind_context(get_naver_news), stock_code),
     }
 
-    try:
-        response = requests.get(url, headers=headers)
-        response.encoding = 'euc-kr'
-        soup = BeautifulSoup(response.text, 'html.parser')
-
-        titles = soup.select('a.tit')
-        news_list = []
-        for link in titles[:5]:
-            title = link.get_text().strip()
-            if title:
-                news_list.append(title)
-        return news_list
 
-    except Exception as e:
-        print(f"   ⚠️ 국내 뉴스 수집 실패: {e}")
-        return []
\ No newline at end of file
+def collect_batch(targets, max_workers=8):
+    """
+    여러 종목을 한 번에 수집하는 배치 수집기 (제너레이터)
+    targets: [(야후 티커, 종목 코드), ...]
+    차트는 일괄 다운로드 1회로, 실시간/뉴스는 max_workers 한도 안에서 동시에 가져오며
+    종목별로 준비되는 즉시 (종목 코드, {'chart', 'realtime', 'news'})를 내보냅니다.
+    """
+    targets = list(dict.fromkeys((to_yahoo_ticker(y), str(c).strip()) for y, c in targets))
+    if not targets:
+        return
+
+    yahoo_by_code = {code: yahoo_ticker for yahoo_ticker, code in targets}
+
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="batch") as pool:
+        chart_future = pool.submit(get_yahoo_charts, [y for y, _ in targets])
+
+        # 실시간 시세는 종목별 요청 대신 공유 캐시의 일괄 조회 한 번으로 가져옵니다 (code=None).
+        pending = {pool.submit(QUOTES.get_many, list(yahoo_by_code)): (None, "realtime")}
+        for _, code in targets:
+            pending[pool.submit(get_naver_news, code)] = (code, "news")
+
+        fallbacks = {"realtime": None, "news": []}
+        partial = {code: {} for code in yahoo_by_code}
+        charts = None
+
+        for future in as_completed(pending):
+            code, source = pending[future]
+            try:
+                value = future.result()
+            except Exception as e:
+                print(f"   ⚠️ [Batch] {code or '전체'} '{source}' 수집 실패: {e}")
+                value = None if code is None else fallbacks[source]
+            updates = {c: (value or {}).get(c) for c in partial} if code is None else {code: value}
+
+            for code, value in updates.items():
+                partial[code][source] = value
+                if len(partial[code]) < len(fallbacks):
+                    continue
+
+                # 첫 종목이 준비된 시점에 한 번만 일괄 차트 결과를 기다립니다.
+                if charts is None:
+                    try:
+                        charts = chart_future.result()
+                    except Exception as e:
+                        print(f"   ⚠️ [Batch] 일괄 차트 수집 실패: {e}")
+                        charts = {}
+
+                collected = partial.pop(code)
+                collected["chart"] = charts.get(yahoo_by_code[code])
+                yield code, collected
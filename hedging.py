@@ -0,0 +1,203 @@
+import time
+import bisect
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+# =========================================================
+# 🛡️ 헤지 요청 + 서킷 브레이커 (여러 출처 중 먼저 오는 답 채택)
+# =========================================================
+# - 1순위 출처를 먼저 보내고, 최근 지연 p95(HEDGE_QUANTILE)만큼 기다려도 답이 없으면 다음 출처를 '헤지'로 동시에 보냅니다.
+#   먼저 성공한 답을 쓰고, 늦은 쪽은 백그라운드에서 끝나며 지연/성패만 기록됩니다.
+# - 출처가 FAILURE_THRESHOLD번 연속 실패하면 서킷이 열려(open) RESET_TIMEOUT 동안 아예 건너뜁니다.
+#   그 뒤 요청 하나만 시험(half-open)으로 보내서 성공하면 다시 닫힙니다(closed).
+# - 출처별 지연 히스토그램이 헤지 지연 계산과 /quotes/stats 지표에 함께 쓰입니다.
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0)
+HEDGE_QUANTILE = 0.95
+FAILURE_THRESHOLD = 5
+RESET_TIMEOUT = 30.0
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+class LatencyHistogram:
+    """고정 버킷 누적 카운트(지표용) + 최근 표본(분위수 계산용)"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS, window=256):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # 마지막 칸은 +Inf
+        self.total = 0.0
+        self._recent = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+            self.total += seconds
+            self._recent.append(seconds)
+
+    def quantile(self, q):
+        with self._lock:
+            if not self._recent:
+                return None
+            ordered = sorted(self._recent)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * q))]
+
+    def snapshot(self):
+        with self._lock:
+            count = sum(self.counts)
+            buckets = {str(b): c for b, c in zip(self.buckets, self.counts)}
+            buckets["+Inf"] = self.counts[-1]
+            total = self.total
+        return {"count": count, "sum": round(total, 4), "buckets": buckets,
+                "p50": self.quantile(0.5), "p95": self.quantile(0.95)}
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                self._probing = False
+            if self.state == HALF_OPEN and not self._probing:
+                # 시험 요청은 한 번에 하나만 내보냅니다.
+                self._probing = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self._probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    print(f"   🔌 [Breaker] 연속 실패 {self.failures}회 -> {self.reset_timeout:.0f}초간 출처 차단")
+                self.state = OPEN
+                self.opened_at = time.monotonic()
+                self._probing = False
+
+
+class Source:
+    def __init__(self, name, fn, breaker=None, histogram=None):
+        self.name = name
+        self.fn = fn
+        self.breaker = breaker or CircuitBreaker()
+        self.histogram = histogram or LatencyHistogram()
+
+
+class HedgedChain:
+    """
+    sources 순서대로 우선순위를 두고 헤지 요청을 보내는 출처 체인
+    fn(*args)가 None을 돌려주거나 예외를 던지면 실패로 봅니다.
+    """
+
+    def __init__(self, sources, timeout=5.0, hedge_default=0.5, hedge_min=0.1, hedge_max=2.0, max_workers=16):
+        self.sources = sources
+        self.timeout = timeout
+        self.hedge_default = hedge_default
+        self.hedge_min = hedge_min
+        self.hedge_max = hedge_max
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="hedge")
+        self.counters = {"calls": 0, "hedged": 0, "skipped_open": 0, "exhausted": 0,
+                         "wins": {s.name: 0 for s in sources}, "failures": {s.name: 0 for s in sources}}
+
+    def hedge_delay(self, source):
+        """이 출처의 최근 지연 p95만큼 기다려 보고 다음 출처를 띄웁니다 (표본이 없으면 기본값)."""
+        p = source.histogram.quantile(HEDGE_QUANTILE)
+        return min(self.hedge_max, max(self.hedge_min, self.hedge_default if p is None else p))
+
+    def _run(self, source, args):
+        started = time.monotonic()
+        try:
+            result = source.fn(*args)
+        except Exception:
+            source.histogram.observe(time.monotonic() - started)
+            source.breaker.record_failure()
+            self.counters["failures"][source.name] += 1
+            raise
+        source.histogram.observe(time.monotonic() - started)
+        if result is None:
+            source.breaker.record_failure()
+            self.counters["failures"][source.name] += 1
+        else:
+            source.breaker.record_success()
+        return result
+
+    def call(self, *args):
+        self.counters["calls"] += 1
+        candidates = list(self.sources)
+        deadline = time.monotonic() + self.timeout
+        running = {}
+        errors = []
+        next_hedge = None
+
+        def launch():
+            # 서킷 확인(allow)은 실제로 보낼 때만 합니다. half-open 시험 자리를 보내지도 않을 출처가 잡고 있으면 안 됩니다.
+            nonlocal next_hedge
+            while candidates:
+                source = candidates.pop(0)
+                if not source.breaker.allow():
+                    self.counters["skipped_open"] += 1
+                    continue
+                running[self._pool.submit(self._run, source, args)] = source
+                next_hedge = time.monotonic() + self.hedge_delay(source)
+                return
+
+        launch()
+
+        while running:
+            now = time.monotonic()
+            until = deadline if not candidates else min(deadline, next_hedge)
+            done, _ = wait(running, timeout=max(0.0, until - now), return_when=FIRST_COMPLETED)
+
+            for future in done:
+                source = running.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    errors.append(f"{source.name}: {e}")
+                    continue
+                if result is not None:
+                    self.counters["wins"][source.name] += 1
+                    return result
+                errors.append(f"{source.name}: 빈 응답")
+
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            # 앞 출처가 실패로 끝났으면 바로, 아직 달리는 중이면 헤지 시각이 됐을 때 다음 출처를 띄웁니다.
+            if candidates and (not running or now >= next_hedge):
+                if running:
+                    self.counters["hedged"] += 1
+                launch()
+
+        self.counters["exhausted"] += 1
+        if errors:
+            print(f"   ❌ [Hedge] 모든 출처 실패: {'; '.join(errors)}")
+        return None
+
+    def stats(self):
+        return dict(
+            self.counters,
+            sources={
+                s.name: {"state": s.breaker.state, "failures": s.breaker.failures,
+                         "hedge_delay": round(self.hedge_delay(s), 4), "latency": s.histogram.snapshot()}
+                for s in self.sources
+            },
+        )
@@ -0,0 +1,164 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# =========================================================
+# 📐 공용 보조지표 엔진 (한 번 계산해서 모두가 나눠 씀)
+# =========================================================
+# strategy / get_chart_summary / server가 같은 지표를 매번 다시 계산하고 df에 컬럼을 덧붙이던 것을
+# 여기서 한 번만 NumPy로 계산하고 (종목, 마지막 봉, 파라미터) 기준으로 메모해 둡니다.
+# 계산 규칙은 pandas_ta(SMA 시드 EMA/RMA, 모집단 표준편차)와 동일하게 맞췄습니다.
+MEMO_SIZE = 2048
+
+_MEMO = OrderedDict()
+_MEMO_LOCK = threading.Lock()
+COUNTERS = {"hits": 0, "misses": 0}
+
+
+# -----------------------------------------------------
+# 🧮 순수 계산 커널 (1차원 (날짜,) 또는 2차원 (날짜, 종목) float64 배열)
+# -----------------------------------------------------
+def _frame(values):
+    return pd.DataFrame(np.asarray(values, dtype=np.float64).reshape(len(values), -1))
+
+
+def _like(result, values):
+    return result.to_numpy().reshape(np.shape(values))
+
+
+def sma(close, length):
+    if length <= 0:
+        return np.full(np.shape(close), np.nan)
+    return _like(_frame(close).rolling(length).mean(), close)
+
+
+def _rolling_std(close, length):
+    return _like(_frame(close).rolling(length).std(ddof=0), close)
+
+
+def _seeded_ewm(values, length, alpha):
+    """첫 length개 평균을 시드로 하는 지수평활 (pandas_ta의 ema/rma와 동일, 종목별 열 단위)"""
+    frame = _frame(values)
+    raw = frame.to_numpy()
+    rows = len(raw)
+
+    valid = ~np.isnan(raw)
+    first = valid.argmax(axis=0)
+    seed_row = first + length - 1
+    ok = valid.any(axis=0) & (seed_row < rows)
+
+    # 시드 이전 구간은 비우고, 시드 위치에는 첫 length개 평균을 넣습니다.
+    seeded = np.where(np.arange(rows)[:, None] < seed_row[None, :], np.nan, raw)
+    seeded[:, ~ok] = np.nan
+    if ok.any():
+        cols = np.flatnonzero(ok)
+        seeds = frame.rolling(length).mean().to_numpy()[seed_row[cols], cols]
+        seeded[seed_row[cols], cols] = seeds
+    return _like(pd.DataFrame(seeded).ewm(alpha=alpha, adjust=False).mean(), values)
+
+
+def ema(close, length):
+    return _seeded_ewm(close, length, 2.0 / (length + 1))
+
+
+def rma(values, length):
+    return _seeded_ewm(values, length, 1.0 / length)
+
+
+def rsi(close, length=14):
+    close = np.asarray(close, dtype=np.float64)
+    diff = np.diff(close, axis=0, prepend=np.nan)
+    missing = np.isnan(diff)
+    gain = np.where(missing, np.nan, np.where(diff > 0, diff, 0.0))
+    loss = np.where(missing, np.nan, np.where(diff < 0, -diff, 0.0))
+
+    avg_gain = rma(gain, length)
+    avg_loss = rma(loss, length)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return 100.0 * avg_gain / (avg_gain + avg_loss)
+
+
+def macd(close, fast=12, slow=26, signal=9):
+    if slow < fast:
+        fast, slow = slow, fast
+    line = ema(close, fast) - ema(close, slow)
+    signal_line = ema(line, signal)
+    return {"macd": line, "macd_signal": signal_line, "macd_hist": line - signal_line}
+
+
+def bbands(close, length=20, std=2.0):
+    mid = sma(close, length)
+    dev = _rolling_std(close, length)
+    return {"bbl": mid - std * dev, "bbm": mid, "bbu": mid + std * dev}
+
+
+# 지표 이름 -> (계산 함수, 기본 파라미터)
+_KERNELS = {
+    "sma": (lambda c, length: {"sma": sma(c, length)}, {"length": 20}),
+    "ema": (lambda c, length: {"ema": ema(c, length)}, {"length": 20}),
+    "rsi": (lambda c, length: {"rsi": rsi(c, length)}, {"length": 14}),
+    "macd": (macd, {"fast": 12, "slow": 26, "signal": 9}),
+    "bbands": (bbands, {"length": 20, "std": 2.0}),
+}
+
+# 결과 이름 -> 그 결과를 만들어내는 지표
+_OUTPUTS = {
+    "sma": "sma", "ema": "ema", "rsi": "rsi",
+    "macd": "macd", "macd_signal": "macd", "macd_hist": "macd",
+    "bbl": "bbands", "bbm": "bbands", "bbu": "bbands",
+}
+
+
+# -----------------------------------------------------
+# 🗂️ 메모이제이션 조회 API
+# -----------------------------------------------------
+def _close_of(df):
+    close_col = 'close' if 'close' in df.columns else 'Close'
+    return df[close_col].to_numpy(dtype=np.float64)
+
+
+def _fingerprint(df, close):
+    """(종목, 마지막 봉, 봉 개수, 종가 해시)로 같은 데이터인지 판별"""
+    symbol = df.attrs.get("symbol", "")
+    last_bar = df.index[-1] if len(df.index) else None
+    return symbol, str(last_bar), len(close), hash(close.tobytes())
+
+
+def compute(df, indicator, **params):
+    """지표 하나를 계산(또는 메모 재사용)해서 {결과 이름: ndarray}로 반환"""
+    kernel, defaults = _KERNELS[indicator]
+    merged = dict(defaults, **params)
+
+    close = _close_of(df)
+    key = (_fingerprint(df, close), indicator, tuple(sorted(merged.items())))
+
+    with _MEMO_LOCK:
+        cached = _MEMO.get(key)
+        if cached is not None:
+            _MEMO.move_to_end(key)
+            COUNTERS["hits"] += 1
+            return cached
+
+    result = kernel(close, **merged)
+
+    with _MEMO_LOCK:
+        COUNTERS["misses"] += 1
+        _MEMO[key] = result
+        while len(_MEMO) > MEMO_SIZE:
+            _MEMO.popitem(last=False)
+    return result
+
+
+def get(df, name, **params):
+    """결과 이름으로 지표 시계열 조회 (예: get(df, 'rsi', length=14), get(df, 'bbl'))"""
+    return compute(df, _OUTPUTS[name], **params)[name]
+
+
+def last(df, name, default=0.0, **params):
+    """지표의 마지막 값 (NaN이면 default)"""
+    values = get(df, name, **params)
+    if len(values) == 0 or np.isnan(values[-1]):
+        return default
+    return float(values[-1])
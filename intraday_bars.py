@@ -0,0 +1,138 @@
+import time
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# =========================================================
+# 🕯️ 실시간 시세 -> 분봉(1m/5m/15m) 집계 (종목별 고정 크기 링 버퍼)
+# =========================================================
+# get_naver_realtime / 일괄 시세가 받은 (가격, 당일 누적 거래량) 스냅샷을 틱으로 받아서
+# 주기별로 OHLCV 봉을 만듭니다. 봉은 종목x주기마다 미리 잡아 둔 NumPy 배열에만 쓰므로 오래 돌려도 메모리가 늘지 않습니다.
+# 배열을 두 벌(2 x CAPACITY) 잡고 모든 봉을 두 자리에 같이 쓰기 때문에, 최근 N개 봉은 항상 한 덩어리로 이어져 있어
+# 복사 없이 NumPy 뷰로 돌려줄 수 있고, strategy의 신호 커널(compute_signals)에 그대로 넣을 수 있습니다.
+# 틱이 없던 구간은 봉을 만들지 않습니다 (빈 분은 건너뜀).
+INTERVALS = {"1m": 60, "5m": 300, "15m": 900}
+CAPACITY = 512  # 주기별 보관 봉 수 (1분봉 기준 국내 정규장 하루 390개 이상)
+MAX_SYMBOLS = 512
+FIELDS = ("open", "high", "low", "close", "volume")
+_O, _H, _L, _C, _V = range(len(FIELDS))
+
+
+class BarRing:
+    """한 종목 한 주기의 OHLCV 링 버퍼 (최근 capacity개 봉)"""
+
+    def __init__(self, capacity=CAPACITY):
+        self.capacity = capacity
+        self.times = np.zeros(2 * capacity, dtype=np.int64)  # 봉 시작 시각 (epoch 초)
+        self.data = np.zeros((len(FIELDS), 2 * capacity))    # 필드별로 한 줄씩 연속 메모리
+        self.total = 0  # 지금까지 만든 봉 수 (계속 증가)
+
+    def __len__(self):
+        return min(self.total, self.capacity)
+
+    def _slot(self):
+        return (self.total - 1) % self.capacity
+
+    @property
+    def last_time(self):
+        return int(self.times[self._slot()]) if self.total else None
+
+    def append(self, start, price, volume=0.0):
+        slot = self.total % self.capacity
+        for pos in (slot, slot + self.capacity):
+            self.times[pos] = start
+            self.data[:, pos] = (price, price, price, price, volume)
+        self.total += 1
+
+    def update_last(self, price, volume=0.0):
+        slot = self._slot()
+        data = self.data
+        high = max(data[_H, slot], price)
+        low = min(data[_L, slot], price)
+        total_volume = data[_V, slot] + volume
+        for pos in (slot, slot + self.capacity):
+            data[_H, pos] = high
+            data[_L, pos] = low
+            data[_C, pos] = price
+            data[_V, pos] = total_volume
+
+    def view(self, count=None):
+        """
+        최근 count개 봉(오래된 것 -> 최신, 마지막은 진행 중인 봉)을 복사 없이 돌려줍니다.
+        반환: {'time': int64 뷰, 'open'/'high'/'low'/'close'/'volume': float64 뷰}
+        뷰는 버퍼를 그대로 가리키므로 다음 틱에 값이 바뀔 수 있습니다. 고정된 값이 필요하면 복사해서 쓰세요.
+        """
+        n = len(self) if count is None else max(0, min(count, len(self)))
+        end = self._slot() + self.capacity + 1 if self.total else self.capacity
+        window = slice(end - n, end)
+        return dict({"time": self.times[window]}, **{f: self.data[i, window] for i, f in enumerate(FIELDS)})
+
+
+class IntradayBars:
+    """심볼 -> {주기: BarRing} (최근에 틱이 온 max_symbols개 종목만 유지)"""
+
+    def __init__(self, intervals=INTERVALS, capacity=CAPACITY, max_symbols=MAX_SYMBOLS):
+        self.intervals = dict(intervals)
+        self.capacity = capacity
+        self.max_symbols = max_symbols
+        self._symbols = OrderedDict()  # symbol -> (rings, [마지막 누적 거래량])
+        self._lock = threading.Lock()
+        self.counters = {"ticks": 0, "bars": 0, "late_ticks": 0, "evicted": 0}
+
+    def _entry(self, symbol):
+        entry = self._symbols.get(symbol)
+        if entry is None:
+            entry = ({name: BarRing(self.capacity) for name in self.intervals}, [None])
+            self._symbols[symbol] = entry
+            while len(self._symbols) > self.max_symbols:
+                self._symbols.popitem(last=False)
+                self.counters["evicted"] += 1
+        else:
+            self._symbols.move_to_end(symbol)
+        return entry
+
+    def on_tick(self, symbol, price, cum_volume=None, ts=None):
+        """
+        가격 스냅샷 하나를 모든 주기의 봉에 반영
+        cum_volume은 당일 누적 거래량이며, 직전 스냅샷과의 차이를 이번 봉의 거래량으로 더합니다.
+        (누적값이 줄어들면 새 거래일로 보고 그 값을 그대로 씁니다.)
+        """
+        if not price or price <= 0:
+            return
+        ts = int(ts if ts is not None else time.time())
+        with self._lock:
+            rings, last_volume = self._entry(symbol)
+            volume = 0.0
+            if cum_volume is not None:
+                prev = last_volume[0]
+                if prev is not None:
+                    volume = float(cum_volume - prev) if cum_volume >= prev else float(cum_volume)
+                last_volume[0] = cum_volume
+
+            for name, seconds in self.intervals.items():
+                ring = rings[name]
+                start = ts - ts % seconds
+                last = ring.last_time
+                if last is None or start > last:
+                    ring.append(start, price, volume)
+                    self.counters["bars"] += 1
+                elif start == last:
+                    ring.update_last(price, volume)
+                else:
+                    # 이미 닫힌 봉보다 이른 (늦게 도착한) 틱은 버립니다.
+                    self.counters["late_ticks"] += 1
+            self.counters["ticks"] += 1
+
+    def get(self, symbol, interval="1m"):
+        """종목의 주기별 링 버퍼 (없으면 None) -> strategy.get_strategy_signal에 그대로 넘길 수 있습니다."""
+        entry = self._symbols.get(symbol)
+        return entry[0].get(interval) if entry else None
+
+    def stats(self):
+        # 종목당 메모리는 (시각 + 5필드) x 8바이트 x 2벌 x CAPACITY x 주기 수로 고정입니다.
+        return dict(self.counters, symbols=len(self._symbols),
+                    bytes_per_symbol=len(self.intervals) * 2 * self.capacity * 8 * (len(FIELDS) + 1))
+
+
+BARS = IntradayBars()
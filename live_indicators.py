@@ -0,0 +1,291 @@
+import math
+import time
+import threading
+from collections import OrderedDict, deque
+from datetime import date
+
+import numpy as np
+
+# =========================================================
+# ⚡ 실시간 증분 보조지표 (틱마다 O(1) 갱신)
+# =========================================================
+# 일봉 df로 한 번 시드한 뒤, 실시간 시세가 들어올 때마다 '오늘 봉'의 종가/고가/저가만 바꾸고
+# SMA/볼린저/EMA/MACD/RSI는 확정된 봉까지의 상태에 현재가 하나를 더한 값(preview)을 상수 시간에 계산합니다.
+# 날짜가 바뀐 첫 틱에서 전날 봉을 확정(update)하고 새 봉을 엽니다.
+# 계산 규칙은 indicators(SMA 시드 EMA/RMA, 모집단 표준편차)와 같아서 df로 다시 계산한 값과 일치합니다.
+MAX_SYMBOLS = 512
+
+
+class RollingWindow:
+    """최근 length개 값의 평균/표준편차(ddof=0) = SMA, 볼린저 밴드 중심/폭"""
+
+    def __init__(self, length):
+        self.length = length
+        self.window = deque(maxlen=length)
+        self.total = 0.0
+        self.total_sq = 0.0
+        self._commits = 0
+
+    def update(self, x):
+        if len(self.window) == self.length:
+            old = self.window[0]
+            self.total -= old
+            self.total_sq -= old * old
+        self.window.append(x)
+        self.total += x
+        self.total_sq += x * x
+        # 누적 합의 부동소수점 오차가 쌓이지 않도록 length번마다 정확히 다시 더합니다 (분할 상환 O(1)).
+        self._commits += 1
+        if self._commits % self.length == 0:
+            self.total = math.fsum(self.window)
+            self.total_sq = math.fsum(v * v for v in self.window)
+
+    def _stats(self, total, total_sq):
+        mean = total / self.length
+        return mean, math.sqrt(max(total_sq / self.length - mean * mean, 0.0))
+
+    def last(self):
+        """확정된 마지막 봉 기준 (평균, 표준편차), 데이터 부족이면 (nan, nan)"""
+        if len(self.window) < self.length:
+            return math.nan, math.nan
+        return self._stats(self.total, self.total_sq)
+
+    def preview(self, x):
+        """현재 봉 종가가 x일 때의 (평균, 표준편차)"""
+        if len(self.window) < self.length - 1:
+            return math.nan, math.nan
+        total, total_sq = self.total + x, self.total_sq + x * x
+        if len(self.window) == self.length:
+            old = self.window[0]
+            total -= old
+            total_sq -= old * old
+        return self._stats(total, total_sq)
+
+
+class EMA:
+    """첫 length개 평균을 시드로 하는 지수평활 (alpha를 주면 RMA 등), 시드 전 NaN은 건너뜀"""
+
+    def __init__(self, length, alpha=None):
+        self.length = length
+        self.alpha = 2.0 / (length + 1) if alpha is None else alpha
+        self.count = 0
+        self.seed_total = 0.0
+        self.value = math.nan
+
+    def update(self, x):
+        if self.count == 0 and math.isnan(x):
+            return
+        self.count += 1
+        if self.count < self.length:
+            self.seed_total += x
+        elif self.count == self.length:
+            self.value = (self.seed_total + x) / self.length
+        else:
+            self.value += self.alpha * (x - self.value)
+
+    def preview(self, x):
+        if self.count >= self.length:
+            return self.value + self.alpha * (x - self.value)
+        if self.count == self.length - 1 and not math.isnan(x):
+            return (self.seed_total + x) / self.length
+        return math.nan
+
+
+class RSI:
+    """와일더 RSI (상승폭/하락폭의 RMA)"""
+
+    def __init__(self, length=14):
+        self.gain = EMA(length, alpha=1.0 / length)
+        self.loss = EMA(length, alpha=1.0 / length)
+        self.prev = None
+
+    @staticmethod
+    def _ratio(gain, loss):
+        total = gain + loss
+        return 100.0 * gain / total if total else math.nan
+
+    def update(self, x):
+        if self.prev is not None:
+            diff = x - self.prev
+            self.gain.update(max(diff, 0.0))
+            self.loss.update(max(-diff, 0.0))
+        self.prev = x
+
+    def last(self):
+        return self._ratio(self.gain.value, self.loss.value)
+
+    def preview(self, x):
+        if self.prev is None:
+            return math.nan
+        diff = x - self.prev
+        return self._ratio(self.gain.preview(max(diff, 0.0)), self.loss.preview(max(-diff, 0.0)))
+
+
+class MACD:
+    def __init__(self, fast=12, slow=26, signal=9):
+        if slow < fast:
+            fast, slow = slow, fast
+        self.fast, self.slow, self.signal = EMA(fast), EMA(slow), EMA(signal)
+
+    def update(self, x):
+        self.fast.update(x)
+        self.slow.update(x)
+        self.signal.update(self.fast.value - self.slow.value)
+
+    def preview(self, x):
+        """(macd, signal, hist)"""
+        line = self.fast.preview(x) - self.slow.preview(x)
+        signal = self.signal.preview(line)
+        return line, signal, line - signal
+
+
+class LiveIndicators:
+    """
+    한 종목의 실시간 지표 상태
+    df의 마지막 행을 '진행 중인 오늘 봉'으로, 그 앞까지를 확정 봉으로 보고 시드합니다.
+    지표는 처음 요청될 때 확정 봉 종가로 한 번 재생(O(n))해서 만들고, 그 뒤로는 틱/봉 확정마다 O(1)입니다.
+    """
+
+    def __init__(self, df, symbol=""):
+        self.symbol = symbol
+        self._df = df
+        self._ready = False
+        self._indicators = {}
+        self._lock = threading.RLock()
+        self.ticks = 0
+        self.bar_date = _bar_date(df.index[-1])
+        self.updated_at = time.time()
+
+    def _materialize(self):
+        if self._ready:
+            return
+        cols = {c.lower(): c for c in self._df.columns}
+        arrays = {name: self._df[cols[name]].to_numpy(dtype=np.float64) if name in cols else None
+                  for name in ("open", "high", "low", "close")}
+        close = arrays["close"]
+        pick = lambda name, i: float(arrays[name][i]) if arrays[name] is not None else float(close[i])
+        self._closes = [float(v) for v in close[:-1]]
+        self.open, self.high, self.low, self.close = (pick(n, -1) for n in ("open", "high", "low", "close"))
+        if len(close) > 1:
+            self.prev_open, self.prev_high, self.prev_low, self.prev_close = (
+                pick(n, -2) for n in ("open", "high", "low", "close"))
+        else:
+            self.prev_open = self.prev_high = self.prev_low = self.prev_close = math.nan
+        self._df = None
+        self._ready = True
+
+    def _get(self, key, factory):
+        indicator = self._indicators.get(key)
+        if indicator is None:
+            indicator = factory()
+            for x in self._closes:
+                indicator.update(x)
+            self._indicators[key] = indicator
+        return indicator
+
+    # -----------------------------------------------------
+    # 📥 틱 반영
+    # -----------------------------------------------------
+    def tick(self, price, at=None):
+        """실시간 가격 하나 반영 (날짜가 바뀌었으면 직전 봉을 확정하고 새 봉 시작)"""
+        day = at or date.today()
+        with self._lock:
+            self._materialize()
+            # 주말 틱은 장이 닫힌 금요일 종가이므로 새 봉을 열지 않습니다.
+            if day > self.bar_date and day.weekday() < 5:
+                self._closes.append(self.close)
+                for indicator in self._indicators.values():
+                    indicator.update(self.close)
+                self.prev_open, self.prev_high, self.prev_low, self.prev_close = (
+                    self.open, self.high, self.low, self.close)
+                self.open = self.high = self.low = self.close = price
+                self.bar_date = day
+            else:
+                self.close = price
+                self.high = max(self.high, price)
+                self.low = min(self.low, price)
+            self.ticks += 1
+            self.updated_at = time.time()
+
+    # -----------------------------------------------------
+    # 📐 현재 봉 기준 지표 값
+    # -----------------------------------------------------
+    def bars(self):
+        """(전일 시/고/저/종, 오늘 시/고/저/종)"""
+        with self._lock:
+            self._materialize()
+            return ((self.prev_open, self.prev_high, self.prev_low, self.prev_close),
+                    (self.open, self.high, self.low, self.close))
+
+    def sma(self, length):
+        """(직전 확정 봉 SMA, 현재 봉 SMA)"""
+        with self._lock:
+            self._materialize()
+            window = self._get(("window", length), lambda: RollingWindow(length))
+            return window.last()[0], window.preview(self.close)[0]
+
+    def bbands(self, length=20, std=2.0):
+        """현재 봉 (하단, 중심, 상단)"""
+        with self._lock:
+            self._materialize()
+            mid, dev = self._get(("window", length), lambda: RollingWindow(length)).preview(self.close)
+            return mid - std * dev, mid, mid + std * dev
+
+    def rsi(self, length=14):
+        with self._lock:
+            self._materialize()
+            return self._get(("rsi", length), lambda: RSI(length)).preview(self.close)
+
+    def macd(self, fast=12, slow=26, signal=9):
+        """현재 봉 (macd, signal, hist)"""
+        with self._lock:
+            self._materialize()
+            return self._get(("macd", fast, slow, signal), lambda: MACD(fast, slow, signal)).preview(self.close)
+
+
+def _bar_date(stamp):
+    return stamp.date() if hasattr(stamp, "date") else date.fromisoformat(str(stamp)[:10])
+
+
+class LiveBook:
+    """심볼 -> LiveIndicators (최근에 쓴 MAX_SYMBOLS개만 유지)"""
+
+    def __init__(self, maxsize=MAX_SYMBOLS):
+        self.maxsize = maxsize
+        self._states = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {"seeds": 0, "ticks": 0, "ignored_ticks": 0}
+
+    def seed(self, symbol, df):
+        """일봉 df로 상태를 만듭니다. 같은 날짜까지의 상태가 이미 있으면 (틱을 받은 상태를 지키려고) 그대로 둡니다."""
+        if df is None or df.empty:
+            return
+        with self._lock:
+            state = self._states.get(symbol)
+            if state is not None and state.bar_date >= _bar_date(df.index[-1]):
+                self._states.move_to_end(symbol)
+                return
+            self._states[symbol] = LiveIndicators(df, symbol)
+            self._states.move_to_end(symbol)
+            self.counters["seeds"] += 1
+            while len(self._states) > self.maxsize:
+                self._states.popitem(last=False)
+
+    def get(self, symbol):
+        with self._lock:
+            return self._states.get(symbol)
+
+    def on_price(self, symbol, price, at=None):
+        """실시간 가격 반영 (시드된 적 없는 종목은 무시)"""
+        state = self.get(symbol)
+        if state is None or not price or price <= 0:
+            self.counters["ignored_ticks"] += 1
+            return
+        state.tick(float(price), at)
+        self.counters["ticks"] += 1
+
+    def stats(self):
+        return dict(self.counters, symbols=len(self._states))
+
+
+LIVE = LiveBook()
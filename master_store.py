@@ -0,0 +1,186 @@
+import os
+import mmap
+import bisect
+import struct
+import hashlib
+from collections.abc import Mapping
+
+import numpy as np
+
+# =========================================================
+# 🗜️ 종목 마스터 바이너리 포맷 (mmap 공유 / 지연 로딩)
+# =========================================================
+# 수 MB짜리 JSON을 통째로 json.load 하던 대신, 문자열 테이블 + 오프셋 배열로 된 파일 하나를
+# mmap으로 열어서 필요한 키만 이진 탐색으로 꺼냅니다. 여러 uvicorn 워커가 같은 파일을 매핑하면
+# OS 페이지 캐시를 그대로 나눠 쓰므로 워커를 늘려도 메모리가 늘지 않습니다.
+#
+# 파일 구조 (리틀 엔디언, 모든 배열은 4바이트 정렬)
+#   헤더        : magic, version, 원본 파일 서명(sha1 hex), 키 수, 종목 수, 문자열 수
+#   string_offs : uint32[문자열 수 + 1]  문자열 테이블 내 시작 위치
+#   key_string  : uint32[키 수]          UTF-8 바이트 순으로 정렬된 검색 키의 문자열 번호
+#   key_entry   : uint32[키 수]          키가 가리키는 종목 번호
+#   entry_code  : uint32[종목 수]        종목 코드 문자열 번호
+#   entry_name  : uint32[종목 수]        종목명 문자열 번호
+#   entry_market: uint8[종목 수]         시장 번호 (MARKETS)
+#   blob        : 문자열 테이블 (UTF-8)
+MAGIC = b"STKM"
+VERSION = 1
+MARKETS = ("", "KOSPI", "KOSDAQ", "NASDAQ")
+
+_HEADER = struct.Struct("<4sI40sIII")
+
+
+def source_signature(paths):
+    """원본 mst/cod 파일들의 (이름, 크기, 수정 시각)으로 만든 서명 (하나라도 바뀌면 재빌드)"""
+    digest = hashlib.sha1()
+    for path in sorted(str(p) for p in paths):
+        try:
+            stat = os.stat(path)
+            digest.update(f"{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+        except OSError:
+            digest.update(f"{os.path.basename(path)}:missing;".encode())
+    return digest.hexdigest()
+
+
+def _align(n):
+    return (n + 3) & ~3
+
+
+def write_master(path, master_data, signature):
+    """{검색 키: {'code', 'name', 'market'}} 사전을 바이너리 마스터 파일로 저장 (임시 파일 후 교체)"""
+    strings = {}
+
+    def intern(text):
+        return strings.setdefault(text, len(strings))
+
+    entries = {}
+    keys = []
+    for key, data in master_data.items():
+        market = data.get("market", "")
+        entry = (data["code"], data["name"], MARKETS.index(market) if market in MARKETS else 0)
+        entry_id = entries.setdefault(entry, len(entries))
+        keys.append((key.encode("utf-8"), intern(key), entry_id))
+    keys.sort(key=lambda k: k[0])
+
+    entry_list = sorted(entries, key=entries.get)
+    entry_code = np.array([intern(code) for code, _, _ in entry_list], dtype="<u4")
+    entry_name = np.array([intern(name) for _, name, _ in entry_list], dtype="<u4")
+    entry_market = np.array([market for _, _, market in entry_list], dtype=np.uint8)
+
+    encoded = [s.encode("utf-8") for s in sorted(strings, key=strings.get)]
+    string_offs = np.zeros(len(encoded) + 1, dtype="<u4")
+    np.cumsum([len(b) for b in encoded], out=string_offs[1:])
+
+    parts = [
+        _HEADER.pack(MAGIC, VERSION, signature.encode("ascii"), len(keys), len(entry_list), len(encoded)),
+        string_offs.tobytes(),
+        np.array([k[1] for k in keys], dtype="<u4").tobytes(),
+        np.array([k[2] for k in keys], dtype="<u4").tobytes(),
+        entry_code.tobytes(),
+        entry_name.tobytes(),
+        entry_market.tobytes() + b"\0" * (_align(len(entry_list)) - len(entry_list)),
+        b"".join(encoded),
+    ]
+
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        for part in parts:
+            f.write(part)
+    os.replace(tmp, path)
+
+
+class BinaryMaster(Mapping):
+    """mmap된 바이너리 마스터를 {검색 키: {'code', 'name', 'market'}} 읽기 전용 사전처럼 노출"""
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, signature, n_keys, n_entries, n_strings = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("지원하지 않는 마스터 파일 형식")
+        self.signature = signature.decode("ascii")
+
+        offset = _HEADER.size
+
+        def take(dtype, count):
+            nonlocal offset
+            arr = np.frombuffer(self._mm, dtype=dtype, count=count, offset=offset)
+            offset += _align(arr.nbytes)
+            return arr
+
+        self._string_offs = take("<u4", n_strings + 1)
+        self._key_string = take("<u4", n_keys)
+        self._key_entry = take("<u4", n_keys)
+        self._entry_code = take("<u4", n_entries)
+        self._entry_name = take("<u4", n_entries)
+        self._entry_market = take(np.uint8, n_entries)
+        self._blob_start = offset
+        self._keys = _KeyView(self)
+
+    def _bytes(self, string_id):
+        start = self._blob_start + int(self._string_offs[string_id])
+        end = self._blob_start + int(self._string_offs[string_id + 1])
+        return self._mm[start:end]
+
+    def _entry(self, entry_id):
+        return {
+            "code": self._bytes(self._entry_code[entry_id]).decode("utf-8"),
+            "name": self._bytes(self._entry_name[entry_id]).decode("utf-8"),
+            "market": MARKETS[self._entry_market[entry_id]],
+        }
+
+    def _find(self, key):
+        encoded = key.encode("utf-8")
+        i = bisect.bisect_left(self._keys, encoded)
+        if i < len(self._keys) and self._keys[i] == encoded:
+            return i
+        return None
+
+    def __getitem__(self, key):
+        i = self._find(key) if isinstance(key, str) else None
+        if i is None:
+            raise KeyError(key)
+        return self._entry(self._key_entry[i])
+
+    def __contains__(self, key):
+        return isinstance(key, str) and self._find(key) is not None
+
+    def __iter__(self):
+        for i in range(len(self._keys)):
+            yield self._keys[i].decode("utf-8")
+
+    def __len__(self):
+        return len(self._keys)
+
+    def items(self):
+        for i in range(len(self._keys)):
+            yield self._keys[i].decode("utf-8"), self._entry(self._key_entry[i])
+
+    def values(self):
+        for i in range(len(self._keys)):
+            yield self._entry(self._key_entry[i])
+
+
+class _KeyView:
+    """bisect가 쓸 수 있도록 정렬된 키를 바이트 시퀀스처럼 보여주는 뷰"""
+
+    def __init__(self, master):
+        self._master = master
+
+    def __len__(self):
+        return len(self._master._key_string)
+
+    def __getitem__(self, i):
+        return self._master._bytes(self._master._key_string[i])
+
+
+def open_master(path, signature=None):
+    """파일이 있고 서명이 일치하면 BinaryMaster, 아니면 None"""
+    try:
+        master = BinaryMaster(path)
+    except (OSError, ValueError, struct.error):
+        return None
+    if signature is not None and master.signature != signature:
+        return None
+    return master
@@ -0,0 +1,141 @@
+import time
+import functools
+import threading
+import contextvars
+from collections import Counter
+from contextlib import contextmanager
+
+from hedging import LatencyHistogram
+
+# =========================================================
+# ⏱️ 구간별 지연 계측 + Prometheus /metrics
+# =========================================================
+# - with span("chart"): ... 로 감싼 구간의 소요 시간이 구간별 히스토그램에 쌓입니다.
+# - 요청 하나에 대해 trace를 켜 두면(start_trace) 같은 요청 안의 span들이 순서대로 기록되어
+#   Server-Timing 헤더로 돌려줄 수 있습니다. 스레드 풀로 넘길 때는 bind_context로 문맥을 함께 넘깁니다.
+# - register_gauge로 등록한 캐시 적중률/카운터와 업스트림 에러 수를 render()가 텍스트 포맷으로 내보냅니다.
+STAGE_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_STAGES = {}
+_REQUESTS = {}
+_LOCK = threading.Lock()
+_TRACE = contextvars.ContextVar("trace", default=None)
+UPSTREAM_ERRORS = Counter()
+_GAUGES = []
+
+
+def _histogram(table, key):
+    hist = table.get(key)
+    if hist is None:
+        with _LOCK:
+            hist = table.setdefault(key, LatencyHistogram(STAGE_BUCKETS))
+    return hist
+
+
+def observe(stage, seconds):
+    _histogram(_STAGES, stage).observe(seconds)
+    trace = _TRACE.get()
+    if trace is not None:
+        trace.append((stage, seconds))
+
+
+@contextmanager
+def span(stage):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, time.perf_counter() - started)
+
+
+def timed(stage):
+    """함수 전체를 span(stage)로 감싸는 데코레이터"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def observe_request(path, seconds):
+    _histogram(_REQUESTS, path).observe(seconds)
+
+
+def record_error(source):
+    UPSTREAM_ERRORS[source] += 1
+
+
+# ---------- 요청 단위 trace ----------
+def start_trace():
+    return _TRACE.set([])
+
+
+def end_trace(token):
+    trace = _TRACE.get() or []
+    _TRACE.reset(token)
+    return trace
+
+
+def bind_context(fn):
+    """현재 문맥(trace 포함)을 붙잡아 다른 스레드에서도 같은 trace에 기록되도록 감싼 함수"""
+    ctx = contextvars.copy_context()
+    return lambda *args, **kwargs: ctx.run(fn, *args, **kwargs)
+
+
+def server_timing(trace):
+    """[(구간, 초), ...] -> Server-Timing 헤더 값 (같은 구간은 합산, ms 단위)"""
+    totals = {}
+    for stage, seconds in trace:
+        totals[stage] = totals.get(stage, 0.0) + seconds
+    return ", ".join(f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in totals.items())
+
+
+# ---------- Prometheus 텍스트 포맷 ----------
+def register_gauge(name, help_text, collect, kind="gauge"):
+    """collect() -> 숫자 또는 {라벨 dict의 tuple(items): 값}"""
+    _GAUGES.append((name, help_text, collect, kind))
+
+
+def _labels(pairs):
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{str(v)}"' for k, v in pairs) + "}"
+
+
+def _render_histograms(lines, name, help_text, label, table):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} histogram")
+    for key, hist in sorted(table.items()):
+        snap = hist.snapshot()
+        cumulative = 0
+        for le, count in snap["buckets"].items():
+            cumulative += count
+            lines.append(f"{name}_bucket{_labels([(label, key), ('le', le)])} {cumulative}")
+        lines.append(f"{name}_sum{_labels([(label, key)])} {snap['sum']}")
+        lines.append(f"{name}_count{_labels([(label, key)])} {snap['count']}")
+
+
+def render():
+    lines = []
+    _render_histograms(lines, "stage_latency_seconds", "파이프라인 구간별 소요 시간", "stage", _STAGES)
+    _render_histograms(lines, "http_request_duration_seconds", "엔드포인트별 응답 시간", "path", _REQUESTS)
+
+    lines.append("# HELP upstream_errors_total 외부 출처 호출 실패 수")
+    lines.append("# TYPE upstream_errors_total counter")
+    for source, count in sorted(UPSTREAM_ERRORS.items()):
+        lines.append(f"upstream_errors_total{_labels([('source', source)])} {count}")
+
+    for name, help_text, collect, kind in _GAUGES:
+        try:
+            value = collect()
+        except Exception as e:
+            print(f"   ⚠️ [Metrics] {name} 수집 실패: {e}")
+            continue
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        samples = value if isinstance(value, dict) else {(): value}
+        for labels, sample in samples.items():
+            lines.append(f"{name}{_labels(labels)} {float(sample or 0)}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,146 @@
+import time
+import queue
+import asyncio
+import contextvars
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# =========================================================
+# 📦 마이크로 배칭 큐
+# =========================================================
+# 동시에 들어온 개별 요청을 max_wait 초 동안(혹은 max_batch개가 찰 때까지) 모아서
+# handler(payloads) 한 번으로 처리합니다. handler는 같은 길이의 결과 리스트를 반환하고,
+# 항목별 실패는 결과 자리에 Exception 객체를 넣으면 해당 요청에만 예외로 전달됩니다.
+
+
+class MicroBatcher:
+    def __init__(self, handler, max_batch=16, max_wait=0.015, max_concurrent_batches=4, name="batcher"):
+        self.handler = handler
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue = queue.Queue()
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent_batches, thread_name_prefix=name)
+        self._thread = threading.Thread(target=self._run, name=f"{name}-collector", daemon=True)
+        self._thread.start()
+        self.counters = {"requests": 0, "batches": 0}
+
+    def submit(self, payload):
+        future = Future()
+        self._queue.put((payload, future))
+        return future
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self.counters["requests"] += len(batch)
+            self.counters["batches"] += 1
+            self._executor.submit(self._dispatch, batch)
+
+    def _dispatch(self, batch):
+        payloads = [payload for payload, _ in batch]
+        try:
+            results = self.handler(payloads)
+            if len(results) != len(batch):
+                raise ValueError(f"배치 결과 개수 불일치: {len(results)} != {len(batch)}")
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def stats(self):
+        batches = self.counters["batches"]
+        return dict(self.counters, avg_batch_size=(self.counters["requests"] / batches) if batches else 0.0)
+
+
+class AsyncMicroBatcher:
+    """
+    asyncio 버전 마이크로 배처: handler는 async 함수이고, 스레드를 하나도 점유하지 않습니다.
+    호출자가 마감 시간으로 취소한 요청(이미 done인 Future)은 배치에서 빼고 보냅니다.
+    """
+
+    def __init__(self, handler, max_batch=16, max_wait=0.015, name="async-batcher"):
+        self.handler = handler
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.name = name
+        self._loop = None
+        self._queue = None
+        self._tasks = set()
+        self.counters = {"requests": 0, "batches": 0, "dropped": 0}
+
+    def submit(self, payload):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # 이벤트 루프마다 큐와 수집 태스크를 따로 둡니다 (uvicorn 재시작/테스트 루프 대응).
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._spawn(self._run(self._queue))
+        future = loop.create_future()
+        self._queue.put_nowait((payload, future))
+        return future
+
+    def _spawn(self, coro):
+        # 처음 submit한 요청의 문맥(trace 등)을 물려받지 않도록 빈 문맥에서 돌립니다.
+        task = self._loop.create_task(coro, name=self.name, context=contextvars.Context())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, pending):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await pending.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(pending.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            self._spawn(self._dispatch(batch))
+
+    async def _dispatch(self, batch):
+        live = [(payload, future) for payload, future in batch if not future.done()]
+        self.counters["dropped"] += len(batch) - len(live)
+        if not live:
+            return
+        self.counters["requests"] += len(live)
+        self.counters["batches"] += 1
+
+        try:
+            results = await self.handler([payload for payload, _ in live])
+            if len(results) != len(live):
+                raise ValueError(f"배치 결과 개수 불일치: {len(results)} != {len(live)}")
+        except Exception as e:
+            for _, future in live:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(live, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
+
+    def stats(self):
+        batches = self.counters["batches"]
+        return dict(self.counters, avg_batch_size=(self.counters["requests"] / batches) if batches else 0.0)
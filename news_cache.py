@@ -0,0 +1,179 @@
+import re
+import time
+import threading
+from collections import Counter
+
+# =========================================================
+# 📰 종목별 뉴스 캐시 (조건부 GET + 제목 중복 제거 + 백그라운드 갱신)
+# =========================================================
+# - 종목마다 최근 헤드라인을 WINDOW개까지 굴려서(rolling window) 보관하고, 새로 보인 제목만 앞에 덧붙입니다.
+# - 제목은 소문자/기호·공백 제거/언론사 꼬리(" - Reuters") 제거로 정규화해서 같은 기사를 한 번만 남깁니다.
+# - 다시 받을 때는 지난 응답의 ETag/Last-Modified를 If-None-Match/If-Modified-Since로 보내고, 304면 본문 파싱을 생략합니다.
+# - 자주 조회되는 상위 종목은 백그라운드 스레드가 미리 갱신해 두어, 요청 경로에서는 캐시만 읽습니다.
+# - shared(cache_backend.shared_cache)를 주면 갱신한 창(제목, ETag, 받은 시각)을 워커 공용 캐시에 올리고,
+#   로컬 창이 낡았을 때 다른 워커가 더 최근에 받은 창이 있으면 HTTP 없이 그것을 씁니다.
+#
+# fetcher(code, etag, last_modified) -> {'status': 200/304, 'titles': [...], 'etag', 'last_modified'}
+TTL = 120.0
+WINDOW = 30
+REFRESH_INTERVAL = 60.0
+REFRESH_TOP = 20
+SHARED_TTL = 3600.0  # 공유 캐시 보관 시간 (TTL이 지나도 ETag로 조건부 GET을 하려고 길게 둡니다)
+
+_SOURCE_SUFFIX = re.compile(r"\s+[-|]\s+[^-|]{1,40}$")
+_NON_WORD = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def normalize_title(title):
+    """중복 판정용 제목 키 (언론사 꼬리, 기호, 공백, 대소문자 무시)"""
+    return _NON_WORD.sub("", _SOURCE_SUFFIX.sub("", title.strip())).lower()
+
+
+class _Entry:
+    __slots__ = ("titles", "keys", "etag", "last_modified", "fetched_at", "lock")
+
+    def __init__(self):
+        self.titles = []
+        self.keys = set()
+        self.etag = None
+        self.last_modified = None
+        self.fetched_at = 0.0
+        self.lock = threading.Lock()
+
+
+class NewsCache:
+    def __init__(self, fetcher, ttl=TTL, window=WINDOW, refresh_interval=REFRESH_INTERVAL, refresh_top=REFRESH_TOP,
+                 shared=None):
+        self.fetcher = fetcher
+        self.ttl = ttl
+        self.window = window
+        self.refresh_interval = refresh_interval
+        self.refresh_top = refresh_top
+        self.shared = shared
+        self._entries = {}
+        self._popularity = Counter()
+        self._lock = threading.Lock()
+        self._refresher = None
+        self.counters = {"hits": 0, "fetches": 0, "not_modified": 0, "new_titles": 0,
+                         "duplicates": 0, "errors": 0, "background_refreshes": 0,
+                         "shared_hits": 0}
+
+    def _entry(self, code):
+        with self._lock:
+            entry = self._entries.get(code)
+            if entry is None:
+                entry = self._entries[code] = _Entry()
+            return entry
+
+    def get(self, code, limit=5):
+        """최근 헤드라인 limit개 (한 번도 못 받았고 조회도 실패하면 None)"""
+        self._ensure_refresher()
+        with self._lock:
+            self._popularity[code] += 1
+        entry = self._entry(code)
+
+        if time.time() - entry.fetched_at < self.ttl:
+            self.counters["hits"] += 1
+        else:
+            # 같은 종목을 동시에 요청하면 한 명만 받아오고 나머지는 락 뒤에서 갱신된 캐시를 읽습니다.
+            with entry.lock:
+                if time.time() - entry.fetched_at < self.ttl:
+                    self.counters["hits"] += 1
+                elif self._adopt_shared(code, entry) and time.time() - entry.fetched_at < self.ttl:
+                    self.counters["shared_hits"] += 1
+                else:
+                    self._refresh(code, entry)
+
+        if not entry.fetched_at and not entry.titles:
+            return None
+        return entry.titles[:limit]
+
+    def _refresh(self, code, entry):
+        """락을 잡은 상태에서 호출: 조건부 GET 후 새 제목만 창에 합칩니다."""
+        self.counters["fetches"] += 1
+        try:
+            response = self.fetcher(code, entry.etag, entry.last_modified)
+        except Exception as e:
+            print(f"   ⚠️ [News] {code} 뉴스 갱신 실패: {e}")
+            self.counters["errors"] += 1
+            return
+
+        entry.fetched_at = time.time()
+        entry.etag = response.get("etag") or entry.etag
+        entry.last_modified = response.get("last_modified") or entry.last_modified
+        if response.get("status") == 304:
+            self.counters["not_modified"] += 1
+            self._publish(code, entry)
+            return
+
+        fresh = []
+        for title in response.get("titles", []):
+            key = normalize_title(title)
+            if not key or key in entry.keys:
+                self.counters["duplicates"] += 1
+                continue
+            entry.keys.add(key)
+            fresh.append(title)
+
+        if fresh:
+            self.counters["new_titles"] += len(fresh)
+            entry.titles = (fresh + entry.titles)[:self.window]
+            entry.keys = {normalize_title(t) for t in entry.titles}
+        self._publish(code, entry)
+
+    def _adopt_shared(self, code, entry):
+        """락을 잡은 상태에서 호출: 공용 캐시의 창이 로컬보다 최근이면 그대로 가져옵니다."""
+        if self.shared is None:
+            return False
+        try:
+            snapshot = self.shared.get(code)
+        except Exception as e:
+            print(f"   ⚠️ [News] {code} 공유 캐시 조회 실패: {e}")
+            return False
+        if snapshot is None or snapshot["fetched_at"] <= entry.fetched_at:
+            return False
+        entry.titles = list(snapshot["titles"])
+        entry.keys = {normalize_title(t) for t in entry.titles}
+        entry.etag = snapshot["etag"]
+        entry.last_modified = snapshot["last_modified"]
+        entry.fetched_at = snapshot["fetched_at"]
+        return True
+
+    def _publish(self, code, entry):
+        if self.shared is None:
+            return
+        try:
+            self.shared.set(code, {"titles": entry.titles, "etag": entry.etag,
+                                   "last_modified": entry.last_modified, "fetched_at": entry.fetched_at})
+        except Exception as e:
+            print(f"   ⚠️ [News] {code} 공유 캐시 저장 실패: {e}")
+
+    def _ensure_refresher(self):
+        if self._refresher is None and self.refresh_interval:
+            with self._lock:
+                if self._refresher is None:
+                    self._refresher = threading.Thread(target=self._refresh_loop, name="news-refresher", daemon=True)
+                    self._refresher.start()
+
+    def _refresh_loop(self):
+        while True:
+            time.sleep(self.refresh_interval)
+            with self._lock:
+                popular = [code for code, _ in self._popularity.most_common(self.refresh_top)]
+                # 인기도는 주기마다 절반으로 줄여서 최근에 많이 본 종목이 위로 올라오게 합니다.
+                self._popularity = Counter({c: n // 2 for c, n in self._popularity.items() if n // 2})
+
+            for code in popular:
+                entry = self._entry(code)
+                with entry.lock:
+                    # 다른 워커가 이번 주기에 이미 갱신했으면 그 창을 받아 쓰고 넘어갑니다.
+                    if self._adopt_shared(code, entry) and time.time() - entry.fetched_at < self.refresh_interval:
+                        self.counters["shared_hits"] += 1
+                        continue
+                    self._refresh(code, entry)
+                self.counters["background_refreshes"] += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, symbols=len(self._entries),
+                        popular=[code for code, _ in self._popularity.most_common(5)])
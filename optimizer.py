@@ -0,0 +1,175 @@
+import sys
+import time
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import backtest
+import indicators
+import strategy
+
+# =========================================================
+# 🔧 전략 파라미터 병렬 최적화기
+# =========================================================
+# 한 종목의 모든 파라미터 조합을 '열'로 펼쳐서 (날짜, 조합) 신호 행렬을 한 번에 만들고
+# backtest.simulate로 모든 조합을 한 번에 평가합니다. 종목들은 프로세스 풀로 나눠 돌립니다.
+DEFAULT_GRIDS = {
+    "volatility": {"k": [0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0]},
+    "goldencross": {"fast": [3, 5, 10, 15, 20], "slow": [20, 30, 60, 120]},
+    "rsi_bollinger": {
+        "rsi_length": [9, 14, 21],
+        "bb_length": [20],
+        "bb_std": [1.5, 2.0, 2.5],
+        "oversold": [25, 30, 35],
+        "overbought": [65, 70, 75],
+    },
+}
+RANK_METRIC = "total_return"
+METRICS = ("total_return", "cagr", "max_drawdown", "hit_rate", "trades", "exposure")
+
+
+def expand_grid(strategy_type, grid=None):
+    """파라미터 그리드를 조합 리스트로 펼침 (골든크로스는 fast < slow 조합만)"""
+    grid = grid or DEFAULT_GRIDS[strategy_type]
+    names = list(grid)
+    combos = [dict(zip(names, values)) for values in itertools.product(*(grid[n] for n in names))]
+    if strategy_type == "goldencross":
+        combos = [c for c in combos if c["fast"] < c["slow"]]
+    return combos
+
+
+def _column(combos, name):
+    return np.array([c[name] for c in combos], dtype=np.float64)[None, :]
+
+
+def grid_signals(strategy_type, open_, high, low, close, combos):
+    """
+    한 종목의 (날짜,) 가격 배열로 모든 조합의 신호를 (날짜, 조합) 행렬로 계산
+    같은 길이의 지표는 한 번만 계산해서 여러 조합이 나눠 씁니다.
+    """
+    col = lambda a: np.asarray(a, dtype=np.float64)[:, None]
+
+    if strategy_type == "volatility":
+        return strategy.volatility_signals(col(open_), col(high), col(low), col(close), k=_column(combos, "k"))
+
+    if strategy_type == "goldencross":
+        lengths = sorted({c["fast"] for c in combos} | {c["slow"] for c in combos})
+        smas = {n: indicators.sma(close, n) for n in lengths}
+        fast = np.column_stack([smas[c["fast"]] for c in combos])
+        slow = np.column_stack([smas[c["slow"]] for c in combos])
+        return strategy.goldencross_signals(fast, slow)
+
+    if strategy_type == "rsi_bollinger":
+        rsis = {n: indicators.rsi(close, n) for n in {c["rsi_length"] for c in combos}}
+        bands = {(n, s): indicators.bbands(close, n, s)["bbl"]
+                 for n, s in {(c["bb_length"], c["bb_std"]) for c in combos}}
+        rsi_values = np.column_stack([rsis[c["rsi_length"]] for c in combos])
+        lower = np.column_stack([bands[(c["bb_length"], c["bb_std"])] for c in combos])
+        return strategy.rsi_bollinger_signals(col(close), rsi_values, lower,
+                                              oversold=_column(combos, "oversold"),
+                                              overbought=_column(combos, "overbought"))
+
+    raise ValueError(f"알 수 없는 전략: {strategy_type}")
+
+
+def walk_forward_windows(n_bars, n_splits, train_ratio=0.7):
+    """
+    앵커드 워크포워드 구간 [(train_start, train_end, test_start, test_end), ...]
+    앞쪽 train_ratio 이후 구간을 n_splits개 검증 구간으로 나누고, 각 검증 직전까지를 학습 구간으로 씁니다.
+    """
+    first_test = int(n_bars * train_ratio)
+    edges = np.linspace(first_test, n_bars, n_splits + 1).astype(int)
+    return [(0, int(edges[i]), int(edges[i]), int(edges[i + 1])) for i in range(n_splits)
+            if edges[i + 1] > edges[i]]
+
+
+def _optimize_symbol(task):
+    """프로세스 풀 작업 단위: 한 종목의 모든 조합 평가 (+ 워크포워드)"""
+    symbol, prices, strategy_type, combos, fee, slippage, n_splits = task
+    open_, high, low, close = (prices[f] for f in backtest.PRICE_FIELDS)
+
+    signals = grid_signals(strategy_type, open_, high, low, close, combos)
+    sim = backtest.simulate(signals, np.asarray(open_, dtype=np.float64)[:, None], strategy_type,
+                            fee=fee, slippage=slippage)
+    positions, returns = sim["positions"], sim["returns"]
+
+    full = backtest.summarize(positions, returns)
+    rows = []
+    for i, combo in enumerate(combos):
+        row = {"symbol": symbol, **combo}
+        row.update({m: float(full[m][i]) for m in METRICS})
+        rows.append(row)
+
+    best = combos[int(np.argmax(full[RANK_METRIC]))]
+    folds = []
+    if n_splits:
+        # 신호는 전체 기간으로 한 번만 계산하고, 구간별로 수익률만 잘라서 평가합니다.
+        for train_start, train_end, test_start, test_end in walk_forward_windows(len(returns), n_splits):
+            train = backtest.summarize(positions[train_start:train_end], returns[train_start:train_end])
+            chosen = int(np.argmax(train[RANK_METRIC]))
+            test = backtest.summarize(positions[test_start:test_end], returns[test_start:test_end])
+            folds.append({
+                "symbol": symbol,
+                "test_start": test_start,
+                "test_end": test_end,
+                **combos[chosen],
+                f"train_{RANK_METRIC}": float(train[RANK_METRIC][chosen]),
+                **{f"test_{m}": float(test[m][chosen]) for m in METRICS},
+            })
+            # 워크포워드를 돌렸다면 가장 최근 학습 구간에서 고른 파라미터를 최적값으로 씁니다.
+            best = combos[chosen]
+    return rows, folds, (symbol, dict(best))
+
+
+def optimize(frames, strategy_type, grid=None, fee=backtest.FEE_RATE, slippage=backtest.SLIPPAGE,
+             n_splits=0, max_workers=None):
+    """
+    {종목: 일봉 df} 전체에 대해 파라미터 그리드를 평가
+    반환: {'table': 순위표 DataFrame, 'best': {종목: 최적 파라미터}, 'walk_forward': 검증 구간 DataFrame}
+    'best'의 값은 strategy.get_strategy_signal(df, strategy_type, **best[종목]) 로 바로 넘길 수 있습니다.
+    """
+    combos = expand_grid(strategy_type, grid)
+    tasks = []
+    for symbol, df in frames.items():
+        if df is None or df.empty:
+            continue
+        prices = {f: df[f if f in df.columns else f.capitalize()].to_numpy(dtype=np.float64)
+                  for f in backtest.PRICE_FIELDS}
+        tasks.append((symbol, prices, strategy_type, combos, fee, slippage, n_splits))
+
+    if max_workers == 1 or len(tasks) <= 1:
+        outputs = [_optimize_symbol(t) for t in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            outputs = list(pool.map(_optimize_symbol, tasks, chunksize=max(1, len(tasks) // 64)))
+
+    rows = [row for out, _, _ in outputs for row in out]
+    folds = [fold for _, out, _ in outputs for fold in out]
+    best = dict(b for _, _, b in outputs)
+    if not rows:
+        return {"table": pd.DataFrame(), "best": {}, "walk_forward": pd.DataFrame()}
+
+    table = pd.DataFrame(rows)
+    table["rank"] = table.groupby("symbol")[RANK_METRIC].rank(ascending=False, method="first").astype(int)
+    table = table.sort_values(["symbol", "rank"]).reset_index(drop=True)
+    return {"table": table, "best": best, "walk_forward": pd.DataFrame(folds)}
+
+
+if __name__ == "__main__":
+    # 사용 예: python optimizer.py goldencross 005930 000660 TSLA
+    import data_collector
+
+    strategy_name = sys.argv[1] if len(sys.argv) > 1 else "volatility"
+    tickers = sys.argv[2:] or ["005930", "000660"]
+
+    charts = data_collector.get_yahoo_charts(tickers, period="10y")
+    started = time.perf_counter()
+    result = optimize(charts, strategy_name, n_splits=4)
+    elapsed = time.perf_counter() - started
+
+    print(f"\n🔧 [{strategy_name}] {len(result['best'])}개 종목 최적화 완료 ({elapsed:.3f}s)")
+    print(result["table"][result["table"]["rank"] <= 3].to_string(index=False))
+    for symbol, params in result["best"].items():
+        print(f"   🏆 {symbol}: {params}")
@@ -0,0 +1,426 @@
+import sys
+import time
+import random
+import argparse
+import threading
+from collections import deque
+
+import backtest
+import intraday_bars
+import strategy
+
+# =========================================================
+# 📒 이벤트 기반 모의 투자 엔진 (실시간 시세 / 녹화 틱 재생)
+# =========================================================
+# 시세 이벤트와 신호 이벤트(전략/AI 판단)를 한 줄로 처리합니다.
+#   시세  -> 그 종목에 걸린 주문만 체결 판정 -> 포지션/손익 갱신 -> (신호 함수가 있으면) 새 신호 -> 주문 접수
+#   신호  -> 매수(보유 없을 때 금액 기준 시장가) / 매도(보유 전량 시장가) 주문 접수
+# 주문은 접수된 뒤에 들어온 시세에서만 체결되므로(미래 참조 없음) 실시간과 재생이 같은 결과를 냅니다.
+# 체결 가격에는 backtest와 같은 수수료/슬리피지를 적용하고, 원하면 틱 거래량의 일정 비율까지만 체결(부분 체결)합니다.
+# 이벤트는 (종류, 심볼, 값...) 튜플로 다루고 종목별 주문 목록만 보기 때문에 종목 수가 늘어도 이벤트당 비용이 일정합니다.
+INITIAL_CASH = 100_000_000
+ORDER_VALUE = 1_000_000  # 매수 신호 1건당 주문 금액
+FEE_RATE = backtest.FEE_RATE
+SLIPPAGE = backtest.SLIPPAGE
+PARTICIPATION = None  # 예: 0.1 -> 틱 사이 거래량의 10%까지만 체결 (None이면 전량 체결)
+
+QUOTE, SIGNAL = 0, 1
+BUY, SELL = "buy", "sell"
+
+
+class Order:
+    __slots__ = ("id", "symbol", "side", "qty", "notional", "limit", "filled", "avg_price", "status", "ts", "source")
+
+    def __init__(self, order_id, symbol, side, qty=None, notional=None, limit=None, ts=0.0, source=""):
+        self.id = order_id
+        self.symbol = symbol
+        self.side = side
+        self.qty = qty            # 수량 주문 (매도)
+        self.notional = notional  # 금액 주문 (매수, 체결 시점 가격으로 수량 결정)
+        self.limit = limit        # None이면 시장가
+        self.filled = 0
+        self.avg_price = 0.0
+        self.status = "open"
+        self.ts = ts
+        self.source = source
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class Position:
+    __slots__ = ("qty", "avg_cost", "last")
+
+    def __init__(self):
+        self.qty = 0
+        self.avg_cost = 0.0
+        self.last = 0.0
+
+
+class Portfolio:
+    def __init__(self, cash=INITIAL_CASH, fee=FEE_RATE):
+        self.initial_cash = cash
+        self.cash = cash
+        self.fee = fee
+        self.positions = {}
+        self.realized = 0.0
+        self.fees = 0.0
+
+    def apply_fill(self, symbol, side, qty, price):
+        position = self.positions.get(symbol)
+        if position is None:
+            position = self.positions[symbol] = Position()
+        cost = qty * price
+        fee = cost * self.fee
+        self.fees += fee
+        if side == BUY:
+            position.avg_cost = (position.avg_cost * position.qty + cost) / (position.qty + qty)
+            position.qty += qty
+            self.cash -= cost + fee
+        else:
+            self.realized += (price - position.avg_cost) * qty - fee
+            position.qty -= qty
+            self.cash += cost - fee
+            if position.qty == 0:
+                position.avg_cost = 0.0
+        position.last = price
+
+    def snapshot(self):
+        holdings = {s: p for s, p in self.positions.items() if p.qty}
+        market_value = sum(p.qty * p.last for p in holdings.values())
+        unrealized = sum((p.last - p.avg_cost) * p.qty for p in holdings.values())
+        equity = self.cash + market_value
+        return {
+            "cash": round(self.cash, 2),
+            "equity": round(equity, 2),
+            "return_pct": round((equity / self.initial_cash - 1) * 100, 4),
+            "realized": round(self.realized, 2),
+            "unrealized": round(unrealized, 2),
+            "fees": round(self.fees, 2),
+            "positions": {s: {"qty": p.qty, "avg_cost": round(p.avg_cost, 4), "last": p.last}
+                          for s, p in holdings.items()},
+        }
+
+
+class OrderBook:
+    """종목별 미체결 주문 목록 + 시세 기준 체결 모델"""
+
+    def __init__(self, slippage=SLIPPAGE, participation=PARTICIPATION):
+        self.slippage = slippage
+        self.participation = participation
+        self.open = {}
+        self._next_id = 1
+
+    def place(self, symbol, side, qty=None, notional=None, limit=None, ts=0.0, source=""):
+        order = Order(self._next_id, symbol, side, qty, notional, limit, ts, source)
+        self._next_id += 1
+        self.open.setdefault(symbol, []).append(order)
+        return order
+
+    def has_open(self, symbol):
+        return bool(self.open.get(symbol))
+
+    def match(self, symbol, price, volume, portfolio):
+        """시세 하나로 그 종목 주문들을 체결 판정 -> 체결된 (주문, 수량, 가격) 목록"""
+        orders = self.open.get(symbol)
+        if not orders:
+            return ()
+        budget = None if self.participation is None or volume is None else int(volume * self.participation)
+        fills = []
+        for order in orders:
+            if order.limit is not None and (price > order.limit if order.side == BUY else price < order.limit):
+                continue
+            fill_price = price if order.limit is not None else (
+                price * (1 + self.slippage) if order.side == BUY else price * (1 - self.slippage))
+
+            if order.notional is not None:
+                order.qty = int(order.notional // (fill_price * (1 + portfolio.fee)))
+                order.notional = None
+            remaining = order.qty - order.filled
+            if order.side == SELL:
+                held = portfolio.positions.get(symbol)
+                remaining = min(remaining, held.qty if held else 0)
+            else:
+                # 현금을 넘겨서 사지 않습니다 (다른 종목 체결로 주문 때보다 현금이 줄었을 수 있음).
+                remaining = min(remaining, max(0, int(portfolio.cash // (fill_price * (1 + portfolio.fee)))))
+            qty = remaining if budget is None else min(remaining, budget)
+            if qty > 0:
+                order.avg_price = (order.avg_price * order.filled + fill_price * qty) / (order.filled + qty)
+                order.filled += qty
+                portfolio.apply_fill(symbol, order.side, qty, fill_price)
+                fills.append((order, qty, fill_price))
+                if budget is not None:
+                    budget -= qty
+            if order.filled >= order.qty or remaining <= 0:
+                order.status = "filled" if order.filled else "cancelled"
+            if budget is not None and budget <= 0:
+                break
+
+        still_open = [o for o in orders if o.status == "open"]
+        if still_open:
+            self.open[symbol] = still_open
+        else:
+            del self.open[symbol]
+        return fills
+
+
+class BarStrategy:
+    """
+    틱 -> 분봉(intraday_bars.BarRing) -> strategy.compute_signals 신호 함수
+    새 봉이 열릴 때마다 직전까지 닫힌 봉 lookback개로 마지막 신호를 계산합니다 (진행 중인 봉은 쓰지 않음).
+    매도 신호가 없는 전략(backtest.HOLD_BARS, 변동성 돌파)은 backtest와 같게 매수 후 그 봉 수가 지나면 매도 신호를 냅니다.
+    """
+
+    def __init__(self, strategy_type="volatility", interval=60, lookback=None, capacity=64, **params):
+        self.strategy_type = strategy_type
+        self.params = params
+        self.lookback = lookback or {"volatility": 2, "goldencross": params.get("slow", 20) + 1}.get(
+            strategy_type, max(params.get("bb_length", 20), 5 * params.get("rsi_length", 14)))
+        self.bars = intraday_bars.IntradayBars({"bar": interval}, capacity=max(capacity, self.lookback + 1),
+                                               max_symbols=sys.maxsize)
+        self.hold_bars = backtest.HOLD_BARS.get(strategy_type)
+        self._since_buy = {}
+
+    def __call__(self, symbol, price, volume, ts):
+        ring = self.bars.get(symbol, "bar")
+        before = ring.total if ring is not None else 0
+        self.bars.on_tick(symbol, price, volume, ts)
+        ring = ring or self.bars.get(symbol, "bar")
+        if ring.total == before or len(ring) <= self.lookback:
+            return None
+        bars = ring.view(self.lookback + 1)
+        closed = slice(0, self.lookback)
+        signals = strategy.compute_signals(self.strategy_type, bars["open"][closed], bars["high"][closed],
+                                           bars["low"][closed], bars["close"][closed], **self.params)
+        signal = int(signals[-1])
+        if self.hold_bars:
+            if signal == strategy.BUY:
+                self._since_buy[symbol] = 0
+                return BUY
+            since = self._since_buy.get(symbol)
+            if since is None:
+                return None
+            self._since_buy[symbol] = since + 1
+            return SELL if since + 1 >= self.hold_bars else None
+        return {strategy.BUY: BUY, strategy.SELL: SELL}.get(signal)
+
+
+class PaperEngine:
+    def __init__(self, signal_fn=None, cash=INITIAL_CASH, order_value=ORDER_VALUE,
+                 slippage=SLIPPAGE, participation=PARTICIPATION, fee=FEE_RATE, record_path=None):
+        self.signal_fn = signal_fn
+        self.order_value = order_value
+        self.portfolio = Portfolio(cash, fee)
+        self.book = OrderBook(slippage, participation)
+        self.record_path = record_path
+        self.fills = deque(maxlen=1000)  # 최근 체결 내역
+        self._last_volume = {}
+        self._queue = deque()
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._record = None
+        self.counters = {"events": 0, "quotes": 0, "signals": 0, "orders": 0, "fills": 0, "busy_seconds": 0.0}
+
+    # -----------------------------------------------------
+    # 🔁 이벤트 처리 (실시간/재생 공용)
+    # -----------------------------------------------------
+    def _dispatch(self, event):
+        kind, symbol, value, extra, ts = event
+        self.counters["events"] += 1
+        if kind == QUOTE:
+            self._on_quote(symbol, value, extra, ts)
+        else:
+            self._on_signal(symbol, value, extra, ts)
+
+    def _on_quote(self, symbol, price, cum_volume, ts):
+        self.counters["quotes"] += 1
+        volume = None
+        if cum_volume is not None:
+            # 첫 스냅샷의 누적 거래량은 그날 전체 거래량이므로 체결 가능량으로 쓰지 않습니다 (intraday_bars와 같은 규칙).
+            prev = self._last_volume.get(symbol)
+            if prev is None:
+                volume = 0
+            else:
+                volume = cum_volume - prev if cum_volume >= prev else cum_volume
+            self._last_volume[symbol] = cum_volume
+
+        for order, qty, fill_price in self.book.match(symbol, price, volume, self.portfolio):
+            self.counters["fills"] += 1
+            self.fills.append({"ts": ts, "symbol": symbol, "side": order.side, "qty": qty,
+                               "price": round(fill_price, 4), "order_id": order.id, "source": order.source})
+
+        position = self.portfolio.positions.get(symbol)
+        if position is not None:
+            position.last = price
+
+        if self.signal_fn is not None:
+            decision = self.signal_fn(symbol, price, cum_volume, ts)
+            if decision:
+                self._on_signal(symbol, decision, "strategy", ts)
+
+    def _on_signal(self, symbol, decision, source, ts):
+        self.counters["signals"] += 1
+        decision = str(decision).lower()
+        if self.book.has_open(symbol):
+            return  # 같은 종목 주문이 아직 체결 전이면 새 주문을 쌓지 않습니다.
+        position = self.portfolio.positions.get(symbol)
+        held = position.qty if position is not None else 0
+        if decision == BUY and not held:
+            # 남은 현금이 주문 금액보다 적으면 그만큼만 삽니다 (현금이 없으면 주문하지 않음).
+            notional = min(self.order_value, self.portfolio.cash)
+            if notional <= 0:
+                return
+            self.book.place(symbol, BUY, notional=notional, ts=ts, source=source)
+        elif decision == SELL and held:
+            self.book.place(symbol, SELL, qty=held, ts=ts, source=source)
+        else:
+            return
+        self.counters["orders"] += 1
+
+    # -----------------------------------------------------
+    # 📡 실시간 모드 (데몬 스레드가 큐를 비움)
+    # -----------------------------------------------------
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                if self.record_path:
+                    self._record = open(self.record_path, "a", encoding="utf-8")
+                self._thread = threading.Thread(target=self._loop, name="paper-engine", daemon=True)
+                self._thread.start()
+
+    def post_quote(self, symbol, price, cum_volume=None, ts=None):
+        if self._thread is None or not price or price <= 0:
+            return
+        self._queue.append((QUOTE, symbol, float(price), cum_volume, ts or time.time()))
+        self._wakeup.set()
+
+    def post_signal(self, symbol, decision, source="manual", ts=None):
+        if self._thread is None or str(decision).lower() not in (BUY, SELL):
+            return
+        self._queue.append((SIGNAL, symbol, decision, source, ts or time.time()))
+        self._wakeup.set()
+
+    def _loop(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            started = time.perf_counter()
+            with self._lock:
+                while self._queue:
+                    event = self._queue.popleft()
+                    self._dispatch(event)
+                    if self._record is not None and event[0] == QUOTE:
+                        self._record.write(f"{event[4]},{event[1]},{event[2]},{'' if event[3] is None else event[3]}\n")
+                if self._record is not None:
+                    self._record.flush()
+            self.counters["busy_seconds"] += time.perf_counter() - started
+
+    # -----------------------------------------------------
+    # ⏩ 재생 모드
+    # -----------------------------------------------------
+    def replay(self, ticks, speed=None):
+        """
+        녹화된 (ts, symbol, price, 누적 거래량) 틱을 시간 순서대로 재생하고 처리량 리포트를 반환
+        speed=None이면 최대 속도, speed=60이면 실제 시간의 60배 속도로 틱 사이 간격을 재현합니다.
+        """
+        dispatch = self._on_quote
+        count = 0
+        first_ts = last_ts = None
+        started = time.perf_counter()
+        for ts, symbol, price, volume in ticks:
+            if first_ts is None:
+                first_ts = ts
+            elif speed:
+                lag = (ts - first_ts) / speed - (time.perf_counter() - started)
+                if lag > 0:
+                    time.sleep(lag)
+            dispatch(symbol, price, volume, ts)
+            count += 1
+            last_ts = ts
+        elapsed = time.perf_counter() - started
+        self.counters["events"] += count
+        self.counters["busy_seconds"] += elapsed
+
+        span = (last_ts - first_ts) if count else 0.0
+        return {
+            "events": count,
+            "seconds": round(elapsed, 4),
+            "events_per_sec": round(count / elapsed, 1) if elapsed else 0.0,
+            "us_per_event": round(elapsed / count * 1e6, 3) if count else 0.0,
+            "simulated_seconds": span,
+            "speedup": round(span / elapsed, 1) if elapsed else 0.0,
+            "symbols": len(self._last_volume),
+            "orders": self.counters["orders"],
+            "fills": self.counters["fills"],
+            "portfolio": self.portfolio.snapshot(),
+        }
+
+    def stats(self):
+        busy = self.counters["busy_seconds"]
+        return dict(self.counters, running=self._thread is not None, queued=len(self._queue),
+                    events_per_busy_sec=round(self.counters["events"] / busy, 1) if busy else 0.0,
+                    open_orders=sum(len(o) for o in self.book.open.values()))
+
+    def snapshot(self):
+        with self._lock:
+            return {"stats": self.stats(), "portfolio": self.portfolio.snapshot(), "recent_fills": list(self.fills)[-20:]}
+
+
+# 서버에서 AI 판단/실시간 시세를 받는 엔진 (시작 전에는 이벤트를 무시)
+ENGINE = PaperEngine()
+
+
+# -----------------------------------------------------
+# 📼 녹화 틱 입출력 / 합성 틱
+# -----------------------------------------------------
+def load_ticks(path):
+    """녹화 파일(ts,symbol,price,누적 거래량 줄 단위) -> 시간순 틱 리스트"""
+    ticks = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            ts, symbol, price, volume = line.rstrip("\n").split(",")
+            ticks.append((float(ts), symbol, float(price), float(volume) if volume else None))
+    ticks.sort(key=lambda t: t[0])
+    return ticks
+
+
+def synthetic_ticks(symbols=1000, seconds=1800, every=5, seed=0):
+    """종목마다 every초 간격 랜덤 워크 시세 (처리량 측정용)"""
+    rng = random.Random(seed)
+    names = [f"SYM{i:05d}" for i in range(symbols)]
+    prices = [rng.uniform(5_000, 200_000) for _ in names]
+    volumes = [0] * symbols
+    start = time.time() - seconds
+    for step in range(0, seconds, every):
+        ts = start + step
+        for i, name in enumerate(names):
+            prices[i] *= 1 + rng.gauss(0, 0.002)
+            volumes[i] += rng.randint(0, 500)
+            yield ts, name, round(prices[i], 1), volumes[i]
+
+
+if __name__ == "__main__":
+    sys.stdout.reconfigure(encoding='utf-8')
+
+    parser = argparse.ArgumentParser(description="모의 투자 엔진 재생 (녹화 틱 또는 합성 틱)")
+    parser.add_argument("--ticks", default="", help="녹화 파일 경로 (없으면 합성 틱)")
+    parser.add_argument("--symbols", type=int, default=1000, help="합성 틱 종목 수")
+    parser.add_argument("--seconds", type=int, default=1800, help="합성 틱 시간 길이(초)")
+    parser.add_argument("--strategy", default="volatility", help="volatility, goldencross, rsi_bollinger")
+    parser.add_argument("--interval", type=int, default=60, help="신호용 분봉 길이(초)")
+    parser.add_argument("--speed", type=float, default=0, help="재생 배속 (0이면 최대 속도)")
+    parser.add_argument("--participation", type=float, default=0, help="틱 거래량 대비 최대 체결 비율 (0이면 제한 없음)")
+    args = parser.parse_args()
+
+    ticks = load_ticks(args.ticks) if args.ticks else list(synthetic_ticks(args.symbols, args.seconds))
+    engine = PaperEngine(signal_fn=BarStrategy(args.strategy, interval=args.interval),
+                         participation=args.participation or None)
+    report = engine.replay(ticks, speed=args.speed or None)
+
+    print(f"⏩ [Paper] {report['events']:,}개 틱 / {report['symbols']:,}개 종목 재생: {report['seconds']:.2f}s "
+          f"({report['events_per_sec']:,.0f} events/s, {report['us_per_event']:.1f}us/event, 실제 시간 대비 {report['speedup']:,.0f}배)")
+    portfolio = report["portfolio"]
+    print(f"   📒 주문 {report['orders']:,}건 / 체결 {report['fills']:,}건 | 평가금액 {portfolio['equity']:,.0f} "
+          f"({portfolio['return_pct']:+.2f}%) | 실현 {portfolio['realized']:,.0f} / 평가 {portfolio['unrealized']:,.0f} "
+          f"| 보유 {len(portfolio['positions'])}종목")
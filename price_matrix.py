@@ -0,0 +1,306 @@
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import data_collector
+import scanner
+import stock_utils
+
+# =========================================================
+# 🧊 전 종목 종가/거래량 행렬 (메모리 매핑, 횡단면 스크리닝/상관관계)
+# =========================================================
+# 마스터 파일의 종목 전체를 (종목, 날짜) float32 행렬 두 개(종가/거래량)로 만들어 .npy로 저장하고,
+# 조회할 때는 np.load(mmap_mode='r')로 매핑만 해서 수천 종목 순위/상관관계를 NumPy 한 번에 계산합니다.
+# 날짜 축은 최근 DAYS 영업일(월~금) 달력에 맞추고, 시장 휴일처럼 봉이 없는 날은 직전 종가로 채웁니다(거래량 0).
+# 빌드(차트 수집)는 `python price_matrix.py`로 따로 돌리고, 서버는 파일이 바뀌면 다시 매핑합니다.
+MATRIX_DIR = Path("matrix_cache")
+DAYS = 260  # 약 1년치 영업일
+PERIOD = "1y"
+RSI_WARMUP = 5  # RSI는 기간의 5배 구간으로 계산해서 RMA 시드 영향을 줄입니다.
+CHUNK_SIZE = scanner.CHUNK_SIZE
+DOWNLOAD_WORKERS = scanner.DOWNLOAD_WORKERS
+
+# 지표 이름 -> (기본 기간, 기본 정렬이 오름차순인지)
+METRICS = {
+    "momentum": (20, False),      # 기간 수익률 상위
+    "rsi": (14, True),            # RSI 하위 = 과매도
+    "volume_ratio": (20, False),  # 마지막 거래량 / 직전 기간 평균
+    "drawdown": (60, True),       # 기간 최고가 대비 하락률 하위
+    "volatility": (20, False),    # 연율화 일간 로그수익률 표준편차
+}
+
+
+def _last_rsi(window, length):
+    """
+    (종목, 날짜) 창의 마지막 날 RSI (indicators.rsi와 같은 SMA 시드 RMA)
+    종목 수천 개를 열로 둔 pandas ewm 대신 날짜 축으로 한 칸씩 전 종목을 한 번에 갱신합니다.
+    창 안에 NaN이 있는 종목(상장 직후)은 NaN.
+    """
+    diff = np.diff(np.ascontiguousarray(window.T), axis=0)  # (날짜, 종목): 한 날짜 행이 연속 메모리
+    gain = np.maximum(diff, 0.0)
+    loss = np.maximum(-diff, 0.0)
+    avg_gain = gain[:length].mean(axis=0)
+    avg_loss = loss[:length].mean(axis=0)
+    for t in range(length, len(diff)):
+        avg_gain += (gain[t] - avg_gain) / length
+        avg_loss += (loss[t] - avg_loss) / length
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = 100.0 * avg_gain / (avg_gain + avg_loss)
+    return np.where(np.isnan(diff).any(axis=0), np.nan, rsi)
+
+
+def _calendar(days=DAYS):
+    return pd.bdate_range(end=pd.Timestamp.today().normalize(), periods=days).values.astype("datetime64[D]")
+
+
+def _fill_rows(close, volume, calendar, charts, symbols):
+    """한 묶음의 일봉 df들을 달력 위치에 맞춰 (종목, 날짜) 블록에 채우고 종가는 앞 값으로 채움"""
+    for j, symbol in enumerate(symbols):
+        df = charts.get(symbol)
+        if df is None or df.empty:
+            continue
+        dates = pd.DatetimeIndex(df.index).tz_localize(None).values.astype("datetime64[D]")
+        pos = np.searchsorted(calendar, dates)
+        on_calendar = (pos < len(calendar)) & (calendar[np.minimum(pos, len(calendar) - 1)] == dates)
+        close[j, pos[on_calendar]] = df["close"].to_numpy(dtype=np.float32)[on_calendar]
+        if "volume" in df.columns:
+            volume[j, pos[on_calendar]] = df["volume"].to_numpy(dtype=np.float32)[on_calendar]
+
+    # 휴일/거래 정지일은 직전 종가 유지 (상장 전 구간은 NaN 그대로)
+    close[:] = pd.DataFrame(close.T).ffill().to_numpy(dtype=np.float32).T
+    np.nan_to_num(volume, copy=False, nan=0.0)
+
+
+def build(root=MATRIX_DIR, markets=None, limit=None, days=DAYS):
+    """유니버스 전체 차트를 묶음 단위로 받아 행렬 파일을 새로 만들고 교체 (반환: 종목 수, 날짜 수)"""
+    started = time.perf_counter()
+    root = Path(root)
+    root.mkdir(parents=True, exist_ok=True)
+
+    universe = stock_utils.get_universe(markets)
+    if limit:
+        universe = universe[:limit]
+    calendar = _calendar(days)
+    shape = (len(universe), len(calendar))
+    print(f"🧊 [PriceMatrix] {shape[0]}개 종목 x {shape[1]}일 행렬 빌드 시작")
+
+    tmp = {name: root / f"{name}.npy.tmp" for name in ("close", "volume")}
+    close = np.lib.format.open_memmap(tmp["close"], mode="w+", dtype=np.float32, shape=shape)
+    volume = np.lib.format.open_memmap(tmp["volume"], mode="w+", dtype=np.float32, shape=shape)
+    close[:] = np.nan
+    volume[:] = np.nan
+
+    def load(start):
+        items = universe[start:start + CHUNK_SIZE]
+        symbols = [scanner.yahoo_symbol(item) for item in items]
+        charts = data_collector.get_yahoo_charts(symbols, period=PERIOD)
+        block = slice(start, start + len(items))
+        # 묶음마다 행 구간이 겹치지 않으므로 스레드별로 바로 써도 됩니다.
+        _fill_rows(close[block], volume[block], calendar, charts, symbols)
+        return int((~np.isnan(close[block, -1])).sum())
+
+    with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as pool:
+        loaded = sum(pool.map(load, range(0, len(universe), CHUNK_SIZE)))
+
+    close.flush()
+    volume.flush()
+    del close, volume
+
+    # 데이터 파일을 먼저 교체하고 종목 목록을 마지막에 바꿔서, 읽는 쪽은 목록 변경으로 새 빌드를 알아챕니다.
+    with open(root / "dates.npy.tmp", "wb") as f:
+        np.save(f, calendar)
+    os.replace(root / "dates.npy.tmp", root / "dates.npy")
+    for name, path in tmp.items():
+        os.replace(path, root / f"{name}.npy")
+    meta = {"built_at": time.time(), "symbols": universe}
+    with open(root / "symbols.json.tmp", "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False)
+    os.replace(root / "symbols.json.tmp", root / "symbols.json")
+
+    elapsed = time.perf_counter() - started
+    print(f"✅ [PriceMatrix] 빌드 완료: 시세 있는 종목 {loaded}/{shape[0]}개 ({elapsed:.1f}s)")
+    return shape
+
+
+class PriceMatrix:
+    """build()가 만든 파일을 읽기 전용으로 매핑해서 스크리닝/순위/상관관계 질의에 답합니다."""
+
+    def __init__(self, root=MATRIX_DIR):
+        self.root = Path(root)
+        self._loaded_mtime = None
+        self._lock = threading.Lock()
+        self.close = self.volume = self.dates = None
+        self.symbols = []
+        self.built_at = None
+
+    def _ensure(self):
+        meta_path = self.root / "symbols.json"
+        try:
+            mtime = meta_path.stat().st_mtime
+        except OSError:
+            raise FileNotFoundError("가격 행렬이 아직 없습니다. `python price_matrix.py`로 먼저 빌드하세요.")
+        if mtime == self._loaded_mtime:
+            return
+        with self._lock:
+            if mtime == self._loaded_mtime:
+                return
+            with open(meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+            close = np.load(self.root / "close.npy", mmap_mode="r")
+            volume = np.load(self.root / "volume.npy", mmap_mode="r")
+            dates = np.load(self.root / "dates.npy")
+            if close.shape != (len(meta["symbols"]), len(dates)) or volume.shape != close.shape:
+                raise ValueError("가격 행렬 파일이 빌드 도중입니다. 잠시 후 다시 시도하세요.")
+
+            self.close, self.volume, self.dates = close, volume, dates
+            self.symbols = meta["symbols"]
+            self.built_at = meta["built_at"]
+            self._rows = {str(item["code"]).upper(): i for i, item in enumerate(self.symbols)}
+            self._markets = np.array([item["market"] for item in self.symbols])
+            self._loaded_mtime = mtime
+            print(f"🧊 [PriceMatrix] {close.shape[0]}개 종목 x {close.shape[1]}일 행렬 매핑")
+
+    # -----------------------------------------------------
+    # 🧮 지표 (모든 종목을 한 번에, 마지막 날 기준)
+    # -----------------------------------------------------
+    def _metric(self, metric, lookback):
+        close = self.close
+        if metric == "momentum":
+            window = close[:, -(lookback + 1):]
+            return window[:, -1] / window[:, 0] - 1.0
+        if metric == "rsi":
+            return _last_rsi(np.asarray(close[:, -(lookback * RSI_WARMUP + 1):], dtype=np.float64), lookback)
+        if metric == "volume_ratio":
+            window = self.volume[:, -(lookback + 1):]
+            with np.errstate(divide="ignore", invalid="ignore"):
+                return window[:, -1] / window[:, :-1].mean(axis=1)
+        if metric == "drawdown":
+            window = close[:, -lookback:]
+            with np.errstate(invalid="ignore"):
+                return window[:, -1] / window.max(axis=1) - 1.0
+        if metric == "volatility":
+            returns = np.diff(np.log(close[:, -(lookback + 1):]), axis=1)
+            return returns.std(axis=1) * np.sqrt(252)
+        raise ValueError(f"지원하지 않는 지표: {metric} (가능: {', '.join(METRICS)})")
+
+    def _mask(self, markets, min_price, min_volume, lookback):
+        mask = ~np.isnan(self.close[:, -1])
+        if markets:
+            mask &= np.isin(self._markets, [m.upper() for m in markets])
+        if min_price:
+            mask &= self.close[:, -1] >= min_price
+        if min_volume:
+            mask &= self.volume[:, -lookback:].mean(axis=1) >= min_volume
+        return mask
+
+    def _row_info(self, i, value):
+        item = self.symbols[i]
+        return {"code": item["code"], "name": item["name"], "market": item["market"],
+                "value": round(float(value), 6), "close": float(self.close[i, -1])}
+
+    # -----------------------------------------------------
+    # 🔎 질의 API
+    # -----------------------------------------------------
+    def screen(self, metric="momentum", markets=None, top=20, lookback=None, ascending=None,
+               min_price=0.0, min_volume=0.0):
+        """조건을 만족하는 종목 중 지표 상위(또는 하위) top개"""
+        self._ensure()
+        default_lookback, default_ascending = METRICS.get(metric, (20, False))
+        lookback = lookback or default_lookback
+        ascending = default_ascending if ascending is None else ascending
+
+        values = self._metric(metric, lookback)
+        mask = self._mask(markets, min_price, min_volume, lookback) & np.isfinite(values)
+        candidates = np.flatnonzero(mask)
+        keys = values[candidates] if ascending else -values[candidates]
+
+        # 전체 정렬 대신 argpartition으로 상위 top개만 고른 뒤 그 안에서 정렬합니다.
+        top = min(top, len(candidates))
+        if top <= 0:
+            picked = candidates[:0]
+        else:
+            part = np.argpartition(keys, top - 1)[:top]
+            picked = candidates[part[np.argsort(keys[part], kind="stable")]]
+        return {
+            "metric": metric, "lookback": lookback, "ascending": ascending,
+            "as_of": str(self.dates[-1]), "universe": int(len(candidates)),
+            "results": [dict(rank=r + 1, **self._row_info(i, values[i])) for r, i in enumerate(picked)],
+        }
+
+    def rank(self, codes, metric="momentum", markets=None, lookback=None):
+        """주어진 종목들이 같은 시장(또는 markets) 안에서 지표 기준 몇 위인지 (1위 = 기본 정렬의 맨 앞)"""
+        self._ensure()
+        default_lookback, ascending = METRICS.get(metric, (20, False))
+        lookback = lookback or default_lookback
+        values = self._metric(metric, lookback)
+        valid = np.isfinite(values) & ~np.isnan(self.close[:, -1])
+
+        results = []
+        for code in codes:
+            i = self._rows.get(str(code).upper())
+            if i is None or not valid[i]:
+                results.append({"code": code, "error": "행렬에 없거나 시세가 없는 종목"})
+                continue
+            peers = valid & (np.isin(self._markets, [m.upper() for m in markets])
+                             if markets else self._markets == self._markets[i])
+            better = values[peers] < values[i] if ascending else values[peers] > values[i]
+            total = int(peers.sum())
+            rank = int(better.sum()) + 1
+            results.append(dict(self._row_info(i, values[i]), rank=rank, of=total,
+                                percentile=round(100.0 * (total - rank) / max(1, total - 1), 2)))
+        return {"metric": metric, "lookback": lookback, "as_of": str(self.dates[-1]), "results": results}
+
+    def correlation(self, codes, lookback=60):
+        """종목들의 일간 로그수익률 상관계수 행렬 (기간 안에 시세가 빈 종목은 제외)"""
+        self._ensure()
+        rows, used, missing = [], [], []
+        for code in codes:
+            i = self._rows.get(str(code).upper())
+            if i is None or np.isnan(self.close[i, -(lookback + 1)]):
+                missing.append(code)
+                continue
+            rows.append(i)
+            used.append(self.symbols[i])
+
+        if len(rows) < 2:
+            return {"lookback": lookback, "symbols": used, "matrix": [], "missing": missing}
+        window = np.asarray(self.close[rows, -(lookback + 1):], dtype=np.float64)
+        returns = np.diff(np.log(window), axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = np.corrcoef(returns)
+        corr = np.where(np.isfinite(corr), corr, 0.0).round(4)
+        return {"lookback": lookback, "as_of": str(self.dates[-1]),
+                "symbols": [{"code": s["code"], "name": s["name"]} for s in used],
+                "matrix": corr.tolist(), "missing": missing}
+
+    def stats(self):
+        try:
+            self._ensure()
+        except (FileNotFoundError, ValueError) as e:
+            return {"ready": False, "message": str(e)}
+        return {"ready": True, "symbols": int(self.close.shape[0]), "days": int(self.close.shape[1]),
+                "as_of": str(self.dates[-1]), "built_at": self.built_at}
+
+
+MATRIX = PriceMatrix()
+
+
+if __name__ == "__main__":
+    sys.stdout.reconfigure(encoding='utf-8')
+
+    parser = argparse.ArgumentParser(description="전 종목 종가/거래량 메모리 매핑 행렬 빌드")
+    parser.add_argument("--markets", default="", help="KOSPI,KOSDAQ,NASDAQ 중 선택 (기본: 전체)")
+    parser.add_argument("--limit", type=int, default=None, help="앞에서부터 N개 종목만")
+    parser.add_argument("--days", type=int, default=DAYS, help="날짜 축 길이 (영업일)")
+    args = parser.parse_args()
+
+    build(markets=[m.strip() for m in args.markets.split(",") if m.strip()] or None,
+          limit=args.limit, days=args.days)
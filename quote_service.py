@@ -0,0 +1,167 @@
+import time
+import threading
+from collections import OrderedDict, deque
+
+# =========================================================
+# ⚡ 실시간 시세 공유 캐시 + 일괄 폴링
+# =========================================================
+# - 종목별로 ttl(기본 1초) 동안 같은 시세를 모든 호출자가 나눠 씁니다.
+# - 같은 종목을 동시에 요청하면 HTTP는 한 번만 나가고 나머지는 그 결과를 기다립니다(coalesced).
+# - 캐시에 없는 종목들은 출처(route)별로 묶어서 fetcher 한 번으로 일괄 조회합니다.
+#   fetcher(codes) -> {code: 시세 dict 또는 None}
+# - shared(cache_backend.shared_cache)를 주면 받은 시세를 워커 공용 캐시에도 써 두고,
+#   로컬에 없는 종목은 HTTP 전에 다른 워커가 받아 둔 시세부터 찾아 씁니다 (shared_hits).
+# - stats()로 적중률, 출처별 조회 지연(p50/p95/max), 내보낸 시세의 신선도(나이)를 확인할 수 있습니다.
+LATENCY_WINDOW = 256
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class QuoteService:
+    def __init__(self, route, fetchers, ttl=1.0, maxsize=4096, wait_timeout=10.0, shared=None):
+        self.route = route
+        self.fetchers = fetchers
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.wait_timeout = wait_timeout
+        self.shared = shared
+        self._quotes = OrderedDict()  # code -> (fetched_at, quote)
+        self._inflight = {}  # code -> _Flight
+        self._lock = threading.Lock()
+        self._latency = {source: deque(maxlen=LATENCY_WINDOW) for source in fetchers}
+        self._ages = deque(maxlen=LATENCY_WINDOW)
+        self.counters = {"hits": 0, "misses": 0, "coalesced": 0, "shared_hits": 0, "fetches": 0, "fetched_symbols": 0, "errors": 0}
+
+    def get(self, code):
+        return self.get_many([code]).get(str(code).strip())
+
+    def get_many(self, codes):
+        """여러 종목 시세를 한 번에 조회 (신선한 캐시 -> 진행 중인 조회 합류 -> 출처별 일괄 조회)"""
+        codes = list(dict.fromkeys(str(c).strip() for c in codes))
+        now = time.time()
+        result, waiting, claimed = {}, {}, {}
+
+        with self._lock:
+            for code in codes:
+                item = self._quotes.get(code)
+                if item is not None and now - item[0] < self.ttl:
+                    self.counters["hits"] += 1
+                    self._ages.append(now - item[0])
+                    result[code] = item[1]
+                elif code in self._inflight:
+                    self.counters["coalesced"] += 1
+                    waiting[code] = self._inflight[code]
+                else:
+                    self.counters["misses"] += 1
+                    claimed[code] = self._inflight[code] = _Flight()
+
+        if claimed and self.shared is not None:
+            self._adopt_shared(claimed, result)
+        if claimed:
+            self._fetch(claimed)
+
+        for code in claimed:
+            result[code] = self._peek(code)
+        for code, flight in waiting.items():
+            flight.done.wait(self.wait_timeout)
+            result[code] = self._peek(code)
+        return {code: result.get(code) for code in codes}
+
+    def _adopt_shared(self, claimed, result):
+        """다른 워커가 ttl 안에 받아 둔 시세는 HTTP 없이 가져오고, 해당 종목의 대기자도 바로 깨웁니다."""
+        try:
+            found = self.shared.get_many(list(claimed))
+        except Exception as e:
+            print(f"   ⚠️ [Quotes] 공유 캐시 조회 실패: {e}")
+            return
+        now = time.time()
+        with self._lock:
+            for code, item in found.items():
+                if now - item[0] >= self.ttl:
+                    continue
+                self._quotes[code] = item
+                self._quotes.move_to_end(code)
+                self._ages.append(now - item[0])
+                self.counters["shared_hits"] += 1
+                result[code] = item[1]
+                self._inflight.pop(code, None)
+                claimed.pop(code).done.set()
+
+    def _peek(self, code):
+        item = self._quotes.get(code)
+        return item[1] if item is not None else None
+
+    def _fetch(self, claimed):
+        by_source = {}
+        for code in claimed:
+            by_source.setdefault(self.route(code), []).append(code)
+
+        try:
+            for source, codes in by_source.items():
+                started = time.monotonic()
+                try:
+                    fetched = self.fetchers[source](codes) or {}
+                except Exception as e:
+                    print(f"   ⚠️ [Quotes] {source} 일괄 시세 조회 실패: {e}")
+                    fetched = {}
+                    self.counters["errors"] += 1
+                elapsed = time.monotonic() - started
+
+                fetched_at = time.time()
+                with self._lock:
+                    self._latency[source].append(elapsed)
+                    self.counters["fetches"] += 1
+                    self.counters["fetched_symbols"] += len(codes)
+                    for code in codes:
+                        quote = fetched.get(code)
+                        if quote is None:
+                            # 실패한 종목은 예전 시세를 지우지 않고 다음 호출에서 다시 시도합니다.
+                            continue
+                        self._quotes[code] = (fetched_at, quote)
+                        self._quotes.move_to_end(code)
+                    while len(self._quotes) > self.maxsize:
+                        self._quotes.popitem(last=False)
+                if self.shared is not None:
+                    self._publish({code: (fetched_at, fetched[code]) for code in codes if fetched.get(code) is not None})
+        finally:
+            with self._lock:
+                for code, flight in claimed.items():
+                    self._inflight.pop(code, None)
+                    flight.done.set()
+
+    def _publish(self, items):
+        try:
+            self.shared.set_many(items, ttl=self.ttl)
+        except Exception as e:
+            print(f"   ⚠️ [Quotes] 공유 캐시 저장 실패: {e}")
+
+    def stats(self):
+        with self._lock:
+            # misses는 로컬 캐시 미스 수이며, 그중 공유 캐시에서 찾은 종목(shared_hits)은 적중으로 칩니다.
+            lookups = self.counters["hits"] + self.counters["misses"] + self.counters["coalesced"]
+            served = self.counters["hits"] + self.counters["coalesced"] + self.counters["shared_hits"]
+            now = time.time()
+            return dict(
+                self.counters,
+                cached=len(self._quotes),
+                hit_ratio=(served / lookups) if lookups else 0.0,
+                served_age=_summary(self._ages),
+                oldest_cached_age=max((now - t for t, _ in self._quotes.values()), default=0.0),
+                latency={source: _summary(samples) for source, samples in self._latency.items()},
+            )
+
+
+def _summary(samples):
+    """최근 표본의 p50/p95/max (초)"""
+    if not samples:
+        return {"count": 0, "p50": 0.0, "p95": 0.0, "max": 0.0}
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "p50": ordered[len(ordered) // 2],
+        "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "max": ordered[-1],
+    }
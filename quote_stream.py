@@ -0,0 +1,140 @@
+import json
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+
+# =========================================================
+# 📡 실시간 시세 스트리밍 허브 (SSE 구독자 팬아웃)
+# =========================================================
+# - 구독된 종목마다 업스트림 폴러(asyncio 태스크)는 딱 하나: 클라이언트가 몇 명이든 HTTP 부하는 종목 수에 비례합니다.
+# - 폴러는 공유 시세 캐시(data_collector.QUOTES, 네이버/야후 Method 체인)를 POLL_INTERVAL마다 읽고,
+#   이전 값과 달라진 필드만 delta로 모든 구독자에게 나눠 줍니다. 새 구독자는 먼저 전체 snapshot을 받습니다.
+# - 구독자별 큐가 QUEUE_SIZE를 넘도록 못 따라오면(backpressure) 그 구독자만 'dropped'로 끊습니다.
+# - 구독자가 모두 떠난 종목의 폴러는 스스로 종료합니다.
+POLL_INTERVAL = 1.0
+QUEUE_SIZE = 64
+KEEPALIVE = 15.0
+
+_DROPPED = {"type": "dropped", "reason": "slow consumer"}
+
+
+class Subscription:
+    def __init__(self, hub, codes):
+        self.hub = hub
+        self.codes = codes
+        self.queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+        self.dropped = False
+
+    def offer(self, message):
+        """논블로킹 전달: 큐가 가득 찬 느린 구독자는 비우고 끊김 알림 하나만 남깁니다."""
+        if self.dropped:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.dropped = True
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(_DROPPED)
+            self.hub.counters["dropped_consumers"] += 1
+            self.hub.unsubscribe(self)
+
+    async def next(self, timeout=None):
+        return await asyncio.wait_for(self.queue.get(), timeout)
+
+
+class QuoteHub:
+    def __init__(self, fetch_quote, interval=POLL_INTERVAL, max_workers=16):
+        self.fetch_quote = fetch_quote
+        self.interval = interval
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="quote-poller")
+        self._subscribers = {}  # code -> set(Subscription)
+        self._pollers = {}  # code -> asyncio.Task
+        self._last = {}  # code -> 마지막으로 보낸 전체 시세
+        self._seq = {}
+        self.counters = {"polls": 0, "updates": 0, "messages": 0, "dropped_consumers": 0, "errors": 0}
+
+    def subscribe(self, codes):
+        codes = list(dict.fromkeys(str(c).strip() for c in codes if str(c).strip()))
+        sub = Subscription(self, codes)
+        for code in codes:
+            self._subscribers.setdefault(code, set()).add(sub)
+            if code in self._last:
+                sub.offer(self._message("snapshot", code, self._last[code]))
+            if code not in self._pollers or self._pollers[code].done():
+                # 폴러는 여러 구독자가 공유하므로 처음 구독한 요청의 문맥을 물려받지 않습니다.
+                self._pollers[code] = asyncio.get_running_loop().create_task(
+                    self._poll(code), context=contextvars.Context())
+        return sub
+
+    def unsubscribe(self, sub):
+        for code in sub.codes:
+            subscribers = self._subscribers.get(code)
+            if subscribers is not None:
+                subscribers.discard(sub)
+
+    def _message(self, kind, code, fields):
+        return {"type": kind, "code": code, "seq": self._seq.get(code, 0), **fields}
+
+    async def _poll(self, code):
+        loop = asyncio.get_running_loop()
+        while self._subscribers.get(code):
+            try:
+                quote = await loop.run_in_executor(self._pool, self.fetch_quote, code)
+                self.counters["polls"] += 1
+            except Exception as e:
+                print(f"   ⚠️ [Stream] {code} 시세 폴링 실패: {e}")
+                self.counters["errors"] += 1
+                quote = None
+
+            if quote:
+                self._publish(code, quote)
+            await asyncio.sleep(self.interval)
+
+        # 구독자가 없으면 폴러와 마지막 값을 정리합니다.
+        self._subscribers.pop(code, None)
+        self._pollers.pop(code, None)
+        self._last.pop(code, None)
+        self._seq.pop(code, None)
+
+    def _publish(self, code, quote):
+        previous = self._last.get(code)
+        if previous is None:
+            kind, fields = "snapshot", dict(quote)
+        else:
+            kind, fields = "delta", {k: v for k, v in quote.items() if previous.get(k) != v}
+            if not fields:
+                return
+
+        self._last[code] = dict(quote)
+        self._seq[code] = self._seq.get(code, 0) + 1
+        self.counters["updates"] += 1
+
+        message = self._message(kind, code, fields)
+        for sub in list(self._subscribers.get(code, ())):
+            sub.offer(message)
+            self.counters["messages"] += 1
+
+    async def sse(self, codes):
+        """Server-Sent Events 스트림 제너레이터 (StreamingResponse에 그대로 넘기면 됩니다)"""
+        sub = self.subscribe(codes)
+        try:
+            yield f"event: subscribed\ndata: {json.dumps({'codes': sub.codes})}\n\n"
+            while True:
+                try:
+                    message = await sub.next(timeout=KEEPALIVE)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"event: {message['type']}\ndata: {json.dumps(message, ensure_ascii=False)}\n\n"
+                if message is _DROPPED:
+                    return
+        finally:
+            self.unsubscribe(sub)
+
+    def stats(self):
+        return dict(
+            self.counters,
+            symbols=len(self._pollers),
+            subscribers=sum(len(s) for s in self._subscribers.values()),
+        )
@@ -0,0 +1,57 @@
+import time
+import asyncio
+import threading
+
+# =========================================================
+# 🪣 토큰 버킷 레이트 리미터 (스레드/asyncio 공용)
+# =========================================================
+# rate(초당 토큰)만큼 채워지고 capacity까지만 쌓이는 버킷입니다.
+# 토큰이 없으면 다음 토큰이 생길 시각을 '예약'하고 그때까지 기다리므로 먼저 온 요청이 먼저 나갑니다.
+# 기다려야 할 시간이 timeout을 넘으면 예약하지 않고 바로 False를 돌려줘서 호출자가 대체 경로를 탈 수 있습니다.
+
+
+class TokenBucket:
+    def __init__(self, rate, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self.counters = {"granted": 0, "rejected": 0}
+
+    def _reserve(self, timeout):
+        """토큰 하나를 예약하고 기다릴 시간(초)을 반환, timeout 안에 못 받으면 None"""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+            wait = 0.0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+            if timeout is not None and wait > timeout:
+                self.counters["rejected"] += 1
+                return None
+
+            # 음수까지 내려가는 건 뒤에 줄 선 예약분입니다.
+            self._tokens -= 1
+            self.counters["granted"] += 1
+            return wait
+
+    def acquire(self, timeout=None):
+        wait = self._reserve(timeout)
+        if wait is None:
+            return False
+        if wait > 0:
+            time.sleep(wait)
+        return True
+
+    async def acquire_async(self, timeout=None):
+        wait = self._reserve(timeout)
+        if wait is None:
+            return False
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return True
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters, tokens=round(self._tokens, 3), rate=self.rate, capacity=self.capacity)
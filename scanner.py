@@ -0,0 +1,120 @@
+import sys
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+
+import backtest
+import data_collector
+import stock_utils
+import strategy
+
+# =========================================================
+# 🛰️ 전 종목 기술적 신호 스캐너 (LLM 미사용)
+# =========================================================
+# 마스터 파일의 KOSPI/KOSDAQ/NASDAQ 전 종목을 CHUNK_SIZE개씩 묶어 일괄 다운로드(로컬 일봉 저장소 경유)하고,
+# 묶음마다 (날짜, 종목) 패널을 만들어 프로세스 풀에서 strategy 신호 커널로 마지막 봉 신호만 뽑아냅니다.
+STRATEGIES = ("volatility", "goldencross", "rsi_bollinger")
+CHUNK_SIZE = 200
+DOWNLOAD_WORKERS = 4
+PERIOD = "6mo"  # 20일 볼린저/RSI/골든크로스 판단에 충분한 기간
+
+_YAHOO_SUFFIX = {"KOSPI": ".KS", "KOSDAQ": ".KQ"}
+
+
+def yahoo_symbol(item):
+    """마스터 종목 정보 -> 야후 심볼 (코스닥은 .KQ)"""
+    suffix = _YAHOO_SUFFIX.get(item["market"])
+    return f"{item['code']}{suffix}" if suffix else str(item["code"]).upper()
+
+
+def _evaluate_chunk(task):
+    """프로세스 풀 작업 단위: 한 묶음 패널에 대해 전략별 마지막 봉 신호 계산"""
+    symbols, panel, strategies = task
+    # 국내/미국 종목이 섞인 묶음도 종목마다 자기 거래일만으로 계산합니다.
+    panel, _ = backtest.pack_valid(panel)
+    close = panel["close"]
+
+    # 정렬 후에는 모든 종목의 마지막 유효 종가가 마지막 행에 있습니다 (데이터가 없는 종목은 NaN)
+    valid = ~np.isnan(close)
+    last_row = np.full(close.shape[1], len(close) - 1)
+    last_close = close[last_row, np.arange(close.shape[1])]
+
+    hits = []
+    for strategy_type in strategies:
+        signals = strategy.compute_signals(strategy_type, panel["open"], panel["high"], panel["low"], close)
+        last_signals = signals[last_row, np.arange(close.shape[1])]
+        for i in np.flatnonzero(last_signals != strategy.HOLD):
+            if not valid[:, i].any():
+                continue
+            hits.append({
+                "symbol": symbols[i],
+                "strategy": strategy_type,
+                "signal": "buy" if last_signals[i] == strategy.BUY else "sell",
+                "close": float(last_close[i]),
+            })
+    return hits
+
+
+def _load_chunk(items):
+    symbols = [yahoo_symbol(item) for item in items]
+    charts = data_collector.get_yahoo_charts(symbols, period=PERIOD)
+    _, loaded, panel = backtest.panel_from_frames(charts)
+    return loaded, panel
+
+
+def scan(strategies=STRATEGIES, markets=None, limit=None, max_workers=None):
+    """
+    전 종목 스캔 후 매수/매도 신호가 나온 종목 리스트 반환
+    반환: {'scanned': 스캔 종목 수, 'elapsed': 초, 'signals': [{'code', 'name', 'market', 'strategy', 'signal', 'close'}]}
+    """
+    started = time.perf_counter()
+    universe = stock_utils.get_universe(markets)
+    if limit:
+        universe = universe[:limit]
+    by_symbol = {yahoo_symbol(item): item for item in universe}
+    chunks = [universe[i:i + CHUNK_SIZE] for i in range(0, len(universe), CHUNK_SIZE)]
+
+    print(f"🛰️ [Scanner] {len(universe)}개 종목 / {len(chunks)}개 묶음 스캔 시작 ({', '.join(strategies)})")
+
+    signals = []
+    scanned = 0
+    # 다운로드(I/O)는 스레드로, 신호 계산(CPU)은 프로세스 풀로 겹쳐서 진행합니다.
+    with ThreadPoolExecutor(max_workers=DOWNLOAD_WORKERS) as io_pool, \
+            ProcessPoolExecutor(max_workers=max_workers) as cpu_pool:
+        evaluations = []
+        for loaded, panel in io_pool.map(_load_chunk, chunks):
+            if not loaded:
+                continue
+            scanned += len(loaded)
+            evaluations.append(cpu_pool.submit(_evaluate_chunk, (loaded, panel, tuple(strategies))))
+
+        for future in evaluations:
+            for hit in future.result():
+                item = by_symbol[hit.pop("symbol")]
+                signals.append({"code": item["code"], "name": item["name"], "market": item["market"], **hit})
+
+    elapsed = time.perf_counter() - started
+    print(f"✅ [Scanner] {scanned}개 종목 스캔 완료, 신호 {len(signals)}건 ({elapsed:.1f}s)")
+    return {"scanned": scanned, "elapsed": round(elapsed, 3), "signals": signals}
+
+
+if __name__ == "__main__":
+    sys.stdout.reconfigure(encoding='utf-8')
+
+    parser = argparse.ArgumentParser(description="전 종목 기술적 신호 스캐너")
+    parser.add_argument("--strategies", default=",".join(STRATEGIES), help="쉼표로 구분한 전략 목록")
+    parser.add_argument("--markets", default="", help="KOSPI,KOSDAQ,NASDAQ 중 선택 (기본: 전체)")
+    parser.add_argument("--limit", type=int, default=None, help="앞에서부터 N개 종목만 스캔")
+    parser.add_argument("--workers", type=int, default=None, help="프로세스 풀 크기")
+    args = parser.parse_args()
+
+    result = scan(
+        strategies=[s.strip() for s in args.strategies.split(",") if s.strip()],
+        markets=[m.strip() for m in args.markets.split(",") if m.strip()] or None,
+        limit=args.limit,
+        max_workers=args.workers,
+    )
+    for hit in result["signals"]:
+        print(f"   {hit['signal'].upper():4} | {hit['strategy']:13} | {hit['name']}({hit['code']}) {hit['close']:,.2f}")
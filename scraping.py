@@ -0,0 +1,181 @@
+import re
+from io import BytesIO
+
+from lxml import etree, html
+
+# =========================================================
+# 🧽 네이버/RSS 전용 고속 파서 (lxml XPath + RSS iterparse)
+# =========================================================
+# BeautifulSoup 전체 트리 대신 lxml C 파서로 읽고, 미리 컴파일한 XPath로 필요한 노드만 꺼냅니다.
+# RSS는 iterparse로 <item>이 끝날 때마다 제목을 읽고 limit개를 채우면 나머지 문서는 읽지 않습니다.
+# 각 함수의 결과는 기존 BeautifulSoup 셀렉터 코드와 같습니다 (python scraping.py 로 비교/벤치마크).
+
+
+def _has_class(name):
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+# 기존 CSS 셀렉터와 1:1로 대응하는 XPath (결과는 문서 순서)
+_PRICE = etree.XPath(f"(//*[{_has_class('no_today')}]//*[{_has_class('blind')}])[1]")           # .no_today .blind
+_EXDAY = etree.XPath(f"(//*[{_has_class('no_exday')}])[1]")                                      # .no_exday
+_ICO_DOWN = etree.XPath(f"boolean(//*[{_has_class('ico_down')}])")                               # .ico_down
+_VOLUME = etree.XPath(f"(//*[{_has_class('no_info')}]//*[{_has_class('blind')}])[1]")            # .no_info .blind
+_NEWS_TITLES = etree.XPath(f"//a[{_has_class('tit')}]")                                          # a.tit
+_TOP_STOCKS = etree.XPath(f"//table[{_has_class('type_5')}]//tr//a[{_has_class('tltle')}]")     # table.type_5 tr a.tltle
+
+_RATE = re.compile(r'([+-]?\d+\.\d+)%')
+_PARSERS = {}
+
+
+def _document(content, encoding=None):
+    """bytes는 지정한 인코딩으로 바로 파싱 (str 디코딩 단계 생략)"""
+    if isinstance(content, str):
+        return html.document_fromstring(content)
+    parser = _PARSERS.get(encoding)
+    if parser is None:
+        parser = _PARSERS[encoding] = html.HTMLParser(encoding=encoding)
+    return html.document_fromstring(content, parser=parser)
+
+
+def parse_naver_price(content, encoding=None):
+    """네이버 종목 메인 페이지(Method B)에서 현재가/등락률/거래량 추출, 가격이 없으면 None"""
+    doc = _document(content, encoding)
+
+    no_today = _PRICE(doc)
+    if not no_today:
+        return None
+    price = int(no_today[0].text_content().replace(',', ''))
+
+    rate = 0.0
+    exday = _EXDAY(doc)
+    if exday:
+        match = _RATE.search(exday[0].text_content().strip())
+        if match:
+            rate = float(match.group(1))
+            if _ICO_DOWN(doc) and rate > 0:
+                rate = -rate
+
+    vol = 0
+    vol_tag = _VOLUME(doc)
+    if vol_tag:
+        vol = int(vol_tag[0].text_content().replace(',', ''))
+
+    return {'price': price, 'rate': rate, 'vol': vol}
+
+
+def parse_naver_news(content, limit=5, encoding="euc-kr"):
+    """네이버 종목 뉴스 목록(a.tit)의 제목 limit개"""
+    news_list = []
+    for link in _NEWS_TITLES(_document(content, encoding))[:limit]:
+        title = link.text_content().strip()
+        if title:
+            news_list.append(title)
+    return news_list
+
+
+def parse_top_stocks(content, limit=20, encoding=None):
+    """네이버 검색 상위 종목 표(table.type_5 a.tltle)의 종목명 limit개"""
+    return [a.text_content() for a in _TOP_STOCKS(_document(content, encoding))[:limit]]
+
+
+def parse_rss_titles(content, limit=5):
+    """RSS <item><title>을 앞에서부터 limit개만 읽고 파싱을 멈춥니다."""
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+
+    titles = []
+    for _, item in etree.iterparse(BytesIO(content), events=("end",), tag="item"):
+        title = item.findtext("title")
+        if title:
+            titles.append(title)
+        if len(titles) >= limit:
+            break
+        item.clear()
+    return titles
+
+
+# =========================================================
+# ⏱️ 기존 BeautifulSoup 경로와의 결과 비교 + 마이크로 벤치마크
+# =========================================================
+def _sample_pages(filler=400):
+    """네이버/구글 RSS 페이지 구조를 흉내 낸 합성 문서 (실제 페이지와 비슷한 크기가 되도록 filler 행 추가)"""
+    rows = "".join(f"<tr><td class='num'>{i:,}</td><td><span class='blind'>{i}</span></td></tr>" for i in range(filler))
+    price_page = f"""<html><head><meta charset="euc-kr"></head><body>
+        <table>{rows}</table>
+        <div class="rate_info"><div class="today"><p class="no_today"><em class="no_down">
+            <span class="blind">71,300</span></em></p>
+        <p class="no_exday"><em class="no_down"><span class="ico down">하락</span><span class="ico_down"></span>
+            <span class="blind">1,200</span></em> <em class="no_down"><span class="blind">-1.66</span>%</em>
+            <span>전일대비 -1.66%</span></p></div>
+        <table class="no_info"><tr><td><span class="blind">12,345,678</span></td></tr></table></div>
+        <table>{rows}</table></body></html>"""
+    news_page = "<html><body><table>" + "".join(
+        f"<tr><td class='title'><a class='tit' href='/n/{i}'> 삼성전자 뉴스 {i} </a></td>"
+        f"<td class='info'>언론사</td><td class='date'>2026.10.18</td></tr>" for i in range(20)) + rows + "</table></body></html>"
+    top_page = "<html><body><table class='type_5'>" + "".join(
+        f"<tr><td class='no'>{i}</td><td><a class='tltle' href='/item/main.naver?code={i:06d}'>종목{i}</a></td>"
+        f"<td class='number'>{i * 100:,}</td></tr>" for i in range(30)) + rows + "</table></body></html>"
+    rss = ("<?xml version='1.0' encoding='UTF-8'?><rss><channel><title>feed</title>" + "".join(
+        f"<item><title>TSLA headline {i} - Reuters</title><link>https://example.com/{i}</link>"
+        f"<description>{'lorem ipsum ' * 40}</description><pubDate>Sun, 18 Oct 2026</pubDate></item>"
+        for i in range(100)) + "</channel></rss>")
+    return price_page, news_page, top_page, rss
+
+
+def _bs4_reference(price_page, news_page, top_page, rss):
+    """기존 코드와 같은 BeautifulSoup/ElementTree 추출 (비교 기준)"""
+    import xml.etree.ElementTree as ET
+    from bs4 import BeautifulSoup
+
+    def price():
+        soup = BeautifulSoup(price_page, 'html.parser')
+        no_today = soup.select_one('.no_today .blind')
+        rate = 0.0
+        exday = soup.select_one('.no_exday')
+        if exday:
+            match = re.search(r'([+-]?\d+\.\d+)%', exday.get_text().strip())
+            if match:
+                rate = float(match.group(1))
+                if soup.select_one('.ico_down') and rate > 0:
+                    rate = -rate
+        vol_tag = soup.select_one('.no_info .blind')
+        return {'price': int(no_today.text.replace(',', '')), 'rate': rate,
+                'vol': int(vol_tag.get_text().replace(',', '')) if vol_tag else 0}
+
+    def news():
+        soup = BeautifulSoup(news_page, 'html.parser')
+        return [t for t in (link.get_text().strip() for link in soup.select('a.tit')[:5]) if t]
+
+    def top():
+        soup = BeautifulSoup(top_page, "lxml")
+        return [item.text for item in soup.select("table.type_5 tr a.tltle")[:20]]
+
+    def feed():
+        root = ET.fromstring(rss)
+        return [t for t in (item.find("title").text for item in root.findall(".//item")[:5]) if t]
+
+    return {"price": price, "news": news, "top_stocks": top, "rss": feed}
+
+
+def benchmark(number=50):
+    import timeit
+
+    price_page, news_page, top_page, rss = _sample_pages()
+    reference = _bs4_reference(price_page, news_page, top_page, rss)
+    fast = {
+        "price": lambda: parse_naver_price(price_page),
+        "news": lambda: parse_naver_news(news_page),
+        "top_stocks": lambda: parse_top_stocks(top_page),
+        "rss": lambda: parse_rss_titles(rss),
+    }
+
+    print(f"{'파서':<12}{'일치':>6}{'기존(ms)':>12}{'lxml(ms)':>12}{'배속':>8}")
+    for name in fast:
+        same = reference[name]() == fast[name]()
+        old = timeit.timeit(reference[name], number=number) / number * 1000
+        new = timeit.timeit(fast[name], number=number) / number * 1000
+        print(f"{name:<12}{'O' if same else 'X':>6}{old:>12.3f}{new:>12.3f}{old / new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    benchmark()
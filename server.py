@@ -1,15 +1,34 @@
-import math
-import requests
-from bs4 import BeautifulSoup
-from fastapi import FastAPI
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from fastapi import FastAPI, Header, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 
-from ai_brain import get_ai_decision
+import ai_brain
+from ai_brain import get_ai_decision, aget_ai_decision
+import chart_store
 import data_collector
+import indicators
+import intraday_bars
+import live_indicators
+import metrics
+import paper_trading
+import price_matrix
+import quote_stream
+import scanner
+import top_stocks
 import stock_utils
+from strategy import get_strategy_signal
 
 app = FastAPI()
 
+# /analyze_batch의 종목별 AI 판단을 동시에 넘기는 풀: 동시에 들어온 판단은 ai_brain의 마이크로 배처가 한 프롬프트로 묶습니다.
+_DECISION_POOL = ThreadPoolExecutor(max_workers=ai_brain.BATCH_MAX_SIZE * 4, thread_name_prefix="batch-ai")
+
+# 구독된 종목마다 업스트림 폴러 하나만 두고 모든 SSE 구독자에게 나눠 주는 시세 허브
+QUOTE_HUB = quote_stream.QuoteHub(data_collector.get_realtime_quote)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -19,30 +38,134 @@ app.add_middleware(
 )
 
 
-@app.get("/analyze")
-def analyze_stock(ticker: str, strategy: str = "volatility"):
-    stock_code, stock_name = stock_utils.get_stock_info(ticker)
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """
+    엔드포인트별 응답 시간을 기록하고, 요청 헤더에 X-Trace: 1이 있으면
+    그 요청에서 잰 구간별 시간(마스터 조회, 차트, 실시간, 뉴스, 지표, 전략, LLM, 캐시)을 응답 헤더로 돌려줍니다.
+    """
+    tracing = request.headers.get("x-trace") == "1"
+    token = metrics.start_trace() if tracing else None
+    started = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        elapsed = time.perf_counter() - started
+        # 라벨은 실제 URL이 아니라 매칭된 라우트 경로(예: /analyze)로 붙여서, 아무 경로나 찔러도 시계열이 늘지 않게 합니다.
+        route = request.scope.get("route")
+        metrics.observe_request(route.path if route is not None else "unmatched", elapsed)
+        trace = metrics.end_trace(token) if tracing else None
+
+    if tracing:
+        response.headers["Server-Timing"] = metrics.server_timing(trace + [("total", elapsed)])
+        response.headers["X-Trace-Stages"] = json.dumps(
+            [{"stage": stage, "ms": round(seconds * 1000, 2)} for stage, seconds in trace])
+    return response
+
+
+def _resolve_symbol(ticker):
+    """마스터 사전으로 종목을 찾아 (종목코드, 종목명, 야후 티커)를 반환"""
+    with metrics.span("master_lookup"):
+        stock_code, stock_name = stock_utils.get_stock_info(ticker)
 
     if not stock_code:
-        return {"status": "error", "message": f"'{ticker}' 종목을 찾을 수 없습니다."}
+        return None, None, None
 
     # 💡 마스터 사전을 거쳐 나온 '주식코드(stock_code)'를 기준으로 국내/해외 판별!
-    clean_code = str(stock_code).strip()
+    # 🇰🇷 국내 주식이면 6자리 숫자이므로 .KS 접미사 부착, 🇺🇸 미국 주식이면 대문자화 (TSLA, NVDA 등)
+    yahoo_ticker = data_collector.to_yahoo_ticker(stock_code)
+    return stock_code, stock_name, yahoo_ticker
 
-    if clean_code.isdigit() and len(clean_code) == 6:
-        # 🇰🇷 국내 주식이면 6자리 숫자이므로 .KS 접미사 부착
-        yahoo_ticker = f"{clean_code}.KS"
-    else:
-        # 🇺🇸 미국 주식이면 영문 티커이므로 그대로 대문자화 (TSLA, NVDA 등)
-        yahoo_ticker = clean_code.upper()
+
+@app.get("/analyze")
+async def analyze_stock(ticker: str, strategy: str = "volatility"):
+    stock_code, stock_name, yahoo_ticker = _resolve_symbol(ticker)
+
+    if not stock_code:
+        return {"status": "error", "message": f"'{ticker}' 종목을 찾을 수 없습니다."}
 
     print(f"\n🚀 [{stock_name}({stock_code})] 하이브리드 분석 시작...")
     print(f"   🎯 최종 결정된 야후 차트 심볼: {yahoo_ticker}")
 
-    # 구별된 yahoo_ticker와 stock_code가 각각의 수집 엔진으로 전달됩니다.
-    df = data_collector.get_yahoo_chart(yahoo_ticker)
-    realtime_data = data_collector.get_naver_realtime(stock_code)
-    news_titles = data_collector.get_naver_news(stock_code)
+    # 구별된 yahoo_ticker와 stock_code가 각각의 수집 엔진으로 동시에 전달됩니다.
+    # 수집과 AI 판단 모두 await로 기다리므로 느린 LLM 호출이 워커 스레드를 붙잡지 않습니다.
+    collected = await data_collector.collect_all_async(yahoo_ticker, stock_code)
+    context = _analysis_context(collected)
+    if "status" in context:
+        return context
+
+    print("🤖 Gemini AI 종합 판단 요청 중...")
+    ai_result = await aget_ai_decision(
+        ticker=stock_name,
+        df=context["df"],
+        news_summary=context["news_summary"],
+        strategy_type=strategy
+    )
+    return _analysis_response(stock_code, stock_name, context, ai_result)
+
+
+@app.get("/analyze_batch")
+def analyze_batch(tickers: str, strategy: str = "volatility", max_workers: int = 8):
+    """
+    쉼표로 구분된 여러 종목을 한 번에 분석 (예: tickers=삼성전자,SK하이닉스,TSLA)
+    차트는 일괄 다운로드하고, 수집이 끝난 종목은 곧바로 AI 판단을 넘깁니다.
+    동시에 넘어간 판단은 마이크로 배처가 여러 종목씩 한 프롬프트로 묶고(캐시/중복 요청 합치기/마감 시간 포함),
+    종목별 결과는 판단이 끝나는 즉시 NDJSON 한 줄씩 흘려보냅니다.
+    """
+    names = [t.strip() for t in tickers.split(",") if t.strip()]
+
+    def stream():
+        targets = []
+        names_by_code = {}
+        for name in names:
+            stock_code, stock_name, yahoo_ticker = _resolve_symbol(name)
+            if not stock_code:
+                yield _ndjson({"status": "error", "message": f"'{name}' 종목을 찾을 수 없습니다."})
+                continue
+            names_by_code[str(stock_code).strip()] = stock_name
+            targets.append((yahoo_ticker, stock_code))
+
+        # 동시 수집 개수는 호출자가 정하되 서버 수집 풀 크기를 넘지 않게 묶습니다.
+        workers = max(1, min(max_workers, data_collector.COLLECT_WORKERS))
+        print(f"\n🚀 [Batch] {len(targets)}개 종목 일괄 분석 시작...")
+        pending = {}  # AI 판단 Future -> (종목코드, 종목명, 문맥)
+        for stock_code, collected in data_collector.collect_batch(targets, max_workers=workers):
+            context = _analysis_context(collected)
+            if "status" in context:
+                yield _ndjson(dict(context, code=stock_code))
+                continue
+            stock_name = names_by_code.get(stock_code, stock_code)
+            future = _DECISION_POOL.submit(get_ai_decision, ticker=stock_name, df=context["df"],
+                                           news_summary=context["news_summary"], strategy_type=strategy)
+            pending[future] = (stock_code, stock_name, context)
+            # 다른 종목을 수집하는 사이에 끝난 판단은 기다리지 않고 바로 내보냅니다.
+            yield from _finished_analyses(pending, [f for f in pending if f.done()])
+
+        yield from _finished_analyses(pending, as_completed(list(pending)))
+
+    return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+
+def _finished_analyses(pending, futures):
+    """끝난 AI 판단 Future들을 응답 줄로 바꿔 내보내고 pending에서 뺍니다."""
+    for future in futures:
+        stock_code, stock_name, context = pending.pop(future)
+        try:
+            result = _analysis_response(stock_code, stock_name, context, future.result())
+        except Exception as e:
+            result = {"status": "error", "message": f"분석 실패: {e}", "code": stock_code}
+        yield _ndjson(result)
+
+
+def _ndjson(payload):
+    return json.dumps(payload, ensure_ascii=False) + "\n"
+
+
+def _analysis_context(collected):
+    """차트/실시간/뉴스를 AI에게 보낼 문맥과 현재가로 정리 (차트가 없으면 에러 응답)"""
+    df = collected["chart"]
+    realtime_data = collected["realtime"]
+    news_titles = collected["news"]
 
     if df is None or df.empty:
         return {"status": "error", "message": "차트 데이터를 불러올 수 없습니다."}
@@ -81,41 +204,24 @@ def analyze_stock(ticker: str, strategy: str = "volatility"):
     else:
         final_context += "특이 뉴스 없음.\n"
 
-    print("🤖 Gemini AI 종합 판단 요청 중...")
+    return {"df": df, "current_price": current_price, "news_summary": final_context}
 
-    ai_result = get_ai_decision(
-        ticker=stock_name,
-        df=df,
-        news_summary=final_context,
-        strategy_type=strategy
-    )
 
-    rsi_val = 0.0
-    macd_val = 0.0
+def _analysis_response(stock_code, stock_name, context, ai_result):
+    df = context["df"]
 
-    if df is not None and not df.empty:
-        import pandas_ta_classic as ta
-        df.ta.rsi(length=14, append=True)
-        df.ta.macd(append=True)
+    # AI 판단(매수/매도)을 모의 투자 엔진에 신호로 넘겨 포지션으로 추적합니다.
+    paper_trading.ENGINE.post_signal(data_collector.to_yahoo_ticker(stock_code), ai_result.get('decision', 'hold'), source="ai")
 
-        rsi_cols = [c for c in df.columns if c.lower().startswith('rsi')]
-        macd_cols = [c for c in df.columns if
-                     c.lower().startswith('macd_') and not c.lower().endswith('h') and not c.lower().endswith('s')]
-
-        if rsi_cols:
-            rsi_val = float(df[rsi_cols[0]].iloc[-1])
-
-        if macd_cols:
-            macd_val = float(df[macd_cols[0]].iloc[-1])
-
-        if math.isnan(rsi_val): rsi_val = 0.0
-        if math.isnan(macd_val): macd_val = 0.0
+    # 전략/AI 요약에서 이미 계산한 지표를 공용 엔진 메모에서 그대로 꺼내 씁니다.
+    rsi_val = indicators.last(df, 'rsi', length=14)
+    macd_val = indicators.last(df, 'macd')
 
     return {
         "status": "success",
         "name": stock_name,
         "code": stock_code,
-        "current_price": current_price,
+        "current_price": context["current_price"],
         "signal": ai_result.get('decision', 'HOLD').lower(),
         "rsi": rsi_val,
         "macd": macd_val,
@@ -123,17 +229,164 @@ def analyze_stock(ticker: str, strategy: str = "volatility"):
     }
 
 
-@app.get("/top_stocks")
-def get_top_stocks():
-    try:
-        url = "https://finance.naver.com/sise/lastsearch2.naver"
-        headers = {'User-Agent': 'Mozilla/5.0'}
-        res = requests.get(url, headers=headers)
-        soup = BeautifulSoup(res.text, "lxml")
+@app.get("/autocomplete")
+def autocomplete(q: str, limit: int = 10):
+    """종목 자동완성 (한글명/영문명/티커/초성 검색, 예: /autocomplete?q=ㅅㅅㅈㅈ)"""
+    return {"query": q, "results": stock_utils.search_stocks(q, limit=max(1, min(limit, 50)))}
 
-        items = soup.select("table.type_5 tr a.tltle")
-        top_20 = [item.text for item in items[:20]]
-        return {"top_stocks": top_20}
 
+@app.get("/scan")
+def scan_market(strategies: str = "volatility,goldencross,rsi_bollinger", markets: str = "", limit: int = 0):
+    """
+    KOSPI/KOSDAQ/NASDAQ 전 종목을 기술적 전략으로만 스캔해서 매수/매도 신호 종목을 반환 (AI 호출 없음)
+    예: /scan?strategies=goldencross&markets=KOSPI,KOSDAQ
+    """
+    try:
+        return {"status": "success", **scanner.scan(
+            strategies=[s.strip() for s in strategies.split(",") if s.strip()],
+            markets=[m.strip() for m in markets.split(",") if m.strip()] or None,
+            limit=limit or None,
+        )}
     except Exception as e:
-        return {"top_stocks": ["삼성전자", "SK하이닉스", "카카오", "NAVER", "현대차"]}
\ No newline at end of file
+        return {"status": "error", "message": f"스캔 실패: {e}"}
+
+
+@app.get("/screen")
+def screen_market(metric: str = "momentum", query: str = "screen", markets: str = "", codes: str = "",
+                  top: int = 20, lookback: int = 0, order: str = "", min_price: float = 0.0, min_volume: float = 0.0):
+    """
+    메모리 매핑된 전 종목 종가/거래량 행렬로 횡단면 질의 (차트 다운로드 없음, `python price_matrix.py`로 빌드)
+    - query=screen     : 지표 상위/하위 종목 (예: /screen?metric=rsi&markets=KOSPI&top=20 -> 과매도 20종목)
+    - query=rank       : codes 종목들의 시장 내 순위 (예: /screen?query=rank&metric=momentum&codes=005930,000660)
+    - query=correlation: codes 종목들의 수익률 상관계수 행렬 (예: /screen?query=correlation&codes=005930,000660,035420)
+    """
+    market_list = [m.strip() for m in markets.split(",") if m.strip()] or None
+    code_list = [stock_utils.get_stock_info(c.strip())[0] for c in codes.split(",") if c.strip()]
+    try:
+        with metrics.span("screen"):
+            if query == "correlation":
+                result = price_matrix.MATRIX.correlation(code_list, lookback=lookback or 60)
+            elif query == "rank":
+                result = price_matrix.MATRIX.rank(code_list, metric=metric, markets=market_list, lookback=lookback or None)
+            else:
+                result = price_matrix.MATRIX.screen(
+                    metric=metric, markets=market_list, top=max(1, min(top, 500)), lookback=lookback or None,
+                    ascending={"asc": True, "desc": False}.get(order.lower()),
+                    min_price=min_price, min_volume=min_volume,
+                )
+    except (FileNotFoundError, ValueError) as e:
+        return {"status": "error", "message": str(e)}
+    return {"status": "success", **result}
+
+
+@app.get("/quotes")
+def get_quotes(codes: str):
+    """여러 종목 실시간 시세를 1초 공유 캐시 + 일괄 조회로 반환 (예: /quotes?codes=005930,000660,TSLA)"""
+    return {"quotes": data_collector.QUOTES.get_many([c.strip() for c in codes.split(",") if c.strip()])}
+
+
+@app.get("/quotes/stats")
+def get_quote_stats():
+    """시세 캐시 적중률, 출처별 조회 지연(p50/p95/max), 내보낸 시세 나이, Method A/B 헤지·서킷 상태, 증분 지표 틱 수"""
+    return dict(data_collector.QUOTES.stats(), realtime_sources=data_collector.REALTIME_CHAIN.stats(),
+                live_indicators=live_indicators.LIVE.stats())
+
+
+@app.get("/intraday")
+def get_intraday_bars(code: str, interval: str = "1m", limit: int = 120, strategy: str = ""):
+    """
+    실시간 시세 틱으로 모은 분봉 (예: /intraday?code=005930&interval=5m&strategy=volatility)
+    틱은 /quotes, /stream/quotes, /analyze 등이 시세를 받을 때마다 쌓입니다. strategy를 주면 분봉 기준 신호도 함께 반환
+    """
+    if interval not in intraday_bars.INTERVALS:
+        return {"status": "error", "message": f"지원 주기: {', '.join(intraday_bars.INTERVALS)}"}
+    symbol = data_collector.to_yahoo_ticker(stock_utils.get_stock_info(code)[0] or code)
+    ring = intraday_bars.BARS.get(symbol, interval)
+    if ring is None or not len(ring):
+        return {"status": "error", "message": f"{symbol} 분봉이 아직 없습니다. 시세 조회/구독 후 다시 시도하세요."}
+
+    bars = ring.view(max(1, min(limit, ring.capacity)))
+    result = {"status": "success", "symbol": symbol, "interval": interval,
+              "bars": [{"time": int(t), **{f: float(bars[f][i]) for f in intraday_bars.FIELDS}}
+                       for i, t in enumerate(bars["time"])]}
+    if strategy:
+        result["signal"] = get_strategy_signal(ring, strategy)
+    return result
+
+
+@app.get("/stream/quotes")
+def stream_quotes(codes: str):
+    """
+    실시간 시세 SSE 스트림 (예: /stream/quotes?codes=삼성전자,TSLA)
+    처음엔 종목별 snapshot, 이후엔 바뀐 필드만 delta 이벤트로 흘려보냅니다. /analyze를 반복 호출할 필요가 없습니다.
+    """
+    symbols = []
+    for name in codes.split(","):
+        if name.strip():
+            stock_code, _, _ = _resolve_symbol(name.strip())
+            symbols.append(stock_code or name.strip())
+    return StreamingResponse(QUOTE_HUB.sse(symbols), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+@app.get("/stream/stats")
+def get_stream_stats():
+    return QUOTE_HUB.stats()
+
+
+def _labelled(counts, label):
+    return {((label, key),): value for key, value in counts.items()}
+
+
+# /metrics에 함께 내보낼 캐시 적중률과 업스트림 상태
+metrics.register_gauge("cache_hit_ratio", "캐시 적중률 (합류한 동일 요청 포함)", lambda: {
+    (("cache", "ai_response"),): ai_brain.AI_RESPONSE_CACHE.stats()["hit_ratio"],
+    (("cache", "quotes"),): data_collector.QUOTES.stats()["hit_ratio"],
+    (("cache", "chart_store"),): _ratio(chart_store.STORE.counters["hits"], chart_store.STORE.counters["misses"]),
+    (("cache", "indicators"),): _ratio(indicators.COUNTERS["hits"], indicators.COUNTERS["misses"]),
+    (("cache", "news"),): _ratio(data_collector.NEWS.counters["hits"], data_collector.NEWS.counters["fetches"]),
+})
+metrics.register_gauge("realtime_source_failures_total", "Method A/B 출처별 실패 수",
+                       lambda: _labelled(data_collector.REALTIME_CHAIN.counters["failures"], "source"), "counter")
+metrics.register_gauge("realtime_source_open", "서킷 브레이커가 열린 출처 (1=차단 중)", lambda: {
+    (("source", s.name),): int(s.breaker.state != "closed") for s in data_collector.REALTIME_CHAIN.sources})
+metrics.register_gauge("news_fetch_errors_total", "뉴스 갱신 실패 수",
+                       lambda: data_collector.NEWS.counters["errors"], "counter")
+metrics.register_gauge("ai_batch_size_avg", "AI 마이크로 배치 평균 크기",
+                       lambda: ai_brain._ASYNC_BATCHER.stats()["avg_batch_size"])
+metrics.register_gauge("ai_rate_limit_rejected_total", "호출 한도로 기술적 신호 대체된 배치 수",
+                       lambda: ai_brain.AI_RATE_LIMIT.counters["rejected"], "counter")
+
+
+def _ratio(hits, misses):
+    return hits / (hits + misses) if hits + misses else 0.0
+
+
+@app.get("/metrics")
+def get_metrics():
+    """Prometheus 텍스트 포맷 지표 (구간별 지연 히스토그램, 엔드포인트 응답 시간, 캐시 적중률, 업스트림 에러)"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.on_event("startup")
+def start_background_jobs():
+    # 인기 종목 순위를 주기적으로 갱신하고, 바뀔 때마다 상위 종목 캐시를 예열합니다.
+    top_stocks.BOARD.start()
+    # AI 판단을 신호로, 실시간 시세를 체결 기준으로 쓰는 모의 투자 엔진
+    paper_trading.ENGINE.start()
+
+
+@app.get("/paper")
+def get_paper_trading():
+    """모의 투자 현황 (현금/평가금액/실현·평가 손익/보유 종목, 최근 체결, 이벤트 처리량)"""
+    return paper_trading.ENGINE.snapshot()
+
+
+@app.get("/top_stocks")
+def get_top_stocks(if_none_match: str = Header(None)):
+    """백그라운드에서 갱신된 인기 종목 순위를 메모리에서 바로 반환 (ETag가 같으면 304)"""
+    body, etag = top_stocks.BOARD.snapshot()
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={int(top_stocks.INTERVAL)}"}
+    if if_none_match == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
\ No newline at end of file
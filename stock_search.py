@@ -0,0 +1,160 @@
+import bisect
+from collections import defaultdict
+from functools import lru_cache
+
+import numpy as np
+
+# =========================================================
+# 🔎 종목 검색 인덱스 (정확 -> 접두사 -> 부분 -> 유사 순위)
+# =========================================================
+# - 정확 일치: dict 조회
+# - 접두사: 정렬된 검색어 배열 + bisect (구간 조회)
+# - 부분 일치: 2-gram 역색인으로 후보를 좁힌 뒤 실제 포함 여부 확인
+# - 초성 검색: 'ㅅㅅㅈㅈ' 처럼 자음만 입력하면 한글 이름의 초성 문자열에서 같은 방식으로 검색
+# - 유사 일치: 2-gram 겹침(Dice 계수)이 기준 이상인 후보
+# 같은 등급 안에서는 (검색어 길이, 검색어, 종목 코드) 순으로 정렬해서 결과가 항상 같게 나옵니다.
+EXACT, PREFIX, SUBSTRING, FUZZY = 0, 1, 2, 3
+MATCH_NAMES = {EXACT: "exact", PREFIX: "prefix", SUBSTRING: "substring", FUZZY: "fuzzy"}
+FUZZY_THRESHOLD = 0.5
+QUERY_CACHE_SIZE = 4096
+
+_CHOSUNG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+_JAMO_CONSONANTS = set("ㄱㄲㄳㄴㄵㄶㄷㄸㄹㄺㄻㄼㄽㄾㄿㅀㅁㅂㅃㅄㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ")
+
+
+def normalize(text):
+    """마스터 사전 키와 같은 규칙 (소문자 + 공백 제거)"""
+    return str(text).lower().replace(" ", "")
+
+
+def to_chosung(text):
+    """한글 음절을 초성으로 바꾼 문자열 (한글이 아닌 글자는 그대로)"""
+    out = []
+    for ch in text:
+        code = ord(ch) - 0xAC00
+        out.append(_CHOSUNG[code // 588] if 0 <= code <= 11171 else ch)
+    return "".join(out)
+
+
+def is_chosung_query(text):
+    return bool(text) and all(ch in _JAMO_CONSONANTS for ch in text)
+
+
+def _bigrams(text):
+    return {text[i:i + 2] for i in range(len(text) - 1)} if len(text) > 1 else {text}
+
+
+class _TermIndex:
+    """검색어 문자열 집합 하나에 대한 정확/접두사/부분/유사 검색"""
+
+    def __init__(self, terms):
+        self.terms = sorted(set(terms))
+        self.exact = set(self.terms)
+        postings = defaultdict(list)
+        for term_id, term in enumerate(self.terms):
+            for gram in _bigrams(term):
+                postings[gram].append(term_id)
+        self.postings = {gram: np.array(ids, dtype=np.int32) for gram, ids in postings.items()}
+        self.gram_counts = np.array([len(_bigrams(term)) for term in self.terms], dtype=np.float64)
+
+    def prefix(self, query):
+        lo = bisect.bisect_left(self.terms, query)
+        hi = bisect.bisect_left(self.terms, query + "\U0010ffff")
+        return self.terms[lo:hi]
+
+    def substring(self, query):
+        if len(query) < 2:
+            # 한 글자 검색어는 2-gram이 없으므로 전체 검색어를 직접 훑습니다 (결과는 쿼리 캐시에 남음).
+            return [term for term in self.terms if query in term]
+        grams = sorted(_bigrams(query), key=lambda g: len(self.postings.get(g, ())))
+        if not grams or grams[0] not in self.postings:
+            return []
+        candidates = set(self.postings[grams[0]])
+        for gram in grams[1:]:
+            candidates.intersection_update(self.postings.get(gram, ()))
+            if not candidates:
+                return []
+        return [self.terms[i] for i in candidates if query in self.terms[i]]
+
+    def fuzzy(self, query, threshold=FUZZY_THRESHOLD):
+        grams = _bigrams(query)
+        hits = [self.postings[g] for g in grams if g in self.postings]
+        if not hits:
+            return []
+
+        # 후보별 겹치는 2-gram 수를 bincount로 한 번에 세고 Dice 계수를 벡터 연산으로 구합니다.
+        overlap = np.bincount(np.concatenate(hits), minlength=len(self.terms))
+        scores = 2.0 * overlap / (len(grams) + self.gram_counts)
+        matched = np.flatnonzero(scores >= threshold)
+        return [(float(scores[i]), self.terms[i]) for i in matched]
+
+
+class StockSearchIndex:
+    """
+    entries: [(검색어, 종목코드, 표시 이름, 시장), ...]
+    같은 종목이 여러 검색어(한글명/영문명/티커)로 등록될 수 있으며, 결과는 종목 단위로 합쳐집니다.
+    """
+
+    def __init__(self, entries):
+        self._stocks = {}
+        self._term_stocks = defaultdict(list)
+        self._chosung_stocks = defaultdict(list)
+
+        for term, code, name, market in entries:
+            term = normalize(term)
+            if not term:
+                continue
+            self._stocks.setdefault(code, {"code": code, "name": name, "market": market})
+            self._term_stocks[term].append(code)
+
+            chosung = to_chosung(term)
+            if chosung != term:
+                self._chosung_stocks[chosung].append(code)
+
+        self._terms = _TermIndex(self._term_stocks)
+        self._chosung = _TermIndex(self._chosung_stocks)
+        self._cached_search = lru_cache(maxsize=QUERY_CACHE_SIZE)(self._search)
+
+    def __len__(self):
+        return len(self._stocks)
+
+    def search(self, query, limit=10, fuzzy=True):
+        """순위가 매겨진 검색 결과 [{'code', 'name', 'market', 'match', 'term'}, ...]"""
+        return [dict(item) for item in self._cached_search(query, limit, fuzzy)]
+
+    def _rank(self, index, term_stocks, query, fuzzy, limit):
+        ranked = {}
+
+        def offer(tier, score, term):
+            for code in term_stocks[term]:
+                key = (tier, -score, len(term), term, code)
+                if code not in ranked or key < ranked[code]:
+                    ranked[code] = key
+
+        if query in index.exact:
+            offer(EXACT, 0.0, query)
+        for term in index.prefix(query):
+            offer(PREFIX, 0.0, term)
+        for term in index.substring(query):
+            offer(SUBSTRING, 0.0, term)
+        # 유사 결과는 순위상 항상 뒤에 오므로 앞 등급만으로 limit을 채우면 생략합니다.
+        if fuzzy and len(ranked) < limit:
+            for score, term in index.fuzzy(query):
+                offer(FUZZY, score, term)
+        return ranked
+
+    def _search(self, query, limit=10, fuzzy=True):
+        query = normalize(query)
+        if not query:
+            return ()
+
+        if is_chosung_query(query):
+            ranked = self._rank(self._chosung, self._chosung_stocks, query, False, limit)
+        else:
+            ranked = self._rank(self._terms, self._term_stocks, query, fuzzy, limit)
+
+        ordered = sorted(ranked.items(), key=lambda item: item[1])[:limit]
+        return tuple(
+            dict(self._stocks[code], match=MATCH_NAMES[key[0]], term=key[3])
+            for code, key in ordered
+        )
@@ -1,33 +1,83 @@
-import os
-import json
+import threading
 import urllib.parse
 from pathlib import Path
 
-MASTER_FILE = "global_stock_master.json"
-STOCK_MASTER = {}
+import cache_backend
+import master_store
+import stock_search
+
+# 🗜️ 문자열 테이블 + 오프셋 배열로 된 바이너리 마스터 (mmap으로 여러 워커가 공유)
+MASTER_FILE = "global_stock_master.bin"
+STOCK_MASTER = None  # 첫 조회 시점에 get_master()가 채웁니다.
+_MASTER_LOCK = threading.Lock()
+_SEARCH_INDEX = None
+# 워커 여러 개가 동시에 떠도 원본 파싱 + 바이너리 저장은 한 워커만 하고, 나머지는 완성된 파일을 mmap으로 엽니다.
+_MASTER_BUILDS = cache_backend.make_cache("master_build", maxsize=8, ttl=600)
 
 # 📂 수동으로 다운로드한 한투 mst/cod 파일들이 위치할 폴더 경로
 MST_DIR = Path("mst_files")
 
 
+def _source_files():
+    files = [MST_DIR / "kospi_code.mst", MST_DIR / "kosdaq_code.mst"]
+    if MST_DIR.exists():
+        files += [p for p in MST_DIR.glob("*") if p.name.upper() == "NASMST.COD"]
+    return files
+
+
 def init_stock_master():
     """
-    한투 국내 마스터(.mst)의 바이트 규격과 해외 마스터(.cod)의 탭(Tab) 분할 규격을
-    모두 정확하게 인지하여 디코딩 에러 없이 완벽한 통합 사전을 구축합니다.
+    바이너리 마스터 파일이 원본 mst/cod 파일과 일치하면 mmap으로 바로 열고,
+    원본이 바뀌었거나(크기/수정 시각 서명 불일치) 파일이 없으면 원본을 파싱해서 다시 빌드합니다.
     """
     global STOCK_MASTER
 
+    signature = master_store.source_signature(_source_files())
+
     # 1️⃣ 이미 사전 파일이 잘 빌드되어 있다면 초고속 패스!
-    if os.path.exists(MASTER_FILE):
+    master = master_store.open_master(MASTER_FILE, signature)
+    if master is not None and len(master) > 1000:  # 국내외 포함이므로 기준치 상향
+        STOCK_MASTER = master
+        print(f"💾 [STOCK_MASTER] >>> 바이너리 사전 파일에서 {len(STOCK_MASTER)}개 종목을 즉시 매핑했습니다.")
+        return STOCK_MASTER
+
+    built = []
+
+    def build():
+        # 완성된 대형 사전을 로컬에 영구 저장
+        built.append(_parse_sources())
         try:
-            with open(MASTER_FILE, "r", encoding="utf-8") as f:
-                STOCK_MASTER = json.load(f)
-            if STOCK_MASTER and len(STOCK_MASTER) > 1000:  # 국내외 포함이므로 기준치 상향
-                print(f"💾 [STOCK_MASTER] >>> 로컬 사전 파일에서 {len(STOCK_MASTER)}개 종목을 즉시 로드했습니다.")
-                return
-        except Exception:
-            pass
+            master_store.write_master(MASTER_FILE, built[0], signature)
+            return True
+        except OSError as e:
+            print(f"⚠️ [STOCK_MASTER] 바이너리 사전 저장 실패, 메모리 사전으로 동작합니다: {e}")
+            return False
+
+    _MASTER_BUILDS.get_or_compute(signature, build)
+    master = master_store.open_master(MASTER_FILE, signature)
+    if master is None:
+        # 다른 워커의 저장이 실패했거나 파일을 못 여는 경우에만 이 워커에서 직접 파싱합니다.
+        master = built[0] if built else _parse_sources()
+
+    STOCK_MASTER = master
+    print(f"✅ [구축 완료] 총 {len(STOCK_MASTER)}개 국내/외 종목 기반 최종 무차단 사전 로드 완료!")
+    return STOCK_MASTER
+
 
+def get_master():
+    """마스터 사전 (모듈 import 시점이 아니라 첫 조회 시점에 한 번만 로드)"""
+    if STOCK_MASTER is None:
+        with _MASTER_LOCK:
+            if STOCK_MASTER is None:
+                init_stock_master()
+    return STOCK_MASTER
+
+
+def _parse_sources():
+    """
+    한투 국내 마스터(.mst)의 바이트 규격과 해외 마스터(.cod)의 탭(Tab) 분할 규격을
+    모두 정확하게 인지하여 디코딩 에러 없이 완벽한 통합 사전을 구축합니다.
+    """
     print(f"📂 [최초 1회 실행] 수동 마스터 폴더 '{MST_DIR}' 내부 한투 데이터 스캔 중...")
     master_data = {}
     file_count = 0
@@ -35,8 +85,8 @@ def init_stock_master():
     # -------------------------------------------------------------------------
     # 🇰🇷 1구역: 국내 주식 마스터 파일 파싱 (.mst 고정 바이트 규격)
     # -------------------------------------------------------------------------
-    kr_files = ["kospi_code.mst", "kosdaq_code.mst"]
-    for file_name in kr_files:
+    kr_files = {"kospi_code.mst": "KOSPI", "kosdaq_code.mst": "KOSDAQ"}
+    for file_name, market in kr_files.items():
         file_path = MST_DIR / file_name
         if file_path.exists():
             file_count += 1
@@ -51,7 +101,7 @@ def init_stock_master():
 
                             if code.isdigit() and len(code) == 6 and name:
                                 clean_name = name.lower().replace(" ", "")
-                                master_data[clean_name] = {"code": code, "name": name}
+                                master_data[clean_name] = {"code": code, "name": name, "market": market}
             except Exception as e:
                 print(f"⚠️ 국내 파일 '{file_name}' 처리 중 오류: {e}")
 
@@ -82,14 +132,17 @@ def init_stock_master():
                                 if ticker and (kr_name or en_name):
                                     # 실거래에 사용되는 이름 유연성 확보를 위해 전부 등록
                                     clean_ticker = ticker.lower()
-                                    master_data[clean_ticker] = {"code": ticker, "name": kr_name or en_name}
+                                    master_data[clean_ticker] = {"code": ticker, "name": kr_name or en_name,
+                                                                 "market": "NASDAQ"}
 
                                     if kr_name:
                                         master_data[kr_name.lower().replace(" ", "")] = {"code": ticker,
-                                                                                         "name": kr_name}
+                                                                                         "name": kr_name,
+                                                                                         "market": "NASDAQ"}
                                     if en_name:
                                         master_data[en_name.lower().replace(" ", "")] = {"code": ticker,
-                                                                                         "name": kr_name or en_name}
+                                                                                         "name": kr_name or en_name,
+                                                                                         "market": "NASDAQ"}
                 except Exception as e:
                     print(f"⚠️ 해외 파일 '{p.name}' 처리 중 오류: {e}")
 
@@ -103,21 +156,10 @@ def init_stock_master():
     for name, code in essential_stocks.items():
         clean_name = name.lower().replace(" ", "")
         if clean_name not in master_data:
-            master_data[clean_name] = {"code": code, "name": name}
-
-    # 완성된 대형 사전을 로컬에 영구 저장
-    try:
-        with open(MASTER_FILE, "w", encoding="utf-8") as f:
-            json.dump(master_data, f, ensure_ascii=False, indent=4)
-    except Exception:
-        pass
-
-    STOCK_MASTER = master_data
-    print(f"✅ [구축 완료] 총 {len(STOCK_MASTER)}개 국내/외 종목 기반 최종 무차단 사전 로드 완료!")
-
+            master_data[clean_name] = {"code": code, "name": name,
+                                       "market": "KOSPI" if code.isdigit() else "NASDAQ"}
 
-# 서버 가동 시점에 사전 연동 초기화
-init_stock_master()
+    return master_data
 
 
 def get_stock_info(keyword):
@@ -136,13 +178,57 @@ def get_stock_info(keyword):
     clean_keyword = decoded_keyword.lower().replace(" ", "")
 
     # 1. 완벽 일치 검색
-    if clean_keyword in STOCK_MASTER:
-        return STOCK_MASTER[clean_keyword]['code'], STOCK_MASTER[clean_keyword]['name']
+    master = get_master()
+    if clean_keyword in master:
+        data = master[clean_keyword]
+        return data['code'], data['name']
 
-    # 2. 부분 일치 유연 검색
-    for clean_name, data in STOCK_MASTER.items():
-        if clean_keyword in clean_name or clean_name in clean_keyword:
-            print(f"🎯 [로컬 통합 매칭] {decoded_keyword} -> {data['name']}({data['code']})")
-            return data['code'], data['name']
+    # 2. 검색 인덱스 순위 검색 (접두사 -> 부분 일치, 결과가 항상 같은 순서)
+    # 유사 일치는 엉뚱한 회사로 바뀔 수 있으므로 코드 확정에는 쓰지 않습니다 (자동완성에서만 사용).
+    results = get_search_index().search(clean_keyword, limit=1, fuzzy=False)
+    if results:
+        data = results[0]
+        print(f"🎯 [로컬 통합 매칭] {decoded_keyword} -> {data['name']}({data['code']}) [{data['match']}]")
+        return data['code'], data['name']
 
-    return decoded_keyword, decoded_keyword
\ No newline at end of file
+    return decoded_keyword, decoded_keyword
+
+
+def get_universe(markets=None):
+    """
+    마스터 사전에서 종목 코드 기준으로 중복을 제거한 전체 유니버스 반환
+    markets: {'KOSPI', 'KOSDAQ', 'NASDAQ'} 중 일부만 고를 때 사용
+    반환: [{'code', 'name', 'market'}, ...]
+    """
+    wanted = {m.upper() for m in markets} if markets else None
+    universe = {}
+    for data in get_master().values():
+        market = data.get("market", "KOSPI" if str(data["code"]).isdigit() else "NASDAQ")
+        if wanted and market not in wanted:
+            continue
+        universe.setdefault(data["code"], {"code": data["code"], "name": data["name"], "market": market})
+    return list(universe.values())
+
+
+def get_search_index():
+    """마스터 사전으로 검색 인덱스를 (처음 한 번 / 사전이 바뀌었을 때) 빌드"""
+    global _SEARCH_INDEX
+    master = get_master()
+    if _SEARCH_INDEX is None or _SEARCH_INDEX.source is not master:
+        index = stock_search.StockSearchIndex(
+            (key, data["code"], data["name"], data.get("market", ""))
+            for key, data in master.items()
+        )
+        index.source = master
+        _SEARCH_INDEX = index
+    return _SEARCH_INDEX
+
+
+def search_stocks(keyword, limit=10):
+    """
+    종목 자동완성/검색 (한글명, 영문명, 티커, 한글 초성)
+    반환: [{'code', 'name', 'market', 'match', 'term'}, ...] (정확 -> 접두사 -> 부분 -> 유사 순)
+    """
+    if not keyword:
+        return []
+    return get_search_index().search(urllib.parse.unquote(keyword).strip(), limit=limit)
@@ -1,11 +1,88 @@
-import pandas_ta_classic  as ta
+import math
 
-def get_strategy_signal(df, strategy_type="volatility"):
+import numpy as np
+
+import indicators
+import intraday_bars
+import live_indicators
+import metrics
+
+BUY, HOLD, SELL = 1, 0, -1
+_SIGNAL_NAMES = {BUY: "buy", HOLD: "hold", SELL: "sell"}
+
+
+# =========================================================
+# 🧮 전략 신호 커널 (실시간 신호와 백테스트가 같은 함수를 씁니다)
+# =========================================================
+# 모든 입력은 (날짜,) 또는 (날짜, 종목) 배열이고, 출력은 같은 모양의 int8 신호(1 매수 / 0 관망 / -1 매도)입니다.
+def _shift(values, periods=1):
+    out = np.full(np.shape(values), np.nan)
+    out[periods:] = values[:-periods]
+    return out
+
+
+def volatility_target(open_, high, low, k=0.5):
+    """매수 목표가 = 오늘 시가 + (어제 고가 - 어제 저가) * k"""
+    return open_ + _shift(np.asarray(high) - np.asarray(low)) * k
+
+
+def volatility_signals(open_, high, low, close, k=0.5):
+    target = volatility_target(open_, high, low, k)
+    return np.where(close >= target, BUY, HOLD).astype(np.int8)
+
+
+def goldencross_signals(fast_sma, slow_sma):
+    # 값이 없으면(NaN) 0으로 처리
+    fast, slow = np.nan_to_num(fast_sma), np.nan_to_num(slow_sma)
+    prev_fast, prev_slow = _shift(fast), _shift(slow)
+
+    buy = (prev_fast < prev_slow) & (fast > slow)
+    sell = (prev_fast > prev_slow) & (fast < slow)
+    return np.where(buy, BUY, np.where(sell, SELL, HOLD)).astype(np.int8)
+
+
+def rsi_bollinger_signals(close, rsi_values, lower_band, oversold=30, overbought=70):
+    buy = (rsi_values < oversold) & (close <= lower_band)
+    sell = rsi_values > overbought
+    return np.where(buy, BUY, np.where(sell, SELL, HOLD)).astype(np.int8)
+
+
+def compute_signals(strategy_type, open_, high, low, close, **params):
+    """
+    전략 이름으로 전체 신호 시계열 계산 (백테스트/스캐너용, 지표는 배열에서 직접 계산)
+    params: volatility -> k / goldencross -> fast, slow /
+            rsi_bollinger -> rsi_length, bb_length, bb_std, oversold, overbought
+    """
+    close = np.asarray(close, dtype=np.float64)
+    if strategy_type == "volatility":
+        return volatility_signals(np.asarray(open_, dtype=np.float64), high, low, close, k=params.get("k", 0.5))
+    if strategy_type == "goldencross":
+        return goldencross_signals(indicators.sma(close, params.get("fast", 5)),
+                                   indicators.sma(close, params.get("slow", 20)))
+    if strategy_type == "rsi_bollinger":
+        lower = indicators.bbands(close, params.get("bb_length", 20), params.get("bb_std", 2.0))["bbl"]
+        return rsi_bollinger_signals(close, indicators.rsi(close, params.get("rsi_length", 14)), lower,
+                                     oversold=params.get("oversold", 30), overbought=params.get("overbought", 70))
+    raise ValueError(f"알 수 없는 전략: {strategy_type}")
+
+
+@metrics.timed("strategy_signal")
+def get_strategy_signal(df, strategy_type="volatility", k=0.5, fast=5, slow=20,
+                        rsi_length=14, bb_length=20, bb_std=2.0, oversold=30, overbought=70):
     """
     원하는 전략을 선택해서 매매 신호를 받는 함수
     :param df: 주식 데이터 (open, high, low, close 필수)
     :param strategy_type: 'volatility', 'goldencross', 'rsi_bollinger'
+    나머지 인자는 전략 파라미터이며, 기본값은 기존 고정값과 같습니다. (optimizer의 최적값을 그대로 넘길 수 있음)
+    df 대신 live_indicators.LiveIndicators(실시간 증분 지표 상태)를 넘기면 재계산 없이 현재 틱 기준으로 평가하고,
+    intraday_bars.BarRing(분봉 링 버퍼)을 넘기면 분봉 기준(진행 중인 마지막 봉)으로 평가합니다.
     """
+    if isinstance(df, live_indicators.LiveIndicators):
+        return _live_signal(df, strategy_type, k, fast, slow, rsi_length, bb_length, bb_std, oversold, overbought)
+    if isinstance(df, intraday_bars.BarRing):
+        return _bars_signal(df, strategy_type, k=k, fast=fast, slow=slow, rsi_length=rsi_length,
+                            bb_length=bb_length, bb_std=bb_std, oversold=oversold, overbought=overbought)
+
     # 데이터 컬럼명 소문자로 정리 (Open -> open)
     df.columns = [c.lower() for c in df.columns]
 
@@ -13,96 +90,99 @@ def get_strategy_signal(df, strategy_type="volatility"):
     # 1. 래리 윌리엄스의 변동성 돌파 전략 (단타 추천)
     # ------------------------------------------------
     if strategy_type == "volatility":
-        # 어제 데이터 가져오기 (마지막에서 두 번째)
-        yesterday = df.iloc[-2]
-        today = df.iloc[-1]
-
-        # 변동폭 계산 (어제 고가 - 어제 저가)
-        range_yesterday = yesterday['high'] - yesterday['low']
-
-        # 매수 목표가 설정 (오늘 시가 + 변동폭 * 0.5)
+        # 변동폭 계산 (어제 고가 - 어제 저가) 후 매수 목표가 설정 (오늘 시가 + 변동폭 * k)
         # k=0.5는 래리 윌리엄스가 추천한 황금 비율
-        target_price = today['open'] + (range_yesterday * 0.5)
+        open_, high, low, close = (df[c].to_numpy(dtype=float) for c in ('open', 'high', 'low', 'close'))
+        target_price = volatility_target(open_[-2:], high[-2:], low[-2:], k=k)[-1]
 
-        print(f"[변동성돌파] 목표가: {target_price:.0f}원 | 현재가: {today['close']:.0f}원")
+        print(f"[변동성돌파] 목표가: {target_price:.0f}원 | 현재가: {close[-1]:.0f}원")
 
         # 현재가가 목표가를 뚫었으면 매수!
-        if today['close'] >= target_price:
-            return "buy"
+        return _SIGNAL_NAMES[int(volatility_signals(open_[-2:], high[-2:], low[-2:], close[-2:], k=k)[-1])]
 
     # ------------------------------------------------
     # 2. 이동평균선 골든크로스 (추세 추종)
     # ------------------------------------------------
     elif strategy_type == "goldencross":
-        # ★ 수정: 이름을 직접 지정해서 넣습니다. (검색X)
-        df['MY_SMA5'] = df.ta.sma(length=5)
-        df['MY_SMA20'] = df.ta.sma(length=20)
-
-        curr = df.iloc[-1]
-        prev = df.iloc[-2]
+        # 공용 지표 엔진에서 SMA를 받아옵니다. (df에 컬럼을 덧붙이지 않음)
+        sma_fast = indicators.get(df, 'sma', length=fast)
+        sma_slow = indicators.get(df, 'sma', length=slow)
 
         # 값이 없으면(NaN) 0으로 처리
-        curr_sma5 = curr.get('MY_SMA5', 0) or 0
-        curr_sma20 = curr.get('MY_SMA20', 0) or 0
-        prev_sma5 = prev.get('MY_SMA5', 0) or 0
-        prev_sma20 = prev.get('MY_SMA20', 0) or 0
+        curr_fast = 0 if math.isnan(sma_fast[-1]) else float(sma_fast[-1])
+        curr_slow = 0 if math.isnan(sma_slow[-1]) else float(sma_slow[-1])
+        print(f"   📐 [골든크로스] {fast}일: {curr_fast:.0f} | {slow}일: {curr_slow:.0f}")
 
-        print(f"   📐 [골든크로스] 5일: {curr_sma5:.0f} | 20일: {curr_sma20:.0f}")
-
-        if prev_sma5 < prev_sma20 and curr_sma5 > curr_sma20:
-            return "buy"
-        elif prev_sma5 > prev_sma20 and curr_sma5 < curr_sma20:
-            return "sell"
+        return _SIGNAL_NAMES[int(goldencross_signals(sma_fast[-2:], sma_slow[-2:])[-1])]
 
     # ------------------------------------------------
     # 3. RSI + 볼린저밴드 줍줍 전략 (역추세)
     # ------------------------------------------------
     elif strategy_type == "rsi_bollinger":
-        # 지표 계산 (append=True로 df에 직접 추가)
-        df.ta.rsi(length=14, append=True)
-        df.ta.bbands(length=20, std=2, append=True)
+        # 지표 계산 (공용 지표 엔진에서 한 번만 계산해 재사용)
+        rsi_values = indicators.get(df, 'rsi', length=rsi_length)
+        lower_values = indicators.get(df, 'bbl', length=bb_length, std=bb_std)
+        close = df['close'].to_numpy(dtype=float)
+
+        if math.isnan(rsi_values[-1]) or math.isnan(lower_values[-1]):
+            print("   ⚠️ 지표 계산 오류: 데이터가 부족합니다.")
+            return "hold"
+
+        print(f"   📐 [역추세] RSI: {rsi_values[-1]:.1f} | 밴드하단: {lower_values[-1]:.0f}")
 
-        # ★ [에러 수정 부분] 컬럼 찾기 로직 강화
-        # 대문자(BBL)든 소문자(bbl)든 상관없이 'bbl'로 시작하는 컬럼을 찾음
-        lower_cols = [c for c in df.columns if c.lower().startswith('bbl')]
-        rsi_cols = [c for c in df.columns if c.lower().startswith('rsi')]
+        signal = rsi_bollinger_signals(close[-1:], rsi_values[-1:], lower_values[-1:],
+                                       oversold=oversold, overbought=overbought)
+        return _SIGNAL_NAMES[int(signal[-1])]
 
-        if not lower_cols or not rsi_cols:
-            print("   ⚠️ 지표 계산 오류: 컬럼을 찾을 수 없습니다.")
+    return "hold" # 아무 신호 없으면 관망
+
+def _live_signal(live, strategy_type, k, fast, slow, rsi_length, bb_length, bb_std, oversold, overbought):
+    """증분 지표 상태의 (직전 봉, 현재 봉) 값만 같은 신호 커널에 넣어서 마지막 신호를 냅니다 (로그 출력 없음)."""
+    if strategy_type == "volatility":
+        prev, curr = live.bars()
+        open_, high, low, close = (np.array([p, c]) for p, c in zip(prev, curr))
+        return _SIGNAL_NAMES[int(volatility_signals(open_, high, low, close, k=k)[-1])]
+
+    if strategy_type == "goldencross":
+        return _SIGNAL_NAMES[int(goldencross_signals(np.array(live.sma(fast)), np.array(live.sma(slow)))[-1])]
+
+    if strategy_type == "rsi_bollinger":
+        rsi_value = live.rsi(rsi_length)
+        lower = live.bbands(bb_length, bb_std)[0]
+        if math.isnan(rsi_value) or math.isnan(lower):
             return "hold"
+        signal = rsi_bollinger_signals(np.array([live.bars()[1][3]]), np.array([rsi_value]), np.array([lower]),
+                                       oversold=oversold, overbought=overbought)
+        return _SIGNAL_NAMES[int(signal[-1])]
 
-        lower_col = lower_cols[0] # BBL_20_2.0
-        rsi_col = rsi_cols[0]     # RSI_14
+    return "hold"
 
-        curr = df.iloc[-1]
-        print(f"   📐 [역추세] RSI: {curr[rsi_col]:.1f} | 밴드하단: {curr[lower_col]:.0f}")
 
-        if curr[rsi_col] < 30 and curr['close'] <= curr[lower_col]:
-            return "buy"
-        elif curr[rsi_col] > 70:
-            return "sell"
+def _bars_signal(ring, strategy_type, **params):
+    """분봉 링 버퍼의 뷰를 복사 없이 신호 커널에 넣고 마지막 봉 신호만 반환"""
+    if len(ring) < 2:
+        return "hold"
+    bars = ring.view()
+    signals = compute_signals(strategy_type, bars["open"], bars["high"], bars["low"], bars["close"], **params)
+    return _SIGNAL_NAMES[int(signals[-1])]
 
-    return "hold" # 아무 신호 없으면 관망
 
+@metrics.timed("indicators")
 def get_chart_summary(df):
     """AI에게 보낼 데이터 요약 (보조지표 추가 계산)"""
     if df is None or len(df) < 20:
         return "데이터 부족으로 분석 불가"
 
-    # AI 참고용 지표 계산 (이미 계산되어 있어도 덮어씀)
-    df.ta.rsi(length=14, append=True)
-    df.ta.macd(append=True)
-
-    curr = df.iloc[-1]
-
-    # 안전하게 컬럼 찾기 (대소문자 무시)
-    rsi_col = [c for c in df.columns if c.lower().startswith('rsi')][0]
-    macd_col = [c for c in df.columns if c.lower().startswith('macd_') and not c.lower().endswith('h') and not c.lower().endswith('s')][0]
+    # AI 참고용 지표 (공용 지표 엔진의 메모를 그대로 재사용)
+    close_col = 'close' if 'close' in df.columns else 'Close'
+    curr_close = df[close_col].iloc[-1]
+    rsi_val = indicators.last(df, 'rsi', length=14)
+    macd_val = indicators.last(df, 'macd')
 
     summary = f"""
     [기술적 지표 요약]
-    - 현재가: {curr['close']:.0f}
-    - RSI(14): {curr.get(rsi_col, 0):.2f}
-    - MACD: {curr.get(macd_col, 0):.2f}
+    - 현재가: {curr_close:.0f}
+    - RSI(14): {rsi_val:.2f}
+    - MACD: {macd_val:.2f}
     """
     return summary
\ No newline at end of file
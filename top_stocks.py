@@ -0,0 +1,123 @@
+import json
+import time
+import hashlib
+import threading
+
+import data_collector
+import indicators
+import scraping
+import stock_utils
+import strategy
+
+# =========================================================
+# 🔥 인기 검색 종목 보드 (백그라운드 갱신 + 상위 종목 캐시 예열)
+# =========================================================
+# 네이버 인기 검색 순위를 INTERVAL마다 백그라운드에서 받아 두고, /top_stocks는 메모리의 JSON 바이트와
+# ETag를 그대로 돌려줍니다. 순위를 받을 때마다 상위 종목의 차트/시세/뉴스/지표 캐시를 미리 채워서
+# 사용자가 목록에서 종목을 눌렀을 때 첫 /analyze도 캐시에서 바로 시작하게 합니다.
+TOP_URL = "https://finance.naver.com/sise/lastsearch2.naver"
+INTERVAL = 30.0
+TOP_N = 20
+FALLBACK = ["삼성전자", "SK하이닉스", "카카오", "NAVER", "현대차"]
+WARM_STRATEGIES = ("volatility", "goldencross", "rsi_bollinger")
+
+
+def fetch_top_stocks(limit=TOP_N):
+    response = data_collector.SESSION.get(TOP_URL, headers={'User-Agent': 'Mozilla/5.0'}, timeout=5)
+    response.raise_for_status()
+    return scraping.parse_top_stocks(response.content, limit=limit, encoding=response.encoding)
+
+
+def warm_caches(names):
+    """상위 종목의 차트(일괄 다운로드)/실시간 시세/뉴스/보조지표·전략 신호 메모를 미리 채웁니다."""
+    targets = {}
+    for name in names:
+        stock_code, _ = stock_utils.get_stock_info(name)
+        if stock_code:
+            targets[str(stock_code).strip()] = data_collector.to_yahoo_ticker(stock_code)
+
+    charts = data_collector.get_yahoo_charts(list(targets.values()))
+    data_collector.QUOTES.get_many(list(targets))
+    for code in targets:
+        data_collector.get_naver_news(code)
+
+    for df in charts.values():
+        if df is None or df.empty:
+            continue
+        indicators.last(df, 'rsi', length=14)
+        indicators.last(df, 'macd')
+        strategy.get_chart_summary(df)
+        for strategy_type in WARM_STRATEGIES:
+            strategy.get_strategy_signal(df, strategy_type)
+    return len(targets)
+
+
+class TopStocksBoard:
+    def __init__(self, fetch=fetch_top_stocks, warm=warm_caches, interval=INTERVAL):
+        self.fetch = fetch
+        self.warm = warm
+        self.interval = interval
+        self._body = None
+        self._etag = None
+        self._warmed_etag = None
+        self.updated_at = 0.0
+        self._lock = threading.Lock()
+        self._thread = None
+        self.counters = {"refreshes": 0, "changes": 0, "errors": 0, "warmed": 0}
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="top-stocks", daemon=True)
+                self._thread.start()
+
+    def _loop(self):
+        while True:
+            self.refresh()
+            time.sleep(self.interval)
+
+    def refresh(self, warm=True):
+        try:
+            names = self.fetch()
+            if not names:
+                raise ValueError("빈 순위 목록")
+        except Exception as e:
+            print(f"   ⚠️ [TopStocks] 인기 종목 갱신 실패: {e}")
+            self.counters["errors"] += 1
+            if self._body is None:
+                self._publish(FALLBACK)
+            return
+
+        self.counters["refreshes"] += 1
+        if self._publish(names):
+            self.counters["changes"] += 1
+
+        # 순위가 바뀐 뒤 아직 예열하지 않았으면 (요청 경로에서 받은 순위 포함) 백그라운드에서 예열합니다.
+        if warm and self._warmed_etag != self._etag:
+            self._warmed_etag = self._etag
+            try:
+                self.counters["warmed"] += self.warm(names)
+            except Exception as e:
+                print(f"   ⚠️ [TopStocks] 캐시 예열 실패: {e}")
+
+    def _publish(self, names):
+        """응답 바이트/ETag를 미리 만들어 교체, 순위가 바뀌었으면 True"""
+        body = json.dumps({"top_stocks": names}, ensure_ascii=False).encode("utf-8")
+        etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+        with self._lock:
+            changed = etag != self._etag
+            self._body, self._etag, self.updated_at = body, etag, time.time()
+        return changed
+
+    def snapshot(self):
+        """(JSON 바이트, ETag) — 아직 한 번도 못 받았으면 이 자리에서 한 번 받습니다."""
+        if self._body is None:
+            self.refresh(warm=False)
+        with self._lock:
+            return self._body, self._etag
+
+    def stats(self):
+        return dict(self.counters, age=round(time.time() - self.updated_at, 3) if self.updated_at else None)
+
+
+BOARD = TopStocksBoard()
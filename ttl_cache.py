@@ -0,0 +1,131 @@
+import time
+import threading
+from collections import OrderedDict
+
+# =========================================================
+# ⏳ 크기 제한 TTL + LRU 캐시 (동일 요청 단일 실행)
+# =========================================================
+# - maxsize를 넘으면 가장 오래 안 쓴 항목부터 제거(LRU)
+# - ttl(초)이 지난 항목은 조회 시점에 만료 처리
+# - get_or_compute: 같은 키로 동시에 들어온 요청은 첫 요청 하나만 계산하고 나머지는 그 결과를 기다립니다.
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class TTLCache:
+    def __init__(self, maxsize=512, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (expire_at, value)
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "coalesced": 0, "evictions": 0, "expired": 0}
+
+    def _lookup(self, key, now):
+        """락을 잡은 상태에서 호출: 살아있는 값이면 (True, 값)"""
+        item = self._data.get(key)
+        if item is None:
+            return False, None
+        expire_at, value = item
+        if now >= expire_at:
+            del self._data[key]
+            self.counters["expired"] += 1
+            return False, None
+        self._data.move_to_end(key)
+        return True, value
+
+    def _store(self, key, value, ttl):
+        self._data[key] = (time.time() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.counters["evictions"] += 1
+
+    def get(self, key, default=None):
+        with self._lock:
+            found, value = self._lookup(key, time.time())
+            self.counters["hits" if found else "misses"] += 1
+            return value if found else default
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._store(key, value, ttl)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def get_or_compute(self, key, compute, ttl=None, wait_timeout=None):
+        """
+        캐시에 있으면 즉시 반환, 없으면 compute()를 한 번만 실행해서 저장 후 반환
+        compute가 예외를 던지면 저장하지 않고, 기다리던 요청들에도 같은 예외가 전달됩니다.
+        wait_timeout(초)을 주면 다른 요청의 계산을 그 시간까지만 기다리고 TimeoutError를 던집니다.
+        """
+        with self._lock:
+            found, value = self._lookup(key, time.time())
+            if found:
+                self.counters["hits"] += 1
+                return value
+
+            flight = self._inflight.get(key)
+            if flight is None:
+                flight = _Flight()
+                self._inflight[key] = flight
+                leader = True
+                self.counters["misses"] += 1
+            else:
+                leader = False
+                self.counters["coalesced"] += 1
+
+        if not leader:
+            if not flight.done.wait(wait_timeout):
+                raise TimeoutError(f"{wait_timeout}초 안에 진행 중인 계산이 끝나지 않았습니다.")
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = compute()
+            with self._lock:
+                self._store(key, flight.value, ttl)
+            return flight.value
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.done.set()
+
+    async def aget_or_compute(self, key, acompute, ttl=None, wait_timeout=None):
+        """
+        get_or_compute의 비동기 버전 (acompute()는 awaitable 반환, SQLiteCache와 같은 인터페이스)
+        프로세스 안 캐시라 다른 워커를 기다릴 일이 없으므로 wait_timeout은 쓰지 않고, 동시 요청 합치기는 호출자가 맡습니다.
+        """
+        with self._lock:
+            found, value = self._lookup(key, time.time())
+            self.counters["hits" if found else "misses"] += 1
+        if found:
+            return value
+        value = await acompute()
+        self.set(key, value, ttl)
+        return value
+
+    def stats(self):
+        with self._lock:
+            lookups = self.counters["hits"] + self.counters["misses"] + self.counters["coalesced"]
+            served = self.counters["hits"] + self.counters["coalesced"]
+            return dict(self.counters, size=len(self._data), inflight=len(self._inflight),
+                        hit_ratio=(served / lookups) if lookups else 0.0)
+
+    def __len__(self):
+        return len(self._data)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()